@@ -0,0 +1,70 @@
+"""
+Shared Modules Check
+Keep the helper modules that are copied across the apps byte-for-byte identical.
+
+The desktop editors (v1/editors), the shortcuts, the FastAPI backend and the
+Flask app each run from their own directory with their own import root, so
+helpers such as media_probe are copied into every tree that uses them. The
+copy under the FastAPI backend's services/ is the one to edit; this script
+fails when any other copy differs from it, and `--fix` copies it over.
+
+    python check_shared_modules.py          # exit 1 and list copies that drifted
+    python check_shared_modules.py --fix    # overwrite the copies with the source
+"""
+
+import sys
+import shutil
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+BACKEND = "ui_web_app/automation_video_uploading/backend/services"
+SHROTS = "ui_web_app/shrots_web_apps/services"
+EDITORS = "v1/editors"
+SHORTCUTS = "shortcuts"
+
+# module -> trees holding a copy; the backend copy is the source of truth
+SHARED_MODULES = {
+    "media_probe.py": [SHROTS, EDITORS],
+    "transcript_cache.py": [SHROTS, EDITORS],
+    "playlist_index.py": [SHROTS, SHORTCUTS],
+    "encoder_caps.py": [EDITORS],
+    "segmented_render.py": [EDITORS],
+    "ducking.py": [EDITORS],
+    "music_bed.py": [EDITORS],
+}
+
+
+def find_drift(root: Path = ROOT):
+    """(source, copy) pairs whose bytes differ, including copies that are missing."""
+    drifted = []
+    for name, trees in SHARED_MODULES.items():
+        source = root / BACKEND / name
+        expected = source.read_bytes()
+        for tree in trees:
+            copy = root / tree / name
+            if not copy.exists() or copy.read_bytes() != expected:
+                drifted.append((source, copy))
+    return drifted
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check that shared helper modules are identical across apps.")
+    parser.add_argument("--fix", action="store_true", help="copy the backend source over every drifted copy")
+    args = parser.parse_args(argv)
+
+    drifted = find_drift()
+    if not drifted:
+        print(f"✅ {len(SHARED_MODULES)} shared modules in sync")
+        return 0
+    for source, copy in drifted:
+        if args.fix:
+            shutil.copyfile(source, copy)
+            print(f"🔄 {copy.relative_to(ROOT)} <- {source.relative_to(ROOT)}")
+        else:
+            print(f"❌ {copy.relative_to(ROOT)} differs from {source.relative_to(ROOT)}")
+    return 0 if args.fix else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Playlist Index
+Per-channel cache of a YouTube account's playlists (title → id).
+
+The first lookup pages through `playlists().list(mine=True)` once and keeps
+every playlist, not just the first 50; later lookups for any title are
+answered from memory until the TTL expires. Playlists created through the
+index are added to it immediately, so a batch that creates a playlist and
+then reuses it never re-lists or creates a duplicate.
+
+Indexes are shared per channel: pass a stable `channel_key` (channel id or
+token name) to reuse one across service objects, otherwise the index lives
+as long as the service object itself.
+"""
+
+import os
+import time
+import logging
+import threading
+import weakref
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_INDEX_TTL = float(os.environ.get("YT_PLAYLIST_INDEX_TTL", "600"))
+PAGE_SIZE = 50  # API maximum for playlists().list
+
+_BY_CHANNEL: Dict[str, "PlaylistIndex"] = {}
+_BY_SERVICE = weakref.WeakKeyDictionary()
+_REGISTRY_LOCK = threading.Lock()
+
+
+class PlaylistIndex:
+    """Title → playlist lookup for one channel, refreshed every `ttl` seconds."""
+
+    def __init__(self, ttl: float = PLAYLIST_INDEX_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self.list_calls = 0
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def invalidate(self) -> None:
+        """Force the next lookup to re-list the channel's playlists."""
+        with self._lock:
+            self._loaded_at = None
+
+    def refresh(self, youtube) -> None:
+        """Page through every playlist on the channel."""
+        entries: Dict[str, Dict[str, Any]] = {}
+        page_token = None
+        with self._lock:
+            while True:
+                response = youtube.playlists().list(
+                    part="snippet,contentDetails", mine=True,
+                    maxResults=PAGE_SIZE, pageToken=page_token,
+                ).execute()
+                self.list_calls += 1
+                for item in response.get("items", []):
+                    title = item["snippet"]["title"]
+                    # Titles are not unique on YouTube; keep the first one listed
+                    entries.setdefault(title, {
+                        "id": item["id"],
+                        "title": title,
+                        "description": item["snippet"].get("description", ""),
+                        "video_count": item.get("contentDetails", {}).get("itemCount", 0),
+                    })
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    break
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+        logger.info("Indexed %d playlists in %d page(s)", len(entries), self.list_calls)
+
+    def playlists(self, youtube) -> List[Dict[str, Any]]:
+        """All playlists on the channel (listing only when the index is stale)."""
+        with self._lock:
+            if self.stale:
+                self.refresh(youtube)
+            return [dict(entry) for entry in self._entries.values()]
+
+    def get(self, youtube, title: str) -> Optional[str]:
+        """Playlist id for `title`, or None if the channel has no such playlist."""
+        with self._lock:
+            if self.stale:
+                self.refresh(youtube)
+            entry = self._entries.get(title)
+            return entry["id"] if entry else None
+
+    def resolve(self, youtube, title: str, privacy_status: str = "public") -> str:
+        """
+        Playlist id for `title`, creating the playlist if it does not exist.
+        Lookup and create happen under one lock so concurrent uploads into a
+        new playlist create it once.
+        """
+        with self._lock:
+            playlist_id = self.get(youtube, title)
+            if playlist_id:
+                return playlist_id
+            created = youtube.playlists().insert(
+                part="snippet,status",
+                body={
+                    "snippet": {
+                        "title": title,
+                        "description": f"Playlist for {title}",
+                        "defaultLanguage": "en",
+                    },
+                    "status": {"privacyStatus": privacy_status},
+                },
+            ).execute()
+            self._entries[title] = {
+                "id": created["id"],
+                "title": title,
+                "description": f"Playlist for {title}",
+                "video_count": 0,
+            }
+            logger.info("Created playlist %s (%s)", title, created["id"])
+            return created["id"]
+
+    def note_item_added(self, playlist_id: str) -> None:
+        """Keep the cached item count in step after a playlistItems insert."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["id"] == playlist_id:
+                    entry["video_count"] = entry.get("video_count", 0) + 1
+                    break
+
+
+def get_playlist_index(youtube, channel_key: Optional[str] = None) -> PlaylistIndex:
+    """Shared index for `channel_key`, or for this service object when no key is given."""
+    with _REGISTRY_LOCK:
+        if channel_key:
+            index = _BY_CHANNEL.get(channel_key)
+            if index is None:
+                index = _BY_CHANNEL[channel_key] = PlaylistIndex()
+            return index
+        try:
+            index = _BY_SERVICE.get(youtube)
+            if index is None:
+                index = _BY_SERVICE[youtube] = PlaylistIndex()
+            return index
+        except TypeError:  # service object can't be weak-referenced
+            return PlaylistIndex()
@@ -10,6 +10,8 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 
+from playlist_index import get_playlist_index
+
 # Constants
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload", "https://www.googleapis.com/auth/youtube.force-ssl"]
 CATEGORY_MAP = {
@@ -104,29 +106,16 @@ def convert_ist_to_utc(ist_time_str):
         return None
 
 def get_playlist_id(youtube, playlist_name):
-    """Get playlist ID by name, create if doesn't exist"""
+    """Get playlist ID by name, create if doesn't exist (cached per service)"""
     try:
-        request = youtube.playlists().list(part="snippet", mine=True, maxResults=50)
-        response = request.execute()
-
-        for playlist in response.get("items", []):
-            if playlist["snippet"]["title"] == playlist_name:
-                print(f"📋 Found existing playlist: {playlist_name}")
-                return playlist["id"]
+        index = get_playlist_index(youtube)
+        playlist_id = index.get(youtube, playlist_name)
+        if playlist_id:
+            print(f"📋 Found existing playlist: {playlist_name}")
+            return playlist_id
 
         print(f"🌟 Creating new playlist: {playlist_name}")
-        create_request = youtube.playlists().insert(
-            part="snippet,status",
-            body={
-                "snippet": {
-                    "title": playlist_name,
-                    "description": f"Playlist for {playlist_name}",
-                    "defaultLanguage": "en"
-                },
-                "status": {"privacyStatus": "public"}
-            }
-        )
-        return create_request.execute()["id"]
+        return index.resolve(youtube, playlist_name)
 
     except Exception as e:
         print(f"❌ Error handling playlist: {e}")
@@ -144,6 +133,7 @@ def add_video_to_playlist(youtube, video_id, playlist_id):
                 }
             }
         ).execute()
+        get_playlist_index(youtube).note_item_added(playlist_id)
         print(f"✅ Video added to playlist successfully")
     except Exception as e:
         print(f"❌ Failed to add video to playlist: {e}")
@@ -0,0 +1,176 @@
+"""
+Segmented Render Benchmark
+Single-process vs segmented libx264 encode of one file, with an A/V-sync check at every seam.
+
+The single-process encode is the reference. For each segment count the
+segmented render is timed, then every seam is checked: a short window of
+small grayscale frames around the cut is decoded from both outputs and the
+segmented window is slid against the reference to find the frame offset
+that matches best. Audio is encoded once over the whole timeline, so a
+video offset at a seam is exactly the A/V desync a viewer would see there;
+0 at every seam means the stitched video is in sync. The audio-minus-video
+start offset of both outputs is compared as well.
+
+Run from the backend directory:
+
+    python -m benchmarks.segmented_render_bench input.mp4 [--ass subs.ass] [--segments 2,4,8] [--preset medium]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Optional, List, Tuple
+
+from services.segmented_render import (
+    render_segmented, probe_keyframes, plan_ranges, auto_segment_count, escape_filter_path,
+)
+
+# Seam check: frames decoded each side of a cut, how far to slide, thumbnail size
+WINDOW_FRAMES = 6
+MAX_OFFSET_FRAMES = 3
+THUMB = 32
+
+
+def _run(cmd: List[str]) -> Tuple[bool, str]:
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                         encoding="utf-8", errors="replace")
+    return res.returncode == 0, res.stderr
+
+
+def _video_fps(path: str) -> float:
+    res = subprocess.run(["ffprobe", "-v", "error", "-select_streams", "v:0", "-of", "json",
+                          "-show_entries", "stream=avg_frame_rate", path], capture_output=True, text=True)
+    try:
+        num, _, den = json.loads(res.stdout)["streams"][0]["avg_frame_rate"].partition("/")
+        return float(num) / float(den or 1)
+    except (ValueError, KeyError, IndexError, ZeroDivisionError):
+        return 30.0
+
+
+def _start_offset(path: str) -> Optional[float]:
+    """Audio start minus video start (seconds), or None when either stream is missing."""
+    res = subprocess.run(["ffprobe", "-v", "error", "-of", "json", "-show_entries",
+                          "stream=codec_type,start_time", path], capture_output=True, text=True)
+    try:
+        starts = {s["codec_type"]: float(s["start_time"]) for s in json.loads(res.stdout)["streams"]}
+        return starts["audio"] - starts["video"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _thumbnails(path: str, start: float, count: int) -> List[bytes]:
+    """`count` frames from `start` on, as THUMB×THUMB grayscale bytes."""
+    res = subprocess.run(["ffmpeg", "-v", "error", "-ss", f"{max(0.0, start):.6f}", "-i", path,
+                          "-frames:v", str(count), "-vf", f"scale={THUMB}:{THUMB},format=gray",
+                          "-f", "rawvideo", "-"], capture_output=True)
+    size = THUMB * THUMB
+    data = res.stdout
+    return [data[i:i + size] for i in range(0, len(data) - size + 1, size)]
+
+
+def _difference(a: bytes, b: bytes) -> float:
+    return sum(abs(x - y) for x, y in zip(a, b)) / max(1, len(a))
+
+
+def seam_offset(reference: str, candidate: str, seam: float, fps: float) -> Optional[int]:
+    """
+    Frame offset of `candidate` against `reference` around `seam` (0 = in sync),
+    or None when the window could not be decoded.
+    """
+    span = 2 * WINDOW_FRAMES
+    start = seam - WINDOW_FRAMES / fps
+    ref = _thumbnails(reference, start, span + 2 * MAX_OFFSET_FRAMES)
+    cand = _thumbnails(candidate, start, span + 2 * MAX_OFFSET_FRAMES)
+    if len(ref) < span or len(cand) < span:
+        return None
+
+    def error(offset: int) -> float:
+        pairs = [(cand[i], ref[i + offset]) for i in range(len(cand))
+                 if 0 <= i + offset < len(ref)]
+        return sum(_difference(c, r) for c, r in pairs) / max(1, len(pairs))
+
+    offsets = range(-MAX_OFFSET_FRAMES, MAX_OFFSET_FRAMES + 1)
+    # Ties (static picture) resolve to the smallest shift
+    return min(offsets, key=lambda offset: (round(error(offset), 3), abs(offset)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Single-process vs segmented libx264 encode")
+    parser.add_argument("input")
+    parser.add_argument("--ass", default=None, help="ASS file to burn in")
+    parser.add_argument("--segments", default="", help="comma-separated counts (default: auto)")
+    parser.add_argument("--preset", default="medium")
+    parser.add_argument("--crf", default="23")
+    parser.add_argument("--keep", action="store_true", help="keep the rendered files and print where they are")
+    args = parser.parse_args(argv)
+
+    def vf(ass: Optional[str]) -> List[str]:
+        return ["-vf", f"ass='{escape_filter_path(ass)}'"] if ass else []
+
+    def x264(threads: Optional[int] = None) -> List[str]:
+        extra = ["-threads", str(threads)] if threads else []
+        return ["-c:v", "libx264", "-preset", args.preset, "-crf", args.crf] + extra
+
+    out_dir = tempfile.mkdtemp(prefix="segbench_")
+    in_sync = True
+    try:
+        single_out = os.path.join(out_dir, "single.mp4")
+        started = time.monotonic()
+        ok, err = _run(["ffmpeg", "-y", "-v", "error", "-i", args.input] + vf(args.ass) +
+                       x264() + ["-c:a", "aac", "-b:a", "192k", single_out])
+        single = time.monotonic() - started
+        if not ok:
+            print(f"single-process encode failed:\n{err}")
+            return 1
+        fps = _video_fps(single_out)
+        single_start = _start_offset(single_out)
+        print(f"{'mode':<16}{'wall':>10}{'speedup':>10}  seam offsets (frames)")
+        print(f"{'single':<16}{single:>9.1f}s{1.0:>9.2f}x  -")
+
+        keyframes, duration = probe_keyframes(args.input)
+        counts = [int(c) for c in args.segments.split(",") if c.strip()] or [auto_segment_count(duration or 0)]
+        for count in counts:
+            out = os.path.join(out_dir, f"seg{count}.mp4")
+            started = time.monotonic()
+            ok, err = render_segmented(
+                args.input, out,
+                video_cmd=lambda seg: (["ffmpeg", "-y", "-v", "error"] + seg.input_args(args.input) +
+                                       vf(seg.ass_paths[0] if seg.ass_paths else None) +
+                                       ["-an"] + x264(seg.threads) + [seg.output]),
+                audio_cmd=lambda path: ["ffmpeg", "-y", "-v", "error", "-i", args.input,
+                                        "-vn", "-c:a", "aac", "-b:a", "192k", path],
+                ass_paths=[args.ass] if args.ass else None,
+                segments=count,
+            )
+            wall = time.monotonic() - started
+            label = f"segmented×{count}"
+            if not ok:
+                in_sync = False
+                print(f"{label:<16}{'failed':>10}  {err}")
+                continue
+
+            # render_segmented plans deterministically, so the same call gives its cut points
+            seams = [start for start, _ in plan_ranges(keyframes, duration or 0, count)[1:]]
+            offsets = [seam_offset(single_out, out, seam, fps) for seam in seams]
+            seg_start = _start_offset(out)
+            start_drift = (seg_start - single_start) if None not in (seg_start, single_start) else 0.0
+            synced = all(o == 0 for o in offsets) and abs(start_drift) <= 1.0 / fps
+            in_sync = in_sync and synced
+            shown = ", ".join("?" if o is None else f"{o:+d}" for o in offsets)
+            print(f"{label:<16}{wall:>9.1f}s{single / wall:>9.2f}x  {'✓' if synced else '✗'} [{shown}]"
+                  f" a/v start {start_drift * 1000:+.0f}ms")
+        return 0 if in_sync else 2
+    finally:
+        if args.keep:
+            print(f"outputs kept in {out_dir}")
+        else:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,7 +18,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from routers.editor import router as editor_router
-from routers.uploader import router as uploader_router
+from routers.uploader import router as uploader_router, resume_interrupted_uploads
+from services.whisper_pool import whisper_pool
+from services.transcript_cache import transcript_cache
+from services.job_store import job_store
+from services.clip_normalizer import normalized_cache
+from services.media_probe import media_probe
+from services.encoder_caps import encoder_registry
+from services.music_bed import music_beds
+from services.upload_ingest import RequestSizeLimit
 
 # ─────────────────────────── App Setup ───────────────────────────
 
@@ -44,9 +52,66 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+WHISPER_POOL_REAP_INTERVAL = 60  # seconds between idle-model sweeps
+JOB_STORE_EVICT_INTERVAL = 300  # seconds between finished-job sweeps
+
+
+async def _warm_whisper_pool():
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, whisper_pool.warm)
+        print("Whisper model pool warmed")
+    except Exception as e:
+        print(f"Whisper model warm-up skipped: {e}")
+
+
+async def _detect_encoders():
+    try:
+        caps = await asyncio.to_thread(encoder_registry.get)
+        print(f"Encoders detected — {'NVENC' if caps.gpu_available else 'CPU only (libx264)'}")
+    except Exception as e:
+        print(f"Encoder detection failed: {e}")
+
+
+async def _reap_whisper_pool():
+    while True:
+        await asyncio.sleep(WHISPER_POOL_REAP_INTERVAL)
+        whisper_pool.evict_idle()
+
+
+async def _evict_job_store():
+    while True:
+        await asyncio.sleep(JOB_STORE_EVICT_INTERVAL)
+        try:
+            await asyncio.to_thread(job_store.evict_expired)
+        except Exception as e:
+            print(f"Job store eviction failed: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     cleanup_old_tokens()
+    interrupted = job_store.recover_interrupted()
+    if interrupted:
+        print(f"Marked {interrupted} interrupted job(s) as failed")
+    asyncio.create_task(_evict_job_store())
+    # Trial encodes run once here (or come from the disk cache), never per job
+    asyncio.create_task(_detect_encoders())
+    # Warm in the background so the API is reachable while the model loads
+    asyncio.create_task(_warm_whisper_pool())
+    asyncio.create_task(_reap_whisper_pool())
+    resumed = await resume_interrupted_uploads()
+    if resumed:
+        print(f"Resuming {resumed} interrupted upload job(s)")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    job_store.flush()
+
+# Oversized uploads are refused before Starlette spools them to disk
+# (added before CORS so the 413 still carries CORS headers)
+app.add_middleware(RequestSizeLimit)
 
 # CORS — allow React dev server
 app.add_middleware(
@@ -82,6 +147,12 @@ async def health():
         "status": "ok",
         "message": "Automation Video Editor & Uploader API is running",
         "version": "1.0.0",
+        "whisper_pool": whisper_pool.metrics(),
+        "transcript_cache": transcript_cache.stats(),
+        "normalized_cache": normalized_cache.stats(),
+        "media_probe": media_probe.stats(),
+        "music_beds": music_beds.stats(),
+        "encoders": (await asyncio.to_thread(encoder_registry.get)).summary(),
     }
 
 
@@ -65,6 +65,7 @@ class SectionMergeConfig(BaseModel):
     quality_preset: QualityPreset = QualityPreset.fast
     enable_gpu: bool = True
     music_volume: float = Field(default=0.30, ge=0.0, le=1.0)
+    merge_workers: int = Field(default=0, ge=0, le=16)  # concurrent ffmpeg processes; 0 = size from CPU/encoder
     sections: List[SectionInfo] = []
 
 
@@ -99,6 +100,10 @@ class VideoEditConfig(BaseModel):
     enable_auto_edit: bool = False
     enable_ducking: bool = True
     enable_merge: bool = False
+    transcribe_workers: int = Field(default=1, ge=1, le=8)
+    encode_workers: int = Field(default=2, ge=1, le=16)
+    ffmpeg_raw_log: bool = False  # forward every ffmpeg log line, not just progress
+    render_segments: int = Field(default=0, ge=0, le=32)  # CPU encodes of long videos: 0 = auto, 1 = single process
     subtitle_settings: SubtitleSettings = Field(default_factory=SubtitleSettings)
     edited_transcripts: Optional[Dict[str, List[Dict[str, Any]]]] = None
 
@@ -110,6 +115,7 @@ class JobStatusResponse(BaseModel):
     logs: List[str] = []
     output_files: List[str] = []
     error: Optional[str] = None
+    last_seq: int = 0  # sequence number of the newest job event
 
 
 # ─────────────────────────── YouTube Uploader Schemas ───────────────────────────
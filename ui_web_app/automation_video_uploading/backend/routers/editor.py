@@ -5,23 +5,26 @@ Video Editor Router — FastAPI endpoints for video processing jobs.
 import asyncio
 import json
 import os
+import shutil
 import uuid
 import traceback
 from pathlib import Path
-from typing import Dict, Any
+from typing import Optional
 
-from fastapi import APIRouter, File, Form, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException, WebSocket
 from fastapi.responses import FileResponse
 
 from models.schemas import JobStatusResponse, JobStatus, VideoEditConfig, SectionMergeConfig
 from services.video_processor import process_all_videos, transcribe_video, merge_sections_videos
+from services.upload_ingest import UploadIngest, IngestBudgetExceeded
+from services.job_store import job_store
+from services.event_hub import event_hub
 
 router = APIRouter(prefix="/editor", tags=["editor"])
 
-# ─────────────────────────── In-Memory Job Store ───────────────────────────
+# ─────────────────────────── Job Store ───────────────────────────
 
-_jobs: Dict[str, Dict[str, Any]] = {}
-_ws_connections: Dict[str, WebSocket] = {}
+JOB_KIND = "editor"
 
 UPLOAD_DIR = Path("uploads")
 OUTPUT_DIR = Path("outputs")
@@ -32,68 +35,41 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 # ─────────────────────────── WebSocket ───────────────────────────
 
 @router.websocket("/ws/{job_id}")
-async def editor_ws(websocket: WebSocket, job_id: str):
+async def editor_ws(websocket: WebSocket, job_id: str, since: int = 0):
+    """
+    Stream a job's events. Any number of clients may watch one job; a client
+    reconnecting with ?since=<seq> receives only the events after that seq.
+    """
     await websocket.accept()
-    _ws_connections[job_id] = websocket
-    try:
-        # Replay any existing logs sent before WS connection was established
-        job = _jobs.get(job_id)
-        if job:
-            for log_entry in list(job.get("logs", [])):
-                try:
-                    if log_entry.startswith("[") and "]" in log_entry:
-                        mtype_str, mtext = log_entry[1:].split("]", 1)
-                        mtype = mtype_str.strip()
-                        mtext = mtext.strip()
-                    else:
-                        mtype, mtext = "LOG", log_entry
-                    await websocket.send_json({
-                        "type": mtype,
-                        "message": mtext,
-                        "progress": job.get("progress", 0.0),
-                    })
-                except Exception:
-                    pass
-
-        # Keep alive until job finishes or client disconnects
-        while True:
-            job = _jobs.get(job_id)
-            if job and job["status"] in (JobStatus.complete, JobStatus.failed, JobStatus.stopped):
-                break
-            await asyncio.sleep(0.5)
-    except WebSocketDisconnect:
-        pass
-    finally:
-        _ws_connections.pop(job_id, None)
-
+    await event_hub.stream(websocket, job_id, since)
 
 
 async def _send_ws(job_id: str, msg_type: str, message: str, progress=None):
-    """Push a message to the WebSocket client for a job."""
-    job = _jobs.get(job_id)
-    if job is not None:
-        job["logs"].append(f"[{msg_type}] {message}")
-        if progress is not None:
-            job["progress"] = progress
-
-        # Update status based on type
-        if msg_type == "COMPLETE":
-            job["status"] = JobStatus.complete
-        elif msg_type in ("ERROR", "FAILED"):
-            job["status"] = JobStatus.failed
-        elif msg_type == "STOPPED":
-            job["status"] = JobStatus.stopped
-
-    ws = _ws_connections.get(job_id)
-    if ws:
-        try:
-            await ws.send_json({
-                "type": msg_type,
-                "message": message,
-                "progress": progress,
-            })
-        except Exception:
-            pass
+    """Record a job event (status/progress follow its type) and fan it out to subscribers."""
+    event = job_store.record(job_id, msg_type, message, progress)
+    if event is not None:
+        event_hub.publish(job_id, event.to_dict())
+
+
+async def _ingest_files(job_dir: Path, *uploads) -> tuple:
+    """
+    Stream each upload into job_dir (None entries are skipped) under one
+    request byte budget. Returns (ingest, saved paths in argument order);
+    on an oversized request the job dir is removed and a 413 raised.
+    """
+    ingest = UploadIngest()
+    paths = []
+    try:
+        for upload in uploads:
+            if upload is None:
+                paths.append(None)
+                continue
+            saved = await ingest.save_into(upload, job_dir)
+            paths.append(str(saved.path))
+    except IngestBudgetExceeded as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(status_code=413, detail=str(e))
+    return ingest, paths
 
 
 # ─────────────────────────── Endpoints ───────────────────────────
@@ -108,12 +84,15 @@ async def transcribe_video_endpoint(
     """
     import tempfile
     
-    # Save uploaded video to temp file
+    # Stream uploaded video to a temp file
     suffix = Path(video.filename).suffix
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await video.read())
         tmp_path = tmp.name
-        
+    try:
+        await UploadIngest().save(video, tmp_path)
+    except IngestBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
     try:
         # Dummy progress callback
         async def dummy_cb(msg_type: str, msg: str, prog: float = None):
@@ -152,38 +131,17 @@ async def start_processing(
     except Exception:
         edit_config = VideoEditConfig()
 
-    # Save uploaded video files
-    video_paths = []
-    for vid in videos:
-        dest = job_dir / vid.filename
-        content = await vid.read()
-        dest.write_bytes(content)
-        video_paths.append(str(dest))
-
-    extra_path = None
-    if extra_video:
-        dest = job_dir / extra_video.filename
-        content = await extra_video.read()
-        dest.write_bytes(content)
-        extra_path = str(dest)
-
-    music_path = None
-    if background_music:
-        dest = job_dir / background_music.filename
-        content = await background_music.read()
-        dest.write_bytes(content)
-        music_path = str(dest)
+    # Stream uploaded files to disk
+    ingest, saved = await _ingest_files(job_dir, *videos, extra_video or None, background_music or None)
+    video_paths = saved[:len(videos)]
+    extra_path, music_path = saved[len(videos):]
 
     stop_event = asyncio.Event()
 
     # Init job record
-    _jobs[job_id] = {
-        "status": JobStatus.running,
-        "progress": 0.0,
-        "logs": [],
-        "output_files": [],
-        "stop_event": stop_event,
-    }
+    job = job_store.create(job_id, JOB_KIND)
+    job.stop_event = stop_event
+    job_store.record(job_id, "LOG", ingest.summary())
 
     # Launch processing in background
     async def _run():
@@ -202,8 +160,11 @@ async def start_processing(
                 stop_event=stop_event,
                 language=edit_config.subtitle_settings.language,
             )
-            _jobs[job_id]["output_files"] = [Path(f).name for f in output_files]
-            await _send_ws(job_id, "COMPLETE", "🎉 All videos processed successfully!", 100.0)
+            job_store.update(job_id, output_files=[Path(f).name for f in output_files])
+            if len(output_files) < len(video_paths):
+                await _send_ws(job_id, "COMPLETE", f"🎉 {len(output_files)} of {len(video_paths)} videos processed", 100.0)
+            else:
+                await _send_ws(job_id, "COMPLETE", "🎉 All videos processed successfully!", 100.0)
         except Exception as e:
             tb = traceback.format_exc()
             print(f"[CRITICAL ERROR] Background processing failed:\n{tb}")
@@ -242,29 +203,15 @@ async def merge_sections_endpoint(
         print(f"[WARN] Error parsing SectionMergeConfig: {e}")
         merge_config = SectionMergeConfig()
 
-    uploaded_paths = []
-    for file in files:
-        dest = job_dir / file.filename
-        content = await file.read()
-        dest.write_bytes(content)
-        uploaded_paths.append(str(dest))
-
-    music_path = None
-    if background_music:
-        dest = job_dir / background_music.filename
-        content = await background_music.read()
-        dest.write_bytes(content)
-        music_path = str(dest)
+    ingest, saved = await _ingest_files(job_dir, *files, background_music or None)
+    uploaded_paths = saved[:len(files)]
+    music_path = saved[len(files)]
 
     stop_event = asyncio.Event()
 
-    _jobs[job_id] = {
-        "status": JobStatus.running,
-        "progress": 0.0,
-        "logs": [],
-        "output_files": [],
-        "stop_event": stop_event,
-    }
+    job = job_store.create(job_id, JOB_KIND)
+    job.stop_event = stop_event
+    job_store.record(job_id, "LOG", ingest.summary())
 
     async def _run():
         try:
@@ -282,7 +229,7 @@ async def merge_sections_endpoint(
                 progress_cb=cb,
                 stop_event=stop_event,
             )
-            _jobs[job_id]["output_files"] = [Path(f).name for f in output_files]
+            job_store.update(job_id, output_files=[Path(f).name for f in output_files])
             await _send_ws(job_id, "COMPLETE", "🎉 Section video merging complete!", 100.0)
         except Exception as e:
             tb = traceback.format_exc()
@@ -303,29 +250,30 @@ async def merge_sections_endpoint(
 
 async def get_job_status(job_id: str):
     """Poll job status (alternative to WebSocket)."""
-    job = _jobs.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return JobStatusResponse(
         job_id=job_id,
-        status=job["status"],
-        progress=job["progress"],
-        logs=job["logs"][-50:],  # last 50 log entries
-        output_files=job.get("output_files", []),
+        status=job.status,
+        progress=job.progress,
+        logs=[e.log_line() for e in job.recent(50)],  # last 50 log entries
+        output_files=job.output_files,
+        last_seq=job.last_seq,
     )
 
 
 @router.post("/stop/{job_id}")
 async def stop_job(job_id: str):
     """Request stop for a running job."""
-    job = _jobs.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
         
-    if "stop_event" in job:
-        job["stop_event"].set()
+    if job.stop_event is not None:
+        job.stop_event.set()
         
-    job["stop_requested"] = True
+    job.stop_requested = True
     return {"message": "Stop requested"}
 
 
@@ -382,14 +330,6 @@ async def watch_output(job_id: str, filename: str):
 
 
 @router.get("/jobs")
-async def list_jobs():
-    """List all jobs with their statuses."""
-    return [
-        {
-            "job_id": jid,
-            "status": job["status"],
-            "progress": job["progress"],
-            "output_count": len(job.get("output_files", [])),
-        }
-        for jid, job in _jobs.items()
-    ]
+async def list_jobs(status: Optional[JobStatus] = None, limit: int = 200):
+    """List jobs (newest first), optionally filtered by status."""
+    return job_store.list_jobs(kind=JOB_KIND, status=status, limit=limit)
@@ -5,11 +5,12 @@ YouTube Uploader Router — FastAPI endpoints for YouTube OAuth and video upload
 import asyncio
 import json
 import os
+import shutil
 import uuid
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-from fastapi import APIRouter, File, Form, UploadFile, HTTPException, WebSocket, WebSocketDisconnect, Request
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException, WebSocket, Request
 from fastapi.responses import RedirectResponse, JSONResponse
 
 from models.schemas import (
@@ -23,13 +24,18 @@ from services.youtube_uploader import (
     get_all_auth_statuses, get_all_playlists, upload_video, upload_batch,
     TOKENS_DIR
 )
+from services.resumable_upload import find_pending_uploads
+from services.playlist_index import get_playlist_index
+from services.upload_ingest import UploadIngest, IngestBudgetExceeded
+from services.job_store import job_store
+from services.event_hub import event_hub
 
 router = APIRouter(prefix="/uploader", tags=["uploader"])
 
+JOB_KIND = "uploader"
+
 # ─────────────────────────── Stores ───────────────────────────
 
-_upload_jobs: Dict[str, Dict[str, Any]] = {}
-_ws_connections: Dict[str, WebSocket] = {}
 _oauth_flows: Dict[str, Any] = {}  # state -> flow
 
 UPLOAD_DIR = Path("uploads/yt")
@@ -54,41 +60,20 @@ class OpenFilePathRequest(BaseModel):
 # ─────────────────────────── WebSocket ───────────────────────────
 
 @router.websocket("/ws/{job_id}")
-async def uploader_ws(websocket: WebSocket, job_id: str):
+async def uploader_ws(websocket: WebSocket, job_id: str, since: int = 0):
+    """
+    Stream a job's events. Any number of clients may watch one job; a client
+    reconnecting with ?since=<seq> receives only the events after that seq.
+    """
     await websocket.accept()
-    _ws_connections[job_id] = websocket
-    try:
-        while True:
-            job = _upload_jobs.get(job_id)
-            if job and job["status"] in (JobStatus.complete, JobStatus.failed, JobStatus.stopped):
-                break
-            await asyncio.sleep(0.5)
-    except WebSocketDisconnect:
-        pass
-    finally:
-        _ws_connections.pop(job_id, None)
+    await event_hub.stream(websocket, job_id, since)
 
 
 async def _send_ws(job_id: str, msg_type: str, message: str, progress=None):
-    """Push message to WebSocket client."""
-    job = _upload_jobs.get(job_id)
-    if job is not None:
-        job["logs"].append(f"[{msg_type}] {message}")
-        if progress is not None:
-            job["progress"] = progress
-        if msg_type == "COMPLETE":
-            job["status"] = JobStatus.complete
-        elif msg_type in ("ERROR", "FAILED"):
-            job["status"] = JobStatus.failed
-        elif msg_type == "STOPPED":
-            job["status"] = JobStatus.stopped
-
-    ws = _ws_connections.get(job_id)
-    if ws:
-        try:
-            await ws.send_json({"type": msg_type, "message": message, "progress": progress})
-        except Exception:
-            pass
+    """Record a job event and fan it out to subscribers."""
+    event = job_store.record(job_id, msg_type, message, progress)
+    if event is not None:
+        event_hub.publish(job_id, event.to_dict())
 
 
 # ─────────────────────────── Auth Endpoints ───────────────────────────
@@ -188,19 +173,16 @@ async def upload_single(
     job_dir = UPLOAD_DIR / job_id
     job_dir.mkdir(parents=True, exist_ok=True)
 
-    # Save video
-    video_path = str(job_dir / video_file.filename)
-    content = await video_file.read()
-    with open(video_path, "wb") as f:
-        f.write(content)
-
-    # Save thumbnail
+    # Stream video and thumbnail to disk
+    ingest = UploadIngest()
     thumb_path = None
-    if thumbnail:
-        thumb_path = str(job_dir / thumbnail.filename)
-        content = await thumbnail.read()
-        with open(thumb_path, "wb") as f:
-            f.write(content)
+    try:
+        video_path = str((await ingest.save_into(video_file, job_dir)).path)
+        if thumbnail:
+            thumb_path = str((await ingest.save_into(thumbnail, job_dir)).path)
+    except IngestBudgetExceeded as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(status_code=413, detail=str(e))
 
     # Parse metadata
     try:
@@ -213,11 +195,8 @@ async def upload_single(
         raise HTTPException(status_code=422, detail=f"Invalid metadata: {e}")
 
     # Init job
-    _upload_jobs[job_id] = {
-        "status": JobStatus.running,
-        "progress": 0.0,
-        "logs": [],
-    }
+    job_store.create(job_id, JOB_KIND)
+    job_store.record(job_id, "LOG", ingest.summary())
 
     async def _run():
         try:
@@ -227,7 +206,11 @@ async def upload_single(
             async def cb(msg_type, message, progress):
                 await _send_ws(job_id, msg_type, message, progress)
 
-            video_id = await upload_video(youtube, request_data, cb)
+            video_id = await upload_video(
+                youtube, request_data, cb,
+                state_dir=str(job_dir),
+                resume_context={"channel_id": channel_id, "job_id": job_id},
+            )
             if video_id:
                 await _send_ws(job_id, "COMPLETE",
                                f"🎉 Upload complete! Video ID: {video_id}", 100.0)
@@ -252,6 +235,8 @@ async def upload_batch_endpoint(
     videos_dir: server-side directory containing all video files.
     """
     job_id = str(uuid.uuid4())
+    job_dir = UPLOAD_DIR / job_id
+    job_dir.mkdir(parents=True, exist_ok=True)
 
     # Load metadata
     content = await metadata_file.read()
@@ -261,11 +246,7 @@ async def upload_batch_endpoint(
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Invalid metadata JSON: {e}")
 
-    _upload_jobs[job_id] = {
-        "status": JobStatus.running,
-        "progress": 0.0,
-        "logs": [],
-    }
+    job_store.create(job_id, JOB_KIND)
 
     async def _run():
         try:
@@ -275,7 +256,11 @@ async def upload_batch_endpoint(
             async def cb(msg_type, message, progress):
                 await _send_ws(job_id, msg_type, message, progress)
 
-            result = await upload_batch(youtube, batch.videos, cb)
+            result = await upload_batch(
+                youtube, batch.videos, cb,
+                state_dir=str(job_dir),
+                resume_context={"channel_id": channel_id, "job_id": job_id},
+            )
             await _send_ws(
                 job_id, "COMPLETE",
                 f"🎉 Batch done: {result['successful']}/{result['total']} succeeded",
@@ -309,24 +294,18 @@ async def upload_batch_with_files(
     job_dir = UPLOAD_DIR / job_id
     job_dir.mkdir(parents=True, exist_ok=True)
 
-    # Save all uploaded videos
+    # Stream all uploaded videos and thumbnails to disk
+    ingest = UploadIngest()
     video_path_map = {}
-    for vid in videos:
-        dest = str(job_dir / vid.filename)
-        content = await vid.read()
-        with open(dest, "wb") as f:
-            f.write(content)
-        video_path_map[vid.filename] = dest
-
-    # Save thumbnails
     thumb_path_map = {}
-    if thumbnails:
+    try:
+        for vid in videos:
+            video_path_map[vid.filename] = str((await ingest.save_into(vid, job_dir)).path)
         for thumb in thumbnails:
-            dest = str(job_dir / thumb.filename)
-            content = await thumb.read()
-            with open(dest, "wb") as f:
-                f.write(content)
-            thumb_path_map[thumb.filename] = dest
+            thumb_path_map[thumb.filename] = str((await ingest.save_into(thumb, job_dir)).path)
+    except IngestBudgetExceeded as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(status_code=413, detail=str(e))
 
     # Parse metadata and match paths
     try:
@@ -349,11 +328,8 @@ async def upload_batch_with_files(
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Invalid metadata: {e}")
 
-    _upload_jobs[job_id] = {
-        "status": JobStatus.running,
-        "progress": 0.0,
-        "logs": [],
-    }
+    job_store.create(job_id, JOB_KIND)
+    job_store.record(job_id, "LOG", ingest.summary())
 
     async def _run():
         try:
@@ -363,7 +339,11 @@ async def upload_batch_with_files(
             async def cb(msg_type, message, progress):
                 await _send_ws(job_id, msg_type, message, progress)
 
-            result = await upload_batch(youtube, batch.videos, cb)
+            result = await upload_batch(
+                youtube, batch.videos, cb,
+                state_dir=str(job_dir),
+                resume_context={"channel_id": channel_id, "job_id": job_id},
+            )
             await _send_ws(
                 job_id, "COMPLETE",
                 f"🎉 Batch done: {result['successful']}/{result['total']} succeeded",
@@ -376,27 +356,80 @@ async def upload_batch_with_files(
     return UploadJobResponse(job_id=job_id, status=JobStatus.running, message="Batch upload started")
 
 
+async def _resume_job(job_id: str, pending: list):
+    async def cb(msg_type, message, progress):
+        await _send_ws(job_id, msg_type, message, progress)
+
+    succeeded = 0
+    for state in pending:
+        context = state["context"]
+        try:
+            token_path = str(TOKENS_DIR / f"{context['channel_id']}.json")
+            youtube = get_authenticated_service("client_secret.json", token_path)
+            request_data = VideoUploadRequest(**context["request"])
+            request_data.video_file_path = state["file_path"]
+            await cb("LOG", f"♻️ Resuming interrupted upload: {request_data.title}", None)
+            video_id = await upload_video(
+                youtube, request_data, cb,
+                state_dir=str(Path(state["state_path"]).parent),
+                resume_context={"channel_id": context["channel_id"], "job_id": job_id},
+            )
+            if video_id:
+                succeeded += 1
+        except Exception as e:
+            await cb("LOG", f"❌ Could not resume upload: {e}", None)
+
+    if succeeded == len(pending):
+        await _send_ws(job_id, "COMPLETE", f"🎉 Resumed {succeeded} upload(s)", 100.0)
+    else:
+        await _send_ws(job_id, "ERROR", f"❌ Resumed {succeeded}/{len(pending)} upload(s)", None)
+
+
+async def resume_interrupted_uploads():
+    """Re-create upload jobs whose resumable session outlived the previous process."""
+    pending: Dict[str, list] = {}
+    for state in find_pending_uploads(UPLOAD_DIR):
+        context = state.get("context") or {}
+        if not context.get("channel_id") or not context.get("request"):
+            continue
+        if not os.path.exists(state.get("file_path", "")):
+            continue
+        job_id = context.get("job_id") or Path(state["state_path"]).parent.name
+        pending.setdefault(job_id, []).append(state)
+
+    for job_id, states in pending.items():
+        existing = job_store.get(job_id)
+        if existing and existing.status == JobStatus.running:
+            continue
+        job_store.create(job_id, JOB_KIND)
+        asyncio.create_task(_resume_job(job_id, states))
+    return len(pending)
+
+
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
 async def get_upload_status(job_id: str):
     """Poll upload job status."""
-    job = _upload_jobs.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return JobStatusResponse(
         job_id=job_id,
-        status=job["status"],
-        progress=job["progress"],
-        logs=job["logs"][-50:],
+        status=job.status,
+        progress=job.progress,
+        logs=[e.log_line() for e in job.recent(50)],
+        last_seq=job.last_seq,
     )
 
 
 @router.get("/playlists")
-async def list_playlists(channel_id: str):
-    """List user's YouTube playlists."""
+async def list_playlists(channel_id: str, refresh: bool = False):
+    """List user's YouTube playlists (cached per channel; refresh=true re-lists)."""
     try:
         token_path = str(TOKENS_DIR / f"{channel_id}.json")
         youtube = get_authenticated_service("client_secret.json", token_path)
-        playlists = get_all_playlists(youtube)
+        if refresh:
+            get_playlist_index(youtube, channel_id).invalidate()
+        playlists = get_all_playlists(youtube, channel_id)
         return playlists
     except RuntimeError as e:
         raise HTTPException(status_code=401, detail=str(e))
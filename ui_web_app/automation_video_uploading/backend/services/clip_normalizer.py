@@ -0,0 +1,396 @@
+"""
+Clip Normalizer
+Bring clips to a common format for concat, doing as little work as possible.
+
+Each clip is probed first; one that already has the target codec,
+resolution, frame rate, pixel format and audio layout is used as-is. Clips
+that need work are re-encoded once into a content-addressed cache shared by
+every job: the key is the SHA-256 of the source bytes plus the target
+parameters, so the same outro appended to fifty videos is normalized once.
+The cache directory is kept under a byte budget by evicting least-recently
+used clips; clips handed to a caller stay pinned (never evicted) until the
+caller releases them.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import subprocess
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, Callable, List
+
+from services.media_probe import media_probe
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.environ.get(
+    "NORMALIZED_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".video_editor", "normalized"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("NORMALIZED_CACHE_MAX_BYTES", str(8 * 1024 ** 3)))
+
+# What every normalized clip looks like (besides resolution and fps)
+TARGET_VCODEC = "h264"
+TARGET_PIX_FMT = "yuv420p"
+TARGET_ACODEC = "aac"
+TARGET_SAMPLE_RATE = 44100
+TARGET_CHANNELS = 2
+
+_HASH_CHUNK = 1024 * 1024
+HASH_MEMO_ENTRIES = 4096
+_hash_memo: "OrderedDict[Tuple[str, int, float], str]" = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+# ─────────────────────────── Probing ───────────────────────────
+
+def probe_clip(path: str) -> Optional[Dict[str, Any]]:
+    """Format facts that decide whether a clip can be concatenated as-is (cached ffprobe)."""
+    info = media_probe.probe(path)
+    if info is None or not info.has_video:
+        return None
+    return {
+        "vcodec": info.vcodec,
+        "width": info.width,
+        "height": info.height,
+        "fps": info.fps,
+        "frame_rate": info.frame_rate,
+        "pix_fmt": info.pix_fmt,
+        "sar": info.sar,
+        "has_audio": info.has_audio,
+        "acodec": info.acodec,
+        "sample_rate": info.sample_rate,
+        "channels": info.channels,
+    }
+
+
+def _fps_close(actual: Optional[float], wanted: Optional[float]) -> bool:
+    # Concatenated outputs report an averaged rate (e.g. 29.98 for 30), so allow 0.5%
+    if actual is None or wanted is None:
+        return actual is None and wanted is None
+    return abs(actual - wanted) <= max(0.01, wanted * 0.005)
+
+
+def _constant_rate(info: Dict[str, Any]) -> Optional[Fraction]:
+    """
+    The clip's exact frame rate (r_frame_rate as a fraction) when the stream
+    is constant-rate, else None. Only the average rate is compared loosely;
+    the nominal rate must match exactly, so 30000/1001 (29.97) never passes
+    for 30 and gets stream-copied next to clips encoded at -r 30.
+    """
+    try:
+        rate = Fraction(info.get("frame_rate") or "")
+    except (ValueError, ZeroDivisionError):
+        return None
+    if rate <= 0 or not _fps_close(info["fps"], float(rate)):
+        return None
+    return rate
+
+
+def _square_pixels(info: Dict[str, Any]) -> bool:
+    return info["sar"] in ("1:1", "0:1", None)
+
+
+def clip_conforms(info: Optional[Dict[str, Any]], target_res: Optional[Tuple[int, int]], fps: int) -> bool:
+    """True when a probed clip already matches what normalization would produce."""
+    if not info or not info["has_audio"]:
+        return False
+    if info["vcodec"] != TARGET_VCODEC or info["pix_fmt"] != TARGET_PIX_FMT:
+        return False
+    if not _square_pixels(info):
+        return False
+    if target_res and (info["width"], info["height"]) != tuple(target_res):
+        return False
+    if fps > 0 and _constant_rate(info) != fps:
+        return False
+    return (info["acodec"] == TARGET_ACODEC
+            and info["sample_rate"] == TARGET_SAMPLE_RATE
+            and info["channels"] == TARGET_CHANNELS)
+
+
+def clips_concat_compatible(
+    infos: List[Optional[Dict[str, Any]]],
+    target_res: Optional[Tuple[int, int]] = None,
+    fps: int = 0,
+) -> bool:
+    """
+    True when the concat demuxer can stream-copy these clips as they are:
+    every clip shares codecs, size, pixel format, frame rate and audio layout
+    (and matches `target_res`/`fps` when given). Unlike `clip_conforms`, the
+    shared format does not have to be the normalization target.
+    """
+    if not infos or any(not info or not info["has_audio"] for info in infos):
+        return False
+    first = infos[0]
+    if target_res and (first["width"], first["height"]) != tuple(target_res):
+        return False
+    rate = _constant_rate(first)
+    if rate is None or (fps > 0 and rate != fps):
+        return False
+    keys = ("vcodec", "width", "height", "pix_fmt", "acodec", "sample_rate", "channels")
+    for info in infos:
+        if any(info[k] != first[k] for k in keys):
+            return False
+        if not _square_pixels(info) or _constant_rate(info) != rate:
+            return False
+    return True
+
+
+def source_hash(path: str) -> str:
+    """SHA-256 of the file's bytes, memoized per (path, size, mtime)."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+        if cached:
+            _hash_memo.move_to_end(memo_key)
+            return cached
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_memo[memo_key] = value
+        while len(_hash_memo) > HASH_MEMO_ENTRIES:
+            _hash_memo.popitem(last=False)
+    return value
+
+
+# ─────────────────────────── Encoding ───────────────────────────
+
+def build_normalize_cmd(
+    src: str,
+    output_path: str,
+    has_audio: bool,
+    target_res: Optional[Tuple[int, int]] = None,
+    fps: int = 30,
+    use_gpu: bool = True,
+    quality: str = "fast",
+) -> List[str]:
+    """ffmpeg command re-encoding `src` to the normalized format."""
+    cmd = ["ffmpeg", "-y"]
+    if has_audio:
+        cmd += ["-i", src]
+    else:
+        # Add silent audio stream matching video duration
+        cmd += ["-i", src, "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100", "-shortest"]
+
+    filter_chain = []
+    if target_res:
+        w, h = target_res
+        filter_chain.append(f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1")
+    if filter_chain:
+        cmd += ["-vf", ",".join(filter_chain)]
+
+    if fps > 0:
+        cmd += ["-r", str(fps)]
+
+    if use_gpu:
+        cmd += ["-c:v", "h264_nvenc", "-preset", "fast"]
+    else:
+        cmd += ["-c:v", "libx264", "-preset", quality, "-crf", "23"]
+    cmd += ["-pix_fmt", TARGET_PIX_FMT]
+
+    if not has_audio:
+        cmd += ["-map", "0:v:0", "-map", "1:a:0"]
+    cmd += ["-c:a", "aac", "-ar", str(TARGET_SAMPLE_RATE), "-ac", str(TARGET_CHANNELS), "-b:a", "192k"]
+    cmd.append(output_path)
+    return cmd
+
+
+def _encode(cmd_for: Callable[[bool], List[str]], enable_gpu: bool, runner=None) -> Tuple[bool, str]:
+    """Run the GPU command, falling back to CPU. `runner(cmd) -> (ok, stderr)` overrides subprocess.run."""
+    def _run(cmd):
+        if runner is not None:
+            return runner(cmd)
+        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             text=True, encoding="utf-8", errors="replace")
+        return res.returncode == 0, res.stderr
+
+    ok, err = _run(cmd_for(enable_gpu))
+    if not ok and enable_gpu:
+        ok, err = _run(cmd_for(False))
+    return ok, err
+
+
+# ─────────────────────────── Cache ───────────────────────────
+
+class NormalizedClipCache:
+    """
+    On-disk LRU cache of normalized clips (recency tracked through file mtime).
+
+    Every cached path `normalize` returns is pinned for the caller, and
+    eviction skips pinned entries, so a clip can't disappear between being
+    handed out and being concatenated. Callers pass each returned path to
+    `release` once they no longer read it.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._pins: Dict[str, int] = {}
+        self._stats = {"hits": 0, "misses": 0, "skipped": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def make_key(self, src: str, target_res: Optional[Tuple[int, int]], fps: int,
+                 enable_gpu: bool, quality: str) -> str:
+        ident = {
+            "v": CACHE_VERSION,
+            "source": source_hash(src),
+            "res": list(target_res) if target_res else None,
+            "fps": fps,
+            "encoder": "nvenc" if enable_gpu else f"x264-{quality}",
+        }
+        return hashlib.sha256(json.dumps(ident, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp4"
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _entries(self):
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for path in self.cache_dir.glob("*.mp4"):
+            if path.name.startswith("."):  # encode in progress
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _pin_locked(self, path: Path) -> str:
+        key = str(path)
+        self._pins[key] = self._pins.get(key, 0) + 1
+        return key
+
+    def release(self, path: Optional[str]) -> None:
+        """Unpin a path returned by `normalize` (no-op for sources and unknown paths)."""
+        if not path:
+            return
+        with self._lock:
+            count = self._pins.get(str(path))
+            if count is None:
+                return
+            if count > 1:
+                self._pins[str(path)] = count - 1
+                return
+            del self._pins[str(path)]
+            # Entries kept only because they were pinned can go now
+            self._evict_locked()
+
+    def _evict_locked(self, keep: Optional[Path] = None) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep or str(path) in self._pins:
+                continue
+            try:
+                path.unlink()
+                total -= size
+                self._stats["evictions"] += 1
+            except OSError:
+                pass
+
+    def normalize(
+        self,
+        src: str,
+        target_res: Optional[Tuple[int, int]] = None,
+        fps: int = 30,
+        enable_gpu: bool = True,
+        quality: str = "fast",
+        info: Optional[Dict[str, Any]] = None,
+        runner=None,
+    ) -> Tuple[Optional[str], str]:
+        """
+        Path of a normalized version of `src`: `src` itself when it already
+        conforms, otherwise a cached (or freshly encoded) clip. A cached clip
+        stays pinned until the caller passes the path to `release`.
+
+        Returns:
+            (path or None on failure, how: "conforming" | "cached" | "encoded" | error text)
+        """
+        info = info if info is not None else probe_clip(src)
+        if clip_conforms(info, target_res, fps):
+            with self._lock:
+                self._stats["skipped"] += 1
+            return src, "conforming"
+
+        key = self.make_key(src, target_res, fps, enable_gpu, quality)
+        entry = self._entry_path(key)
+        # One encode per key even when several jobs ask for the same clip at once
+        with self._key_lock(key):
+            if entry.exists():
+                try:
+                    os.utime(entry, None)
+                except OSError:
+                    pass
+                with self._lock:
+                    self._stats["hits"] += 1
+                    return self._pin_locked(entry), "cached"
+
+            with self._lock:
+                self._stats["misses"] += 1
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+            has_audio = bool(info and info["has_audio"])
+            ok, err = _encode(
+                lambda gpu: build_normalize_cmd(src, str(tmp), has_audio, target_res, fps, gpu, quality),
+                enable_gpu, runner,
+            )
+            if not ok or not tmp.exists() or tmp.stat().st_size == 0:
+                with self._lock:
+                    self._stats["errors"] += 1
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+                return None, err or "normalization produced no output"
+            os.replace(tmp, entry)
+            with self._lock:
+                self._stats["stores"] += 1
+                pinned = self._pin_locked(entry)
+                self._evict_locked(keep=entry)
+            return pinned, "encoded"
+
+    def clear(self) -> int:
+        removed = 0
+        with self._lock:
+            for _, _, path in self._entries():
+                if str(path) in self._pins:
+                    continue
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            entries = self._entries()
+        snapshot["entries"] = len(entries)
+        snapshot["pinned"] = len(self._pins)
+        snapshot["bytes"] = sum(size for _, size, _ in entries)
+        snapshot["max_bytes"] = self.max_bytes
+        snapshot["cache_dir"] = str(self.cache_dir)
+        return snapshot
+
+
+# Shared process-wide instance
+normalized_cache = NormalizedClipCache()
@@ -0,0 +1,259 @@
+"""
+Encoder Capabilities
+What this machine's ffmpeg can actually do, detected once per process.
+
+The registry lists ffmpeg's encoders, filters and hwaccels, then runs a
+tiny trial encode for each hardware H.264 encoder that is compiled in (a
+listed encoder still fails without the GPU or driver behind it). The result
+is cached on disk keyed by the ffmpeg version line, binary and host, so
+later processes skip the trial encodes entirely. Pipelines ask the registry
+up front which encoder to use instead of launching NVENC and retrying on
+failure; an encoder that fails at runtime anyway is demoted for the rest of
+the process.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import platform
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = os.environ.get(
+    "ENCODER_CAPS_CACHE",
+    os.path.join(os.path.expanduser("~"), ".video_editor", "encoder_caps.json"),
+)
+# Re-run the trial encodes now and then: drivers come and go without an ffmpeg upgrade
+CACHE_MAX_AGE = int(os.environ.get("ENCODER_CAPS_MAX_AGE", str(7 * 24 * 3600)))
+
+# Hardware H.264 encoders worth a trial encode, most preferred first
+HW_H264_ENCODERS = ("h264_nvenc", "h264_qsv", "h264_amf", "h264_videotoolbox")
+CPU_H264_ENCODER = "libx264"
+# The GPU encoder the pipelines build arguments for
+GPU_H264_ENCODER = "h264_nvenc"
+
+_CREATIONFLAGS = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+
+
+def _run(cmd: List[str], timeout: int = 20) -> Optional[subprocess.CompletedProcess]:
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                              encoding="utf-8", errors="replace", creationflags=_CREATIONFLAGS)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _parse_encoders(output: str) -> Set[str]:
+    """Names from `ffmpeg -encoders` (' V....D libx264  description' after a '------' line)."""
+    names = set()
+    in_table = False
+    for line in output.splitlines():
+        if not in_table:
+            in_table = line.strip().startswith("---")
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            names.add(parts[1])
+    return names
+
+
+def _parse_filters(output: str) -> Set[str]:
+    """Names from `ffmpeg -filters` (' TSC adelay  A->A  description')."""
+    names = set()
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and "->" in parts[2]:
+            names.add(parts[1])
+    return names
+
+
+def ffmpeg_fingerprint() -> Dict[str, Any]:
+    """Identity of the ffmpeg build and host the capabilities were measured on."""
+    binary = shutil.which("ffmpeg") or "ffmpeg"
+    res = _run(["ffmpeg", "-hide_banner", "-version"], timeout=10)
+    version = res.stdout.splitlines()[0].strip() if res and res.returncode == 0 and res.stdout else None
+    try:
+        binary_mtime = os.path.getmtime(binary)
+    except OSError:
+        binary_mtime = None
+    return {"version": version, "binary": binary, "binary_mtime": binary_mtime, "host": platform.node()}
+
+
+def trial_encode(encoder: str) -> bool:
+    """Encode one small frame with `encoder`; True when the hardware behind it works."""
+    res = _run([
+        "ffmpeg", "-hide_banner", "-v", "error", "-f", "lavfi",
+        "-i", "color=c=black:s=256x256:d=0.1", "-frames:v", "1",
+        "-c:v", encoder, "-f", "null", "-",
+    ], timeout=30)
+    return bool(res and res.returncode == 0)
+
+
+# ─────────────────────────── Capabilities ───────────────────────────
+
+class EncoderCaps:
+    """Snapshot of one ffmpeg build's encoders, filters, hwaccels and working hardware."""
+
+    def __init__(self, fingerprint: Dict[str, Any], encoders: Set[str], filters: Set[str],
+                 hwaccels: List[str], working: Dict[str, bool], detected_at: float):
+        self.fingerprint = fingerprint
+        self.encoders = set(encoders)
+        self.filters = set(filters)
+        self.hwaccels = list(hwaccels)
+        self.working = dict(working)
+        self.detected_at = detected_at
+
+    @property
+    def ffmpeg_available(self) -> bool:
+        return bool(self.fingerprint.get("version"))
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+    def has_filter(self, name: str) -> bool:
+        # Without a filter list (ffmpeg missing/odd build) assume the filter exists
+        return not self.filters or name in self.filters
+
+    def works(self, encoder: str) -> bool:
+        """Listed and, for hardware encoders, passed the trial encode."""
+        if encoder in self.working:
+            return self.working[encoder]
+        return encoder in self.encoders
+
+    @property
+    def gpu_available(self) -> bool:
+        return self.works(GPU_H264_ENCODER)
+
+    def h264_encoder(self, prefer_gpu: bool = True) -> str:
+        """Encoder the pipelines should use: NVENC when asked for and working, else libx264."""
+        if prefer_gpu and self.gpu_available:
+            return GPU_H264_ENCODER
+        return CPU_H264_ENCODER
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "ffmpeg": self.fingerprint.get("version"),
+            "hardware_encoders": {name: ok for name, ok in self.working.items()},
+            "hwaccels": self.hwaccels,
+            "gpu_available": self.gpu_available,
+            "encoders": len(self.encoders),
+            "filters": len(self.filters),
+            "detected_at": self.detected_at,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "v": CACHE_VERSION,
+            "fingerprint": self.fingerprint,
+            "encoders": sorted(self.encoders),
+            "filters": sorted(self.filters),
+            "hwaccels": self.hwaccels,
+            "working": self.working,
+            "detected_at": self.detected_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EncoderCaps":
+        return cls(data["fingerprint"], set(data["encoders"]), set(data["filters"]),
+                   data["hwaccels"], data["working"], data["detected_at"])
+
+
+def detect_caps(fingerprint: Optional[Dict[str, Any]] = None) -> EncoderCaps:
+    """Ask ffmpeg what it has and trial-encode every compiled-in hardware H.264 encoder."""
+    fingerprint = fingerprint or ffmpeg_fingerprint()
+    encoders: Set[str] = set()
+    filters: Set[str] = set()
+    hwaccels: List[str] = []
+    working: Dict[str, bool] = {}
+    if fingerprint.get("version"):
+        res = _run(["ffmpeg", "-hide_banner", "-encoders"])
+        if res and res.returncode == 0:
+            encoders = _parse_encoders(res.stdout)
+        res = _run(["ffmpeg", "-hide_banner", "-filters"])
+        if res and res.returncode == 0:
+            filters = _parse_filters(res.stdout)
+        res = _run(["ffmpeg", "-hide_banner", "-hwaccels"])
+        if res and res.returncode == 0:
+            hwaccels = [line.strip() for line in res.stdout.splitlines()[1:] if line.strip()]
+        candidates = [name for name in HW_H264_ENCODERS if name in encoders]
+        if candidates:
+            with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+                working = dict(zip(candidates, executor.map(trial_encode, candidates)))
+    return EncoderCaps(fingerprint, encoders, filters, hwaccels, working, time.time())
+
+
+# ─────────────────────────── Registry ───────────────────────────
+
+class EncoderRegistry:
+    """Process-wide, lazily detected EncoderCaps backed by a disk cache."""
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, max_age: int = CACHE_MAX_AGE):
+        self.cache_path = Path(cache_path)
+        self.max_age = max_age
+        self._caps: Optional[EncoderCaps] = None
+        self._lock = threading.Lock()
+
+    def _load(self, fingerprint: Dict[str, Any]) -> Optional[EncoderCaps]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("v") != CACHE_VERSION or data.get("fingerprint") != fingerprint:
+                return None
+            caps = EncoderCaps.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if time.time() - caps.detected_at > self.max_age:
+            return None
+        return caps
+
+    def _save(self, caps: EncoderCaps) -> None:
+        tmp = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(caps.to_dict(), f, indent=1)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.debug("Could not save encoder capabilities: %s", e)
+
+    def get(self, refresh: bool = False) -> EncoderCaps:
+        """Capabilities of this process's ffmpeg (detected on first use, then cached)."""
+        if self._caps is not None and not refresh:
+            return self._caps
+        with self._lock:
+            if self._caps is not None and not refresh:
+                return self._caps
+            fingerprint = ffmpeg_fingerprint()
+            caps = None if refresh else self._load(fingerprint)
+            if caps is None:
+                started = time.monotonic()
+                caps = detect_caps(fingerprint)
+                if caps.ffmpeg_available:
+                    self._save(caps)
+                logger.info("Detected encoder capabilities in %.1fs: %s",
+                            time.monotonic() - started, caps.working or "no hardware H.264 encoders")
+            self._caps = caps
+            return caps
+
+    def resolve_gpu(self, enable_gpu: bool) -> bool:
+        """`enable_gpu` narrowed to what actually works here."""
+        return bool(enable_gpu) and self.get().gpu_available
+
+    def mark_failed(self, encoder: str) -> None:
+        """Stop offering `encoder` for the rest of this process (failed at runtime)."""
+        caps = self.get()
+        if caps.working.get(encoder) is not False:
+            logger.warning("Encoder %s failed at runtime; using CPU encoding from now on", encoder)
+        caps.working[encoder] = False
+
+
+# Shared process-wide instance
+encoder_registry = EncoderRegistry()
@@ -0,0 +1,158 @@
+"""
+Event Hub
+Per-job publish/subscribe fan-out of job events to WebSocket clients.
+
+Any number of clients can watch the same job. Each subscriber gets its own
+bounded queue: when a slow client falls behind, the oldest queued events are
+dropped instead of blocking the producer, and the subscriber is flagged as
+lagged so it can re-read the gap from the job store. Subscribers are woken
+by events, not by polling, and a client reconnecting with `since=<seq>`
+receives only the events it has not seen.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Set, Optional, Any
+
+from services.job_store import job_store, JobStore
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 256
+CATCH_UP_BATCH = 500
+TERMINAL_EVENT_TYPES = ("COMPLETE", "ERROR", "FAILED", "STOPPED")
+
+
+class Subscription:
+    """One subscriber's bounded, drop-oldest event queue."""
+
+    def __init__(self, job_id: str, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.job_id = job_id
+        self._queue = deque(maxlen=maxsize)
+        self._wakeup = asyncio.Event()
+        self.lagged = False
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, event: Dict[str, Any]) -> None:
+        if len(self._queue) == self._queue.maxlen:
+            self.lagged = True
+            self.dropped += 1
+        self._queue.append(event)
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Next queued event; None once closed and drained."""
+        while not self._queue:
+            if self.closed:
+                return None
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        return self._queue.popleft()
+
+    def drain(self) -> None:
+        """Discard everything queued (used after catching up from the store)."""
+        self._queue.clear()
+        self.lagged = False
+
+
+class EventHub:
+    """Fan job events out to every subscriber of that job."""
+
+    def __init__(self, store: JobStore = job_store):
+        self.store = store
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, job_id: str, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> Subscription:
+        sub = Subscription(job_id, maxsize)
+        self._subscribers.setdefault(job_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.job_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                self._subscribers.pop(sub.job_id, None)
+        sub.close()
+
+    def publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        """Queue `event` for every subscriber of `job_id`; never blocks."""
+        for sub in list(self._subscribers.get(job_id, ())):
+            sub.push(event)
+
+    def subscriber_count(self, job_id: str) -> int:
+        return len(self._subscribers.get(job_id, ()))
+
+    async def stream(self, websocket, job_id: str, since: int = 0) -> None:
+        """
+        Send a job's events to an accepted WebSocket until the job finishes or
+        the client goes away. Events after `since` are replayed from the store
+        first; subscribing before the replay means nothing published in
+        between is missed, and seq numbers de-duplicate the overlap.
+        """
+        sub = self.subscribe(job_id)
+        last_sent = since
+
+        async def _send_from_store():
+            nonlocal last_sent
+            while True:
+                events = self.store.events(job_id, since=last_sent, limit=CATCH_UP_BATCH)
+                for event in events:
+                    await websocket.send_json(event.to_dict())
+                    last_sent = event.seq
+                if len(events) < CATCH_UP_BATCH:
+                    return
+
+        async def _watch_disconnect():
+            try:
+                while True:
+                    await websocket.receive_text()
+            except Exception:
+                pass
+            finally:
+                sub.close()
+
+        def _caught_up_with_finished_job():
+            job = self.store.get(job_id)
+            return job is None or (job.finished and job.last_seq <= last_sent)
+
+        watcher = asyncio.create_task(_watch_disconnect())
+        try:
+            await _send_from_store()
+            if _caught_up_with_finished_job():
+                return
+            while True:
+                event = await sub.get()
+                if event is None:
+                    return
+                if sub.lagged:
+                    # Fell behind: the queue lost events, the store did not
+                    sub.drain()
+                    await _send_from_store()
+                    if _caught_up_with_finished_job():
+                        return
+                    continue
+                if event["seq"] <= last_sent:
+                    continue
+                await websocket.send_json(event)
+                last_sent = event["seq"]
+                if event["type"] in TERMINAL_EVENT_TYPES:
+                    return
+        except Exception as e:
+            logger.debug("Event stream for %s ended: %s", job_id, e)
+        finally:
+            if sub.dropped:
+                logger.info("Subscriber of %s lagged; %d queued events replaced from the store",
+                            job_id, sub.dropped)
+            self.unsubscribe(sub)
+            watcher.cancel()
+
+
+# Shared process-wide instance
+event_hub = EventHub()
@@ -0,0 +1,133 @@
+"""
+FFmpeg Worker Pool
+Run many ffmpeg processes at once without oversubscribing the machine, and
+stop all of them when a job is cancelled.
+
+The pool bounds the number of live ffmpeg *processes*, not threads: any
+number of threads may call `run`, but only `workers` of them hold a slot
+(and a child process) at a time. Nested fan-out, such as sections that
+normalize clips, therefore cannot deadlock on the pool. Every child is
+tracked so `cancel()` can kill the ones in flight, and `map` returns results
+in input order no matter which item finishes first.
+"""
+
+import os
+import asyncio
+import logging
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Callable, Iterable, Tuple, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Consumer NVIDIA drivers cap concurrent NVENC sessions; stay under the cap
+NVENC_MAX_SESSIONS = int(os.environ.get("NVENC_MAX_SESSIONS", "3"))
+WORKERS_OVERRIDE = int(os.environ.get("FFMPEG_WORKERS", "0"))
+_SLOT_POLL_SECONDS = 0.2
+
+
+def default_workers(enable_gpu: bool) -> int:
+    """
+    Concurrent ffmpeg processes for this machine and encoder.
+
+    libx264 already spreads one encode over several cores, so CPU encodes get
+    roughly one process per four cores (at least two on anything bigger than
+    a dual core, to overlap the single-threaded demux/mux parts). NVENC work
+    is bounded by the driver's session limit instead. FFMPEG_WORKERS wins
+    over both.
+    """
+    if WORKERS_OVERRIDE > 0:
+        return WORKERS_OVERRIDE
+    cpus = os.cpu_count() or 2
+    if enable_gpu:
+        return max(1, min(NVENC_MAX_SESSIONS, cpus // 2))
+    if cpus <= 2:
+        return 1
+    return max(2, min(8, cpus // 4))
+
+
+class FFmpegPool:
+    """
+    Bounded, cancellable runner for ffmpeg commands.
+
+    Args:
+        workers: Maximum live ffmpeg processes (default: `default_workers`)
+        enable_gpu: Encoder the work mostly uses, for the default size
+    """
+
+    def __init__(self, workers: Optional[int] = None, enable_gpu: bool = True):
+        self.workers = max(1, workers or default_workers(enable_gpu))
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._procs: Set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self, cmd: List[str], timeout: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Run one command in a pool slot. Same contract as the `runner` hook of
+        the clip normalizer: returns (succeeded, stderr).
+        """
+        while not self._slots.acquire(timeout=_SLOT_POLL_SECONDS):
+            if self.cancelled:
+                return False, "cancelled"
+        try:
+            if self.cancelled:
+                return False, "cancelled"
+            proc = subprocess.Popen(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                text=True, encoding="utf-8", errors="replace",
+            )
+            with self._lock:
+                self._procs.add(proc)
+            if self.cancelled:  # cancel() ran between the check and the registration
+                proc.kill()
+            try:
+                _, stderr = proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                _, stderr = proc.communicate()
+                return False, f"ffmpeg timed out after {timeout}s\n{stderr}"
+            finally:
+                with self._lock:
+                    self._procs.discard(proc)
+            if self.cancelled:
+                return False, "cancelled"
+            return proc.returncode == 0, stderr
+        finally:
+            self._slots.release()
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """`fn` over `items` on up to `workers` threads; results keep input order."""
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items)),
+                                thread_name_prefix="ffmpeg-pool") as executor:
+            return list(executor.map(fn, items))
+
+    def cancel(self) -> int:
+        """Refuse new work and kill every ffmpeg process in flight. Returns how many were killed."""
+        self._cancelled.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+        if procs:
+            logger.info("Killed %d in-flight ffmpeg process(es)", len(procs))
+        return len(procs)
+
+    async def cancel_on(self, stop_event: asyncio.Event) -> None:
+        """Await `stop_event` and cancel the pool; run as a task next to the work."""
+        await stop_event.wait()
+        self.cancel()
@@ -0,0 +1,234 @@
+"""
+FFmpeg Progress Aggregator
+Turns ffmpeg's `-progress` key=value stream into coalesced, rate-limited
+progress events.
+
+Reader threads feed lines in as fast as ffmpeg writes them; the aggregator
+only keeps the latest numeric snapshot (out_time, fps, speed, frame) and
+hands at most `rate_hz` updates per second to the event loop, each one a
+single call_soon_threadsafe rather than a task per line. Log messages posted
+from worker threads are batched the same way. Raw ffmpeg lines are kept in a
+bounded tail for error reports and only forwarded when `raw_log` is on.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Optional, Callable, Awaitable, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, str, Optional[float]], Awaitable[None]]
+
+PROGRESS_RATE_HZ = float(os.environ.get("FFMPEG_PROGRESS_HZ", "4"))
+RAW_LOG_DEFAULT = os.environ.get("FFMPEG_RAW_LOG", "0") == "1"
+RAW_TAIL_LINES = 200
+
+# Args that make ffmpeg write key=value progress blocks to stderr instead of the stats line
+PROGRESS_ARGS = ["-nostats", "-progress", "pipe:2"]
+
+_PROGRESS_LINE = re.compile(r"^([a-z_0-9]+)=(\S*)$")
+_PROBLEM_WORDS = ("Error", "error", "Warning", "Invalid", "Cannot", "No such")
+
+
+def with_progress_args(cmd: List[str]) -> List[str]:
+    """Insert PROGRESS_ARGS right after the ffmpeg executable."""
+    if not cmd or "-progress" in cmd:
+        return list(cmd)
+    return [cmd[0]] + PROGRESS_ARGS + list(cmd[1:])
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class ProgressSnapshot:
+    """Latest numeric state of one ffmpeg run."""
+
+    __slots__ = ("frame", "fps", "out_time", "speed", "percent", "eta", "done")
+
+    def __init__(self):
+        self.frame = None
+        self.fps = None
+        self.out_time = None
+        self.speed = None
+        self.percent = None
+        self.eta = None
+        self.done = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# ─────────────────────────── Aggregator ───────────────────────────
+
+class FFmpegProgressAggregator:
+    """
+    Coalesce progress and log traffic from worker threads into the event loop.
+
+    Args:
+        progress_cb: Job progress callback (type, message, progress)
+        loop: Event loop progress_cb runs on
+        label: Prefix for progress lines (e.g. "encode → out.mp4")
+        duration: Expected output duration in seconds, for percent and ETA
+        rate_hz: Maximum progress updates per second
+        raw_log: Also forward ffmpeg's own log lines (debugging)
+        percent_events: Send progress lines as PROGRESS events carrying this
+            run's percent (instead of percent-free FFMPEG lines)
+    """
+
+    def __init__(
+        self,
+        progress_cb: ProgressCallback,
+        loop: asyncio.AbstractEventLoop,
+        label: str = "",
+        duration: Optional[float] = None,
+        rate_hz: float = PROGRESS_RATE_HZ,
+        raw_log: bool = RAW_LOG_DEFAULT,
+        percent_events: bool = False,
+    ):
+        self.progress_cb = progress_cb
+        self.loop = loop
+        self.label = label
+        self.duration = duration if duration and duration > 0 else None
+        self.interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.raw_log = raw_log
+        self.percent_events = percent_events
+        self.snapshot = ProgressSnapshot()
+        self.raw_tail = deque(maxlen=RAW_TAIL_LINES)
+        self._block: Dict[str, str] = {}
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+        self._progress_dirty = False
+        self._messages = deque()
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self.emitted = 0
+
+    # ── producer side (any thread) ──
+
+    def feed_line(self, line: str) -> None:
+        """Consume one line of ffmpeg stderr (progress keys or log output)."""
+        line = line.rstrip()
+        if not line:
+            return
+        match = _PROGRESS_LINE.match(line)
+        if match:
+            key, value = match.groups()
+            self._block[key] = value
+            if key == "progress":
+                self._apply_block(self._block, done=(value == "end"))
+                self._block = {}
+            return
+        self.raw_tail.append(line)
+        if self.raw_log or any(word in line for word in _PROBLEM_WORDS):
+            self.post("FFMPEG", line)
+
+    def post(self, msg_type: str, message: str, progress: Optional[float] = None) -> None:
+        """Queue a log message (optionally carrying job progress) for the next flush."""
+        with self._lock:
+            self._messages.append((msg_type, message, progress))
+            self._schedule_locked(0.0)
+
+    def status_cb(self) -> Callable[[str, str], None]:
+        """(type, message) callback for blocking helpers running in threads."""
+        return self.post
+
+    def finish(self) -> None:
+        """Flush whatever is pending, including the final progress state."""
+        with self._lock:
+            self._schedule_locked(0.0)
+
+    # ── internals ──
+
+    def _apply_block(self, block: Dict[str, str], done: bool) -> None:
+        snap = self.snapshot
+        out_us = block.get("out_time_us") or block.get("out_time_ms")  # both are microseconds
+        try:
+            snap.out_time = int(out_us) / 1_000_000
+        except (TypeError, ValueError):
+            pass
+        for key, attr, cast in (("frame", "frame", int), ("fps", "fps", float)):
+            try:
+                setattr(snap, attr, cast(block[key]))
+            except (KeyError, ValueError):
+                pass
+        try:
+            snap.speed = float(block.get("speed", "").rstrip("x"))
+        except ValueError:
+            pass
+        if self.duration and snap.out_time is not None:
+            snap.percent = round(max(0.0, min(100.0, snap.out_time / self.duration * 100)), 1)
+            if snap.speed:
+                snap.eta = max(0.0, (self.duration - snap.out_time) / snap.speed)
+        snap.done = done
+        if done:
+            snap.percent = 100.0 if self.duration else snap.percent
+            snap.eta = 0.0
+
+        with self._lock:
+            self._progress_dirty = True
+            delay = 0.0 if done else max(0.0, self._last_emit + self.interval - time.monotonic())
+            self._schedule_locked(delay)
+
+    def _schedule_locked(self, delay: float) -> None:
+        if self._scheduled:
+            return
+        self._scheduled = True
+        try:
+            if delay > 0:
+                self.loop.call_soon_threadsafe(self.loop.call_later, delay, self._flush)
+            else:
+                self.loop.call_soon_threadsafe(self._flush)
+        except RuntimeError:  # loop closed
+            self._scheduled = False
+
+    def _flush(self) -> None:
+        with self._lock:
+            self._scheduled = False
+            messages = list(self._messages)
+            self._messages.clear()
+            send_progress = self._progress_dirty
+            self._progress_dirty = False
+            if send_progress:
+                self._last_emit = time.monotonic()
+        if not messages and not send_progress:
+            return
+        asyncio.ensure_future(self._emit(messages, send_progress), loop=self.loop)
+
+    async def _emit(self, messages, send_progress: bool) -> None:
+        try:
+            for msg_type, message, progress in messages:
+                await self.progress_cb(msg_type, message, progress)
+            if send_progress:
+                self.emitted += 1
+                percent = self.snapshot.percent
+                if self.percent_events and percent is not None:
+                    await self.progress_cb("PROGRESS", self.describe(), percent)
+                else:
+                    await self.progress_cb("FFMPEG", self.describe(), None)
+        except Exception as e:
+            logger.debug("Progress emit failed: %s", e)
+
+    def describe(self) -> str:
+        """Compact one-line progress: label · percent · fps · speed · ETA."""
+        snap = self.snapshot
+        parts = [f"⏱ {self.label}" if self.label else "⏱"]
+        if snap.percent is not None:
+            parts.append(f"{snap.percent:.0f}%")
+        elif snap.out_time is not None:
+            parts.append(f"{snap.out_time:.1f}s")
+        if snap.fps is not None:
+            parts.append(f"{snap.fps:.0f} fps")
+        if snap.speed is not None:
+            parts.append(f"{snap.speed:.2f}x")
+        if self.duration:
+            parts.append(f"ETA {format_eta(snap.eta)}")
+        return " · ".join(parts)
@@ -0,0 +1,412 @@
+"""
+Job Store
+SQLite-backed store for editor and uploader jobs and their event logs.
+
+Every progress message becomes a structured event (seq, type, message,
+progress, ts). Each live job keeps only its newest events in an in-memory
+ring buffer; a background thread writes them to SQLite in small batches
+(recording an event never waits on disk), so replaying an old cursor reads
+from disk while the live tail never does. Job rows (status, progress, output files) are indexed
+by kind and status, so listings query SQLite instead of walking memory.
+
+Finished jobs leave memory after JOB_MEMORY_TTL seconds and are deleted from
+disk after JOB_RETENTION seconds. Jobs that were running when the process
+stopped are marked failed on the next start.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from models.schemas import JobStatus
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────── Defaults ───────────────────────────
+
+# Next to the backend package rather than wherever the server happens to be started from
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH", str(Path(__file__).resolve().parent.parent / "jobs.db"))
+JOB_EVENT_RING = int(os.environ.get("JOB_EVENT_RING", "500"))
+JOB_MEMORY_TTL = float(os.environ.get("JOB_MEMORY_TTL", "900"))
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", str(7 * 24 * 3600)))
+FLUSH_INTERVAL_SECONDS = 1.0
+
+TERMINAL_STATUSES = (JobStatus.complete, JobStatus.failed, JobStatus.stopped)
+STATUS_FOR_EVENT = {
+    "COMPLETE": JobStatus.complete,
+    "ERROR": JobStatus.failed,
+    "FAILED": JobStatus.failed,
+    "STOPPED": JobStatus.stopped,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       TEXT PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    progress     REAL NOT NULL DEFAULT 0,
+    output_files TEXT NOT NULL DEFAULT '[]',
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    finished_at  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_status ON jobs (kind, status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+CREATE TABLE IF NOT EXISTS events (
+    job_id   TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    type     TEXT NOT NULL,
+    message  TEXT NOT NULL,
+    progress REAL,
+    ts       REAL NOT NULL,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class JobEvent:
+    """One progress message of a job."""
+
+    __slots__ = ("seq", "type", "message", "progress", "ts")
+
+    def __init__(self, seq: int, type: str, message: str, progress: Optional[float] = None,
+                 ts: Optional[float] = None):
+        self.seq = seq
+        self.type = type
+        self.message = message
+        self.progress = progress
+        self.ts = ts if ts is not None else time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "type": self.type, "message": self.message, "progress": self.progress}
+
+    def log_line(self) -> str:
+        """Legacy "[TYPE] message" form used by the status endpoints."""
+        return f"[{self.type}] {self.message}"
+
+
+class Job:
+    """In-memory view of a job: persisted fields, the event ring and runtime-only handles."""
+
+    def __init__(self, job_id: str, kind: str, status: JobStatus, ring_size: int):
+        self.job_id = job_id
+        self.kind = kind
+        self.status = status
+        self.progress = 0.0
+        self.output_files: List[str] = []
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at: Optional[float] = None
+        self.last_seq = 0
+        self.events = deque(maxlen=ring_size)
+        # Runtime only, never persisted
+        self.stop_event = None
+        self.stop_requested = False
+        self._pending: List[JobEvent] = []
+        self._dirty = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def recent(self, count: int) -> List[JobEvent]:
+        """Newest `count` events from the ring."""
+        return list(self.events)[-count:]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": self.progress,
+            "output_count": len(self.output_files),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+# ─────────────────────────── Store ───────────────────────────
+
+class JobStore:
+    """
+    Jobs and events for one process, persisted to SQLite.
+
+    `record` only touches memory: a background thread writes pending events
+    and job rows, so coroutines recording progress never wait on a commit.
+    Locks are always taken in the order `_db_lock` then `_lock`; `_lock`
+    guards the in-memory jobs and is never held while SQLite is busy.
+
+    Args:
+        db_path: SQLite file (":memory:" for a throwaway store)
+        ring_size: Events kept in memory per job
+        memory_ttl: Seconds a finished job stays in memory
+        retention: Seconds a finished job stays on disk
+    """
+
+    def __init__(
+        self,
+        db_path: str = JOB_DB_PATH,
+        ring_size: int = JOB_EVENT_RING,
+        memory_ttl: float = JOB_MEMORY_TTL,
+        retention: float = JOB_RETENTION,
+    ):
+        self.db_path = str(db_path)
+        self.ring_size = max(8, ring_size)
+        self.flush_batch = max(1, self.ring_size // 4)
+        self.memory_ttl = memory_ttl
+        self.retention = retention
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.RLock()
+        self._db_lock = threading.RLock()
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._flush_wanted = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="job-store-flush", daemon=True)
+        self._flusher.start()
+
+    # ── persistence ──
+
+    @staticmethod
+    def _job_row(job: Job) -> tuple:
+        job._dirty = False
+        return (job.job_id, job.kind, job.status.value, job.progress, json.dumps(job.output_files),
+                job.created_at, job.updated_at, job.finished_at)
+
+    def _write_jobs(self, rows: List[tuple]) -> None:
+        self._db.executemany(
+            "INSERT INTO jobs (job_id, kind, status, progress, output_files, created_at, updated_at, finished_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(job_id) DO UPDATE SET status=excluded.status, progress=excluded.progress, "
+            "output_files=excluded.output_files, updated_at=excluded.updated_at, finished_at=excluded.finished_at",
+            rows,
+        )
+
+    def flush(self, job_id: Optional[str] = None) -> None:
+        """Write pending events and dirty job rows (one job, or all)."""
+        with self._db_lock:
+            with self._lock:
+                jobs = [self._jobs[job_id]] if job_id in self._jobs else ([] if job_id else list(self._jobs.values()))
+                events, rows = [], []
+                for job in jobs:
+                    events.extend((job.job_id, e.seq, e.type, e.message, e.progress, e.ts) for e in job._pending)
+                    job._pending = []
+                    if job._dirty:
+                        rows.append(self._job_row(job))
+            if events:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO events (job_id, seq, type, message, progress, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                    events,
+                )
+            if rows:
+                self._write_jobs(rows)
+            self._db.commit()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._flush_wanted.wait(FLUSH_INTERVAL_SECONDS)
+            self._flush_wanted.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.warning("Job store flush failed: %s", e)
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        # Caller holds _db_lock
+        row = self._db.execute(
+            "SELECT kind, status, progress, output_files, created_at, updated_at, finished_at "
+            "FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if not row:
+            return None
+        job = Job(job_id, row[0], JobStatus(row[1]), self.ring_size)
+        job.progress, job.created_at, job.updated_at, job.finished_at = row[2], row[4], row[5], row[6]
+        job.output_files = json.loads(row[3] or "[]")
+        tail = self._db.execute(
+            "SELECT seq, type, message, progress, ts FROM events WHERE job_id = ? ORDER BY seq DESC LIMIT ?",
+            (job_id, self.ring_size),
+        ).fetchall()
+        job.events.extend(JobEvent(*r) for r in reversed(tail))
+        job.last_seq = tail[0][0] if tail else 0
+        return job
+
+    # ── jobs ──
+
+    def create(self, job_id: str, kind: str, status: JobStatus = JobStatus.running) -> Job:
+        """Register a job (or restart a persisted one, continuing its event sequence)."""
+        with self._db_lock:
+            with self._lock:
+                job = self._jobs.get(job_id)
+            job = job or self._load(job_id) or Job(job_id, kind, status, self.ring_size)
+            with self._lock:
+                job.status = status
+                job.finished_at = None
+                job.updated_at = time.time()
+                self._jobs[job_id] = job
+                row = self._job_row(job)
+            self._write_jobs([row])
+            self._db.commit()
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job from memory, falling back to disk for evicted or previous-run jobs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        with self._db_lock:
+            loaded = self._load(job_id)
+            if loaded is None:
+                return None
+            with self._lock:
+                return self._jobs.setdefault(job_id, loaded)
+
+    def update(self, job_id: str, **fields) -> None:
+        """Set persisted fields (status, progress, output_files) and write them through."""
+        job = self.get(job_id)
+        if job is None:
+            return
+        with self._db_lock:
+            with self._lock:
+                for name, value in fields.items():
+                    setattr(job, name, value)
+                job.updated_at = time.time()
+                if job.finished and job.finished_at is None:
+                    job.finished_at = job.updated_at
+                row = self._job_row(job)
+            self._write_jobs([row])
+            self._db.commit()
+
+    def list_jobs(self, kind: Optional[str] = None, status: Optional[JobStatus] = None,
+                  limit: int = 200) -> List[Dict[str, Any]]:
+        """Newest jobs first, filtered in SQL by kind and/or status."""
+        self.flush()
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if status:
+            clauses.append("status = ?")
+            params.append(JobStatus(status).value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._db_lock:
+            rows = self._db.execute(
+                f"SELECT job_id, status, progress, output_files, created_at, updated_at FROM jobs {where} "
+                f"ORDER BY created_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [
+            {
+                "job_id": r[0],
+                "status": r[1],
+                "progress": r[2],
+                "output_count": len(json.loads(r[3] or "[]")),
+                "created_at": r[4],
+                "updated_at": r[5],
+            }
+            for r in rows
+        ]
+
+    # ── events ──
+
+    def record(self, job_id: str, msg_type: str, message: str,
+               progress: Optional[float] = None) -> Optional[JobEvent]:
+        """
+        Append an event, applying its status/progress to the job. None if the job is unknown.
+        Memory only: the flusher thread writes it within FLUSH_INTERVAL_SECONDS.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            job.last_seq += 1
+            event = JobEvent(job.last_seq, msg_type, message, progress)
+            job.events.append(event)
+            job._pending.append(event)
+            job.updated_at = event.ts
+            job._dirty = True
+            if progress is not None:
+                job.progress = progress
+            status = STATUS_FOR_EVENT.get(msg_type)
+            if status is not None:
+                job.status = status
+                job.finished_at = event.ts
+            # Terminal events and full batches are written right away, the rest on the next tick
+            if status is not None or len(job._pending) >= self.flush_batch:
+                self._flush_wanted.set()
+            return event
+
+    def events(self, job_id: str, since: int = 0, limit: Optional[int] = None) -> List[JobEvent]:
+        """Events with seq > since, from the ring when it still covers the cursor, else from disk."""
+        job = self.get(job_id)
+        if job is None:
+            return []
+        with self._lock:
+            if job.events and job.events[0].seq <= since + 1:
+                found = [e for e in job.events if e.seq > since]
+                return found[:limit] if limit else found
+        with self._db_lock:
+            self.flush(job_id)
+            sql = "SELECT seq, type, message, progress, ts FROM events WHERE job_id = ? AND seq > ? ORDER BY seq"
+            found = [JobEvent(*r) for r in self._db.execute(sql, (job_id, since)).fetchall()]
+        return found[:limit] if limit else found
+
+    # ── housekeeping ──
+
+    def recover_interrupted(self) -> int:
+        """Mark jobs left running by a previous process as failed."""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?)",
+                (JobStatus.running.value, JobStatus.pending.value),
+            ).fetchall()
+        for (job_id,) in rows:
+            self.record(job_id, "ERROR", "❌ Interrupted by a server restart")
+        if rows:
+            self.flush()
+            logger.info("Marked %d interrupted job(s) as failed", len(rows))
+        return len(rows)
+
+    def evict_expired(self) -> None:
+        """Drop finished jobs from memory after memory_ttl and from disk after retention."""
+        now = time.time()
+        with self._db_lock:
+            self.flush()
+            cutoff = now - self.retention
+            expired = [r[0] for r in self._db.execute(
+                "SELECT job_id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            ).fetchall()]
+            with self._lock:
+                for job_id, job in list(self._jobs.items()):
+                    if job.finished and job.finished_at and now - job.finished_at > self.memory_ttl:
+                        del self._jobs[job_id]
+                for job_id in expired:
+                    self._jobs.pop(job_id, None)
+            for job_id in expired:
+                self._db.execute("DELETE FROM events WHERE job_id = ?", (job_id,))
+                self._db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._db.commit()
+        if expired:
+            logger.info("Purged %d expired job(s)", len(expired))
+
+    def close(self) -> None:
+        self._closed = True
+        self._flush_wanted.set()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+
+# Shared process-wide instance
+job_store = JobStore()
@@ -0,0 +1,336 @@
+"""
+Resumable Upload Engine
+Chunked client for Google's resumable upload protocol, used for YouTube
+video inserts.
+
+The session URI and confirmed byte offset are persisted to a small JSON state
+file next to the job's files after every chunk, so a dropped connection only
+re-sends the current chunk and a restarted process picks up where the last
+one stopped. Failed requests are retried with exponential backoff (plus
+jitter); after any failure the server is asked how many bytes it actually
+committed before continuing.
+
+The transport is any httplib2-style object: `http.request(uri, method, body,
+headers) -> (response, content)` where `response.status` is the HTTP status
+and the response behaves as a dict of lower-cased headers. In production
+this is the googleapiclient request's AuthorizedHttp, which also refreshes
+expired OAuth tokens.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional, Callable, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────── Defaults ───────────────────────────
+
+CHUNK_ALIGNMENT = 256 * 1024  # protocol requires multiples of 256 KiB
+DEFAULT_CHUNK_SIZE = int(os.environ.get("YT_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+MAX_RETRIES = int(os.environ.get("YT_UPLOAD_MAX_RETRIES", "8"))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 64.0
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+STATE_SUFFIX = ".upload.json"
+
+
+class ResumableUploadError(Exception):
+    """Upload could not be completed (non-retryable status or retries exhausted)."""
+
+    def __init__(self, message: str, status: Optional[int] = None, content: bytes = b""):
+        super().__init__(message)
+        self.status = status
+        self.content = content
+
+
+def state_path_for(file_path: str, state_dir: Optional[str] = None) -> Path:
+    """Where the resume state for `file_path` lives (job dir, else next to the file)."""
+    directory = Path(state_dir) if state_dir else Path(file_path).parent
+    return directory / f"{Path(file_path).name}{STATE_SUFFIX}"
+
+
+def _parse_range_end(response) -> int:
+    """Next byte offset from a 308 response's `Range: bytes=0-N` header."""
+    value = response.get("range") if hasattr(response, "get") else None
+    if not value:
+        return 0
+    try:
+        return int(value.rsplit("-", 1)[1]) + 1
+    except (IndexError, ValueError):
+        return 0
+
+
+def _decode_json(content) -> Dict[str, Any]:
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    try:
+        return json.loads(content) if content else {}
+    except ValueError:
+        return {}
+
+
+# ─────────────────────────── Engine ───────────────────────────
+
+class ResumableUpload:
+    """
+    Upload one file through a resumable session.
+
+    Args:
+        http: httplib2-style transport
+        file_path: File to upload
+        state_path: JSON file holding the session URI and committed offset
+        mimetype: Content type of the media
+        chunk_size: Bytes per PUT (rounded up to a multiple of 256 KiB)
+        max_retries: Consecutive failures tolerated before giving up
+        on_progress: Called with (bytes_committed, total_bytes) after each chunk
+        on_retry: Called with (status, retry_after_seconds) before each retry;
+            status is None for transport errors
+        context: Extra JSON-serialisable data persisted with the state (used to
+            restart the job after a process restart)
+        sleep: Injected for tests
+    """
+
+    def __init__(
+        self,
+        http,
+        file_path: str,
+        state_path: Path,
+        mimetype: str = "application/octet-stream",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = MAX_RETRIES,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        on_retry: Optional[Callable[[Optional[int], Optional[float]], None]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.http = http
+        self.file_path = str(file_path)
+        self.state_path = Path(state_path)
+        self.mimetype = mimetype
+        self.chunk_size = max(CHUNK_ALIGNMENT, -(-chunk_size // CHUNK_ALIGNMENT) * CHUNK_ALIGNMENT)
+        self.max_retries = max_retries
+        self.on_progress = on_progress
+        self.on_retry = on_retry
+        self.context = context or {}
+        self.sleep = sleep
+        stat = os.stat(self.file_path)
+        self.total = stat.st_size
+        self.mtime = stat.st_mtime
+        self.retries_used = 0
+
+    # ── state ──
+
+    def _load_state(self, metadata_sha: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (
+            state.get("file_size") != self.total
+            or state.get("file_mtime") != self.mtime
+            or state.get("metadata_sha") != metadata_sha
+        ):
+            logger.info("Discarding stale upload state %s", self.state_path.name)
+            return None
+        return state
+
+    def _save_state(self, metadata_sha: str, session_uri: str, offset: int) -> None:
+        state = {
+            "file_path": self.file_path,
+            "file_size": self.total,
+            "file_mtime": self.mtime,
+            "metadata_sha": metadata_sha,
+            "resumable_uri": session_uri,
+            "offset": offset,
+            "chunk_size": self.chunk_size,
+            "updated_at": time.time(),
+            "context": self.context,
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def _clear_state(self) -> None:
+        try:
+            self.state_path.unlink()
+        except OSError:
+            pass
+
+    # ── protocol ──
+
+    def _backoff(self, attempt: int, response=None) -> None:
+        status = getattr(response, "status", None)
+        retry_after = None
+        if response is not None and hasattr(response, "get"):
+            try:
+                retry_after = float(response.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        if self.on_retry:
+            try:
+                self.on_retry(status, retry_after)
+            except Exception as e:
+                logger.debug("Retry callback failed: %s", e)
+        delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)))
+        delay = max(delay, retry_after or 0) + random.uniform(0, BACKOFF_BASE_SECONDS)
+        logger.warning("Upload request failed, retry %d/%d in %.1fs", attempt, self.max_retries, delay)
+        self.sleep(delay)
+
+    def _request(self, uri: str, method: str, body=None, headers=None) -> Tuple[Any, bytes]:
+        """One request with retries for transport errors and retryable statuses."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response, content = self.http.request(uri, method=method, body=body, headers=headers or {})
+                if response.status not in RETRYABLE_STATUSES:
+                    return response, content
+                error = ResumableUploadError(f"HTTP {response.status}", response.status, content)
+            except ResumableUploadError:
+                raise
+            except Exception as e:  # transport errors (socket, TLS, httplib2)
+                error = e
+            attempt += 1
+            self.retries_used += 1
+            if attempt > self.max_retries:
+                raise ResumableUploadError(f"{method} failed after {self.max_retries} retries: {error}")
+            self._backoff(attempt, response)
+
+    def _initiate(self, init_uri: str, init_body, init_headers: Dict[str, str]) -> str:
+        headers = {k: v for k, v in (init_headers or {}).items() if k.lower() != "content-length"}
+        headers["X-Upload-Content-Type"] = self.mimetype
+        headers["X-Upload-Content-Length"] = str(self.total)
+        response, content = self._request(init_uri, "POST", body=init_body, headers=headers)
+        session_uri = response.get("location") if hasattr(response, "get") else None
+        if response.status != 200 or not session_uri:
+            raise ResumableUploadError(
+                f"Could not start resumable session (HTTP {response.status})", response.status, content
+            )
+        return session_uri
+
+    def _query(self, session_uri: str) -> Tuple[str, Any]:
+        """Ask the server for its committed offset: ('offset', n), ('done', body) or ('expired', None)."""
+        response, content = self._request(
+            session_uri, "PUT", body=b"", headers={"Content-Range": f"bytes */{self.total}", "Content-Length": "0"}
+        )
+        if response.status in (200, 201):
+            return "done", _decode_json(content)
+        if response.status == 308:
+            return "offset", _parse_range_end(response)
+        if response.status in (404, 410):
+            return "expired", None
+        raise ResumableUploadError(f"Unexpected status querying upload: HTTP {response.status}", response.status, content)
+
+    def _read_chunk(self, offset: int) -> bytes:
+        with open(self.file_path, "rb") as f:
+            f.seek(offset)
+            return f.read(self.chunk_size)
+
+    def _report(self, offset: int) -> None:
+        if self.on_progress:
+            try:
+                self.on_progress(offset, self.total)
+            except Exception as e:
+                logger.debug("Progress callback failed: %s", e)
+
+    def run(self, init_uri: str, init_body=None, init_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Upload the file, resuming a persisted session when one is valid.
+        Returns the JSON resource from the final response.
+        """
+        metadata_sha = hashlib.sha256(
+            init_body if isinstance(init_body, bytes) else str(init_body or "").encode("utf-8")
+        ).hexdigest()
+
+        session_uri, offset = None, 0
+        state = self._load_state(metadata_sha)
+        if state and state.get("resumable_uri"):
+            kind, value = self._query(state["resumable_uri"])
+            if kind == "done":
+                self._clear_state()
+                self._report(self.total)
+                return value
+            if kind == "offset":
+                session_uri, offset = state["resumable_uri"], value
+                logger.info("Resuming upload of %s at %d/%d bytes", Path(self.file_path).name, offset, self.total)
+            else:
+                logger.info("Resumable session expired, starting over")
+
+        while True:
+            if session_uri is None:
+                session_uri, offset = self._initiate(init_uri, init_body, init_headers), 0
+                self._save_state(metadata_sha, session_uri, 0)
+            self._report(offset)
+
+            failures = 0
+            while True:
+                chunk = self._read_chunk(offset)
+                last = offset + len(chunk) - 1
+                headers = {
+                    "Content-Type": self.mimetype,
+                    "Content-Length": str(len(chunk)),
+                    "Content-Range": f"bytes {offset}-{last}/{self.total}" if chunk else f"bytes */{self.total}",
+                }
+                try:
+                    response, content = self.http.request(session_uri, method="PUT", body=chunk, headers=headers)
+                    status = response.status
+                except Exception as e:
+                    response, content, status = None, str(e).encode(), None
+
+                if status in (200, 201):
+                    self._clear_state()
+                    self._report(self.total)
+                    return _decode_json(content)
+                if status == 308:
+                    offset = _parse_range_end(response)
+                    failures = 0
+                    self._save_state(metadata_sha, session_uri, offset)
+                    self._report(offset)
+                    continue
+                if status in (404, 410):
+                    logger.warning("Resumable session expired mid-upload, starting over")
+                    session_uri = None
+                    break
+                if status is not None and status not in RETRYABLE_STATUSES:
+                    self._clear_state()
+                    raise ResumableUploadError(f"Upload rejected: HTTP {status}", status, content)
+
+                # Transport error or retryable status: back off, then re-sync the offset
+                failures += 1
+                self.retries_used += 1
+                if failures > self.max_retries:
+                    raise ResumableUploadError(
+                        f"Chunk at byte {offset} failed after {self.max_retries} retries", status, content
+                    )
+                self._backoff(failures, response)
+                kind, value = self._query(session_uri)
+                if kind == "done":
+                    self._clear_state()
+                    self._report(self.total)
+                    return value
+                if kind == "expired":
+                    session_uri = None
+                    break
+                offset = value
+                self._save_state(metadata_sha, session_uri, offset)
+
+
+def find_pending_uploads(root: Path):
+    """Yield persisted upload states under `root` (one level of job dirs)."""
+    for state_file in Path(root).glob(f"*/*{STATE_SUFFIX}"):
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        state["state_path"] = str(state_file)
+        yield state
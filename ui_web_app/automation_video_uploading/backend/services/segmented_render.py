@@ -0,0 +1,339 @@
+"""
+Segmented Render
+Split one long CPU encode into keyframe-aligned time ranges rendered by
+several ffmpeg processes at once.
+
+The source's keyframes are read from packet flags (demux only, no decode)
+and N cut points are snapped to the nearest keyframe, so every range starts
+on a clean seek point. Each range renders the caller's video filter graph
+with its own copy of the ASS files, shifted so subtitle times stay aligned
+with the range's zero-based timestamps. Audio is encoded once over the full
+timeline rather than per range, so there are no AAC priming gaps at the
+seams. The ranges are joined with a concat-demuxer stream copy, muxed with
+the audio, and the seams are checked before the result is accepted.
+
+The single-process vs segmented benchmark lives in the backend's
+benchmarks/segmented_render_bench.py.
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shorter sources are rendered in one process (segmenting would only add overhead)
+MIN_SEGMENTED_SECONDS = float(os.environ.get("SEGMENTED_RENDER_MIN_SECONDS", "120"))
+# Ranges shorter than this are merged into their neighbour
+MIN_SEGMENT_SECONDS = 20.0
+# libx264 keeps about this many cores busy per process before threading tails off
+CORES_PER_SEGMENT = 4
+MAX_SEGMENTS = 32
+
+Runner = Callable[[List[str]], Tuple[bool, str]]
+StatusCallback = Callable[[str, str], None]
+
+_CREATIONFLAGS = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+_ASS_TIME = re.compile(r"^\s*(\d+):(\d{1,2}):(\d{1,2}(?:\.\d+)?)\s*$")
+
+
+def _run(cmd: List[str]) -> Tuple[bool, str]:
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                         encoding="utf-8", errors="replace", creationflags=_CREATIONFLAGS)
+    return res.returncode == 0, res.stderr
+
+
+def _ffprobe_json(args: List[str], timeout: int = 300) -> Dict[str, Any]:
+    try:
+        res = subprocess.run(["ffprobe", "-v", "error", "-of", "json"] + args,
+                             capture_output=True, text=True, timeout=timeout, creationflags=_CREATIONFLAGS)
+        return json.loads(res.stdout or "{}")
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return {}
+
+
+# ─────────────────────────── Planning ───────────────────────────
+
+class Segment:
+    """One time range of the source and where its render goes."""
+
+    __slots__ = ("index", "start", "duration", "ass_paths", "output", "threads")
+
+    def __init__(self, index: int, start: float, duration: float, output: str, threads: int):
+        self.index = index
+        self.start = start
+        self.duration = duration
+        self.output = output
+        self.threads = threads
+        self.ass_paths: List[str] = []
+
+    def input_args(self, path: str) -> List[str]:
+        """`-ss/-t/-i` arguments that read just this range of `path`."""
+        return ["-ss", f"{self.start:.6f}", "-t", f"{self.duration:.6f}", "-i", str(path)]
+
+    def __repr__(self):
+        return f"Segment({self.index}, {self.start:.2f}s +{self.duration:.2f}s)"
+
+
+def auto_segment_count(duration: float) -> int:
+    """Segments for a source of `duration` seconds on this machine (1 = don't segment)."""
+    if duration < MIN_SEGMENTED_SECONDS:
+        return 1
+    by_cores = (os.cpu_count() or 1) // CORES_PER_SEGMENT
+    by_length = int(duration // MIN_SEGMENT_SECONDS)
+    return max(1, min(by_cores, by_length, MAX_SEGMENTS))
+
+
+def probe_keyframes(path: str) -> Tuple[List[float], Optional[float]]:
+    """
+    Keyframe times of the first video stream (seconds, in `-ss` terms) and the
+    container duration. Reads packet flags only, so it is quick even for long files.
+    """
+    data = _ffprobe_json([
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags:format=duration,start_time",
+        str(path),
+    ])
+    fmt = data.get("format") or {}
+    try:
+        duration = float(fmt.get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    try:
+        start_time = float(fmt.get("start_time") or 0.0)
+    except (TypeError, ValueError):
+        start_time = 0.0
+    times = []
+    for packet in data.get("packets") or []:
+        if "K" not in (packet.get("flags") or ""):
+            continue
+        try:
+            # ffmpeg's input -ss counts from the container start time
+            times.append(round(float(packet["pts_time"]) - start_time, 6))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return sorted(set(t for t in times if t >= 0)), duration
+
+
+def plan_ranges(keyframes: List[float], duration: float, count: int) -> List[Tuple[float, float]]:
+    """Cut `duration` into about `count` (start, length) ranges starting on keyframes."""
+    cuts = [0.0]
+    if keyframes and count > 1:
+        for i in range(1, count):
+            ideal = duration * i / count
+            snapped = min(keyframes, key=lambda k: abs(k - ideal))
+            if snapped - cuts[-1] >= MIN_SEGMENT_SECONDS and duration - snapped >= MIN_SEGMENT_SECONDS:
+                cuts.append(snapped)
+    ends = cuts[1:] + [duration]
+    return [(start, end - start) for start, end in zip(cuts, ends)]
+
+
+# ─────────────────────────── ASS Shifting ───────────────────────────
+
+def _parse_ass_time(value: str) -> Optional[float]:
+    match = _ASS_TIME.match(value)
+    if not match:
+        return None
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def _format_ass_time(seconds: float) -> str:
+    cs_total = int(round(max(0.0, seconds) * 100))
+    h, rem = divmod(cs_total, 360000)
+    m, rem = divmod(rem, 6000)
+    s, cs = divmod(rem, 100)
+    return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def shift_ass(src: str, dst: str, offset: float, duration: float) -> int:
+    """
+    Copy an ASS file with every event moved `offset` seconds earlier. Events
+    entirely outside [0, duration] are dropped and the rest clamped at 0.
+    Returns the number of events kept.
+    """
+    kept = 0
+    with open(src, "r", encoding="utf-8-sig") as fin, open(dst, "w", encoding="utf-8") as fout:
+        for line in fin:
+            if not line.startswith("Dialogue:"):
+                fout.write(line)
+                continue
+            parts = line.split(",", 3)
+            start = _parse_ass_time(parts[1]) if len(parts) == 4 else None
+            end = _parse_ass_time(parts[2]) if len(parts) == 4 else None
+            if start is None or end is None:
+                fout.write(line)
+                continue
+            start -= offset
+            end -= offset
+            if end <= 0 or start >= duration:
+                continue
+            fout.write(",".join([parts[0], _format_ass_time(start), _format_ass_time(end), parts[3]]))
+            kept += 1
+    return kept
+
+
+def escape_filter_path(path: str) -> str:
+    """Quote a path for use inside an ffmpeg filter argument."""
+    return str(path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+
+# ─────────────────────────── Validation ───────────────────────────
+
+def _stream_facts(path: str) -> Dict[str, Any]:
+    data = _ffprobe_json(["-show_entries", "stream=codec_type,duration,avg_frame_rate:format=duration", str(path)])
+    facts: Dict[str, Any] = {}
+    for stream in data.get("streams") or []:
+        kind = stream.get("codec_type")
+        if kind in ("video", "audio") and kind not in facts:
+            try:
+                facts[kind] = float(stream.get("duration"))
+            except (TypeError, ValueError):
+                pass
+            if kind == "video":
+                num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+                try:
+                    facts["fps"] = float(num) / float(den or 1)
+                except (ValueError, ZeroDivisionError):
+                    pass
+    if "video" not in facts:
+        try:
+            facts["video"] = float((data.get("format") or {}).get("duration"))
+        except (TypeError, ValueError):
+            pass
+    return facts
+
+
+def validate_seams(segments: List[Segment], source: str, output: str) -> Tuple[bool, str]:
+    """
+    Check that each rendered range ends where the next was planned to start
+    (within 1.5 frames) and that the output's audio/video length difference
+    matches the source's, i.e. the stitched video did not drift against the audio.
+    """
+    cursor = 0.0
+    fps = None
+    for seg in segments[:-1]:
+        facts = _stream_facts(seg.output)
+        fps = fps or facts.get("fps")
+        if "video" not in facts:
+            return False, f"segment {seg.index} has no readable duration"
+        cursor += facts["video"]
+        planned = segments[seg.index + 1].start
+        tolerance = 1.5 / fps if fps else 0.1
+        if abs(cursor - planned) > tolerance:
+            return False, f"seam {seg.index + 1} off by {cursor - planned:+.3f}s"
+
+    src, out = _stream_facts(source), _stream_facts(output)
+    fps = fps or out.get("fps")
+    if "video" not in out:
+        return False, "output has no readable duration"
+    if "audio" in src and "audio" in out and "video" in src:
+        drift = (out["video"] - out["audio"]) - (src["video"] - src["audio"])
+        tolerance = max(0.05, 2.0 / fps) if fps else 0.1
+        if abs(drift) > tolerance:
+            return False, f"audio/video drift {drift:+.3f}s after stitching"
+    return True, ""
+
+
+# ─────────────────────────── Render ───────────────────────────
+
+def render_segmented(
+    source: str,
+    output: str,
+    video_cmd: Callable[[Segment], List[str]],
+    audio_cmd: Optional[Callable[[str], List[str]]],
+    ass_paths: Optional[List[str]] = None,
+    segments: int = 0,
+    runner: Optional[Runner] = None,
+    status_cb: Optional[StatusCallback] = None,
+) -> Tuple[bool, str]:
+    """
+    Render `source` to `output` in keyframe-aligned ranges.
+
+    Args:
+        video_cmd: Builds the video-only ffmpeg command for a Segment: read with
+            `seg.input_args(...)`, burn `seg.ass_paths`, encode with
+            `seg.threads` threads and write `seg.output` (no audio)
+        audio_cmd: Builds the audio-only command for the whole timeline,
+            writing the path it is given (None when the output has no audio)
+        ass_paths: Subtitle files to shift per range (in filter order)
+        segments: Range count; 0 picks one from length and CPU count
+        runner: `runner(cmd) -> (ok, stderr)`; defaults to a plain subprocess
+        status_cb: (type, message) progress lines
+
+    Returns:
+        (ok, message). Not ok means the caller should render in one process.
+    """
+    runner = runner or _run
+    ass_paths = [p for p in (ass_paths or []) if p]
+    keyframes, duration = probe_keyframes(source)
+    if not duration:
+        return False, "could not read source duration"
+    count = segments or auto_segment_count(duration)
+    ranges = plan_ranges(keyframes, duration, count)
+    if len(ranges) < 2:
+        return False, "source too short or too few keyframes to segment"
+
+    threads = max(1, (os.cpu_count() or 1) // len(ranges))
+    tmp_dir = tempfile.mkdtemp(prefix="segrender_")
+    try:
+        plan = []
+        for i, (start, length) in enumerate(ranges):
+            seg = Segment(i, start, length, os.path.join(tmp_dir, f"seg_{i:03d}.mp4"), threads)
+            for j, ass in enumerate(ass_paths):
+                shifted = os.path.join(tmp_dir, f"seg_{i:03d}_{j}.ass")
+                shift_ass(ass, shifted, start, length)
+                seg.ass_paths.append(shifted)
+            plan.append(seg)
+        if status_cb:
+            status_cb("LOG", f"  ├─ Segmented render: {len(plan)} ranges × {threads} threads "
+                             f"(cuts at {', '.join(f'{s.start:.1f}s' for s in plan[1:])})")
+
+        audio_out = os.path.join(tmp_dir, "audio.m4a") if audio_cmd else None
+        jobs: List[Tuple[str, List[str]]] = [(f"range {seg.index + 1}/{len(plan)}", video_cmd(seg)) for seg in plan]
+        if audio_out:
+            jobs.append(("audio", audio_cmd(audio_out)))
+
+        started = time.monotonic()
+
+        def _job(item):
+            label, cmd = item
+            ok, err = runner(cmd)
+            if status_cb:
+                status_cb("LOG", f"  ├─ {'✓' if ok else '✗'} {label} ({time.monotonic() - started:.1f}s)")
+            return ok, err
+
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="segrender") as executor:
+            results = list(executor.map(_job, jobs))
+        for (label, _), (ok, err) in zip(jobs, results):
+            if not ok:
+                return False, f"{label} failed: {(err or '').strip()[-500:]}"
+
+        concat_txt = os.path.join(tmp_dir, "concat.txt")
+        with open(concat_txt, "w", encoding="utf-8") as f:
+            for seg in plan:
+                f.write(f"file '{os.path.abspath(seg.output).replace(os.sep, '/')}'\n")
+        cmd = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", concat_txt]
+        if audio_out:
+            cmd += ["-i", audio_out, "-map", "0:v:0", "-map", "1:a:0"]
+        cmd += ["-c", "copy", "-movflags", "+faststart", str(output)]
+        ok, err = runner(cmd)
+        if not ok:
+            return False, f"stitching failed: {(err or '').strip()[-500:]}"
+
+        ok, problem = validate_seams(plan, source, output)
+        if not ok:
+            return False, f"seam check failed: {problem}"
+        if status_cb:
+            status_cb("LOG", f"  └─ Stitched {len(plan)} ranges, seams in sync ({time.monotonic() - started:.1f}s)")
+        return True, ""
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
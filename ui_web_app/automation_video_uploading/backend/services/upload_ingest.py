@@ -0,0 +1,193 @@
+"""
+Upload Ingest
+Stream multipart `UploadFile`s to their destination without holding them in
+memory.
+
+Each file is copied in fixed-size chunks on a worker thread, so neither the
+event loop nor RAM ever sees a whole clip. Bytes are SHA-256 hashed while
+they are copied, every file counts against a per-request byte budget, and
+the ingest keeps enough timing to report MB/s once the request is saved.
+
+Starlette spools the whole multipart body to a temporary file before the
+endpoint runs, so the ingest budget alone can only reject a request after
+it has been received. `RequestSizeLimit` is the ASGI middleware that
+protects the disk: it refuses a request whose Content-Length is over the
+limit before reading it, and stops a chunked body as soon as it passes it.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────── Defaults ───────────────────────────
+
+INGEST_CHUNK_SIZE = int(os.environ.get("INGEST_CHUNK_SIZE", str(1024 * 1024)))
+MAX_REQUEST_BYTES = int(os.environ.get("MAX_UPLOAD_REQUEST_BYTES", str(32 * 1024 ** 3)))
+# Multipart boundaries, part headers and form fields on top of the file bytes
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+class IngestBudgetExceeded(Exception):
+    """The request's files add up to more than the allowed byte budget."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit / (1024 * 1024):.0f} MB per-request limit")
+        self.limit = limit
+
+
+class IngestedFile:
+    """A saved upload: where it went, how big it was and its SHA-256."""
+
+    def __init__(self, filename: str, path: Path, size: int, sha256: str, seconds: float):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"IngestedFile({self.filename!r}, size={self.size}, sha256={self.sha256[:12]}…)"
+
+
+# ─────────────────────────── Ingest ───────────────────────────
+
+class UploadIngest:
+    """
+    Save the files of one request under a shared byte budget.
+
+    Args:
+        max_bytes: Total bytes allowed across every file saved by this ingest
+        chunk_size: Bytes per read/write
+    """
+
+    def __init__(self, max_bytes: int = MAX_REQUEST_BYTES, chunk_size: int = INGEST_CHUNK_SIZE):
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.files: List[IngestedFile] = []
+        self.total_bytes = 0
+        self.busy_seconds = 0.0
+
+    def _copy(self, source, dest: Path) -> IngestedFile:
+        """Blocking chunked copy + hash; removes the partial file on failure."""
+        started = time.monotonic()
+        digest = hashlib.sha256()
+        size = 0
+        source.seek(0)
+        try:
+            with open(dest, "wb") as out:
+                while True:
+                    chunk = source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.total_bytes + size > self.max_bytes:
+                        raise IngestBudgetExceeded(self.max_bytes)
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            try:
+                os.remove(dest)
+            except OSError:
+                pass
+            raise
+        return IngestedFile(dest.name, dest, size, digest.hexdigest(), time.monotonic() - started)
+
+    async def save(self, upload, dest) -> IngestedFile:
+        """Copy `upload` (a FastAPI/Starlette UploadFile) to `dest` off the event loop."""
+        dest = Path(dest)
+        loop = asyncio.get_running_loop()
+        saved = await loop.run_in_executor(None, self._copy, upload.file, dest)
+        saved.filename = upload.filename or dest.name
+        self.files.append(saved)
+        self.total_bytes += saved.size
+        self.busy_seconds += saved.seconds
+        logger.info("Ingested %s: %.1f MB in %.2fs (sha256 %s)",
+                    saved.filename, saved.size / (1024 * 1024), saved.seconds, saved.sha256[:12])
+        return saved
+
+    async def save_into(self, upload, directory) -> IngestedFile:
+        """Save `upload` under `directory`, keeping only the basename of its filename."""
+        return await self.save(upload, Path(directory) / Path(upload.filename).name)
+
+    def mb_per_second(self) -> float:
+        if self.busy_seconds <= 0:
+            return 0.0
+        return self.total_bytes / (1024 * 1024) / self.busy_seconds
+
+    def summary(self) -> str:
+        return (f"📥 Received {len(self.files)} file(s), {self.total_bytes / (1024 * 1024):.1f} MB "
+                f"at {self.mb_per_second():.1f} MB/s")
+
+
+# ─────────────────────────── Request Limit ───────────────────────────
+
+class RequestSizeLimit:
+    """
+    ASGI middleware enforcing the byte budget on the raw request body, before
+    Starlette spools it: 413 for a Content-Length over the limit, and for a
+    chunked body as soon as the bytes read pass it.
+
+    Args:
+        app: The wrapped ASGI application
+        max_bytes: Body bytes allowed per request (multipart overhead is added on top)
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"") or -1)
+        except ValueError:
+            declared = -1
+        if declared > self.limit:
+            await self._reject(send)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    raise IngestBudgetExceeded(self.max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except IngestBudgetExceeded:
+            if started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        logger.warning("Rejected upload over the %.0f MB request limit", self.max_bytes / (1024 * 1024))
+        body = json.dumps({"detail": str(IngestBudgetExceeded(self.max_bytes))}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
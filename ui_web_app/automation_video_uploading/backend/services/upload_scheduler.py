@@ -0,0 +1,159 @@
+"""
+Upload Scheduler Primitives
+Rate limiting and throughput accounting for concurrent YouTube batch uploads.
+
+TokenBucket paces API calls (upload initiations, thumbnail and playlist
+writes) and adapts to what the API tells us: each 429 / rate-limit response
+halves the refill rate and honours Retry-After, each success nudges the rate
+back up (AIMD). ThroughputMeter turns byte and completion events into MB/s and
+videos/min for progress messages.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────── Defaults ───────────────────────────
+
+UPLOAD_CONCURRENCY = int(os.environ.get("YT_UPLOAD_CONCURRENCY", "2"))
+API_RATE_PER_SECOND = float(os.environ.get("YT_API_RATE", "1.0"))
+API_BURST = int(os.environ.get("YT_API_BURST", "3"))
+API_MIN_RATE = 0.05
+API_RATE_INCREASE = 0.05
+
+THROTTLE_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "RATE_LIMIT_EXCEEDED")
+
+
+def is_throttle_error(status: Optional[int], content: bytes = b"") -> bool:
+    """True for responses that mean 'slow down' rather than 'this call is invalid'."""
+    if status == 429:
+        return True
+    if status == 403 and content:
+        text = content.decode("utf-8", errors="ignore") if isinstance(content, bytes) else str(content)
+        return any(reason in text for reason in THROTTLE_REASONS)
+    return False
+
+
+# ─────────────────────────── Token Bucket ───────────────────────────
+
+class TokenBucket:
+    """Async token bucket with an adaptive refill rate."""
+
+    def __init__(
+        self,
+        rate: float = API_RATE_PER_SECOND,
+        capacity: int = API_BURST,
+        min_rate: float = API_MIN_RATE,
+        increase: float = API_RATE_INCREASE,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.min_rate = min_rate
+        self.increase = increase
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self.throttle_events = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until `tokens` are available (and any Retry-After has passed)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """Record a throttling response: halve the rate, drain the bucket."""
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+        self.throttle_events += 1
+        logger.warning("API throttled; rate now %.2f calls/s%s", self.rate,
+                       f", paused {retry_after:.0f}s" if retry_after else "")
+
+    def success(self) -> None:
+        """Record a successful call: recover the rate additively."""
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+# ─────────────────────────── Throughput ───────────────────────────
+
+class ThroughputMeter:
+    """Aggregate bytes and completions across concurrent uploads."""
+
+    def __init__(self, total_videos: int, window_seconds: float = 10.0):
+        self.total_videos = total_videos
+        self.window = window_seconds
+        self.started = time.monotonic()
+        self.bytes_sent: Dict[Any, int] = {}
+        self.bytes_total: Dict[Any, int] = {}
+        self.completed = 0
+        self.done = set()
+        self._samples = deque()  # (t, cumulative bytes)
+        self._last_report = 0.0
+
+    def update(self, key, sent: int, total: int) -> None:
+        self.bytes_sent[key] = sent
+        self.bytes_total[key] = total
+        now = time.monotonic()
+        self._samples.append((now, sum(self.bytes_sent.values())))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+    def finish(self, key, success: bool = True) -> None:
+        self.done.add(key)
+        if success:
+            self.completed += 1
+
+    def mb_per_second(self) -> float:
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+        return (b1 - b0) / (1024 * 1024) / (t1 - t0) if t1 > t0 else 0.0
+
+    def videos_per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.completed / (elapsed / 60) if elapsed > 0 else 0.0
+
+    def percent(self) -> float:
+        """Overall progress: finished videos plus byte progress of those in flight."""
+        if not self.total_videos:
+            return 100.0
+        in_flight = sum(
+            self.bytes_sent[k] / self.bytes_total[k]
+            for k in self.bytes_total
+            if k not in self.done and self.bytes_total[k]
+        )
+        return round(min(100.0, (len(self.done) + in_flight) / self.total_videos * 100), 1)
+
+    def should_report(self, interval: float = 1.0) -> bool:
+        now = time.monotonic()
+        if now - self._last_report >= interval:
+            self._last_report = now
+            return True
+        return False
+
+    def summary(self) -> str:
+        return (f"{self.mb_per_second():.2f} MB/s · {self.videos_per_minute():.1f} videos/min · "
+                f"{self.completed}/{self.total_videos} done")
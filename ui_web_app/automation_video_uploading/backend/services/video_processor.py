@@ -7,16 +7,29 @@ audio ducking, video merging, background music.
 
 import os
 import subprocess
-import json
 import logging
 import asyncio
 import tempfile
 import random
 import shutil
+import threading
 import traceback
 from pathlib import Path
 from typing import Optional, List, Callable, Awaitable, Dict, Any
 
+from services.whisper_pool import whisper_pool, DEFAULT_MODEL_SIZE
+from services.transcript_cache import transcript_cache
+from services.ffmpeg_progress import FFmpegProgressAggregator, with_progress_args
+from services.clip_normalizer import normalized_cache, probe_clip, clips_concat_compatible
+from services.ffmpeg_pool import FFmpegPool
+from services.media_probe import media_probe
+from services.encoder_caps import encoder_registry
+from services.ducking import build_ducking_curve
+from services.music_bed import music_beds, loop_input_args
+from services.segmented_render import (
+    render_segmented, escape_filter_path, Segment, MIN_SEGMENTED_SECONDS, MAX_SEGMENTS,
+)
+
 logger = logging.getLogger(__name__)
 
 # Type alias
@@ -60,37 +73,17 @@ def run_ffmpeg(cmd: List[str]) -> subprocess.CompletedProcess:
 
 
 def get_video_duration(video_path: str) -> float:
-    """Return video duration in seconds using ffprobe."""
-    cmd = [
-        "ffprobe", "-v", "quiet", "-print_format", "json",
-        "-show_streams", video_path
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    try:
-        info = json.loads(result.stdout)
-        for stream in info.get("streams", []):
-            if stream.get("codec_type") == "video":
-                return float(stream.get("duration", 0))
-    except Exception:
-        pass
-    return 0.0
+    """Return video duration in seconds (cached ffprobe)."""
+    info = media_probe.probe(video_path)
+    if info is None:
+        return 0.0
+    return info.video_duration or info.duration or 0.0
 
 
 def has_audio_stream(video_path: str) -> bool:
     """Return True if video file has an audio stream."""
-    cmd = [
-        "ffprobe", "-v", "quiet", "-print_format", "json",
-        "-show_streams", video_path
-    ]
-    res = subprocess.run(cmd, capture_output=True, text=True)
-    try:
-        info = json.loads(res.stdout)
-        for stream in info.get("streams", []):
-            if stream.get("codec_type") == "audio":
-                return True
-    except Exception:
-        pass
-    return False
+    info = media_probe.probe(video_path)
+    return bool(info and info.has_audio)
 
 
 def merge_video_list_robust(
@@ -101,12 +94,20 @@ def merge_video_list_robust(
     enable_gpu: bool = True,
     quality: str = "fast",
     status_cb: Optional[Callable[[str, str], None]] = None,
+    pool: Optional[FFmpegPool] = None,
+    clip_done_cb: Optional[Callable[[], None]] = None,
 ) -> tuple[bool, str]:
     """
     Robustly merge a list of video files into output_path:
-    1. Normalizes each clip (resolution, fps, audio track with silent fallback).
+    1. Normalizes each clip (resolution, fps, audio track with silent fallback),
+       skipping clips that already conform and reusing the shared normalized-clip cache.
+       Clips are normalized concurrently on `pool`; the concat order is the input order.
+       Inputs that already share one format are not normalized at all.
     2. Try concat demuxer with `-c copy`.
     3. Fallback to `-filter_complex concat`.
+
+    Every ffmpeg run goes through `pool`, so cancelling the pool kills them.
+    `clip_done_cb` is called (from a worker thread) as each clip is ready.
     """
     if not video_paths:
         return False, "No input videos provided"
@@ -114,79 +115,52 @@ def merge_video_list_robust(
     if len(video_paths) == 1:
         try:
             shutil.copyfile(video_paths[0], output_path)
+            if clip_done_cb:
+                clip_done_cb()
             return True, ""
         except Exception as e:
             return False, str(e)
 
+    pool = pool or FFmpegPool(enable_gpu=enable_gpu)
     tmp_dir = tempfile.mkdtemp()
+    pinned: List[str] = []  # cached clips held until the concat is done
     try:
-        norm_clips = []
-        for idx, src in enumerate(video_paths):
-            clip_name = Path(src).name
+        infos = pool.map(probe_clip, video_paths)
+        if target_res is None:
+            # Without an explicit size, concat still needs one: use the first clip's
+            first = next((i for i in infos if i and i.get("width")), None)
+            if first and any(i and (i["width"], i["height"]) != (first["width"], first["height"]) for i in infos):
+                target_res = (first["width"], first["height"])
+
+        def _normalize(idx: int) -> str:
+            src = video_paths[idx]
+            norm_path, how = normalized_cache.normalize(
+                src, target_res=target_res, fps=fps, enable_gpu=enable_gpu,
+                quality=quality, info=infos[idx], runner=pool.run,
+            )
+            if how in ("cached", "encoded"):
+                pinned.append(norm_path)
+            if status_cb and not pool.cancelled:
+                label = {"conforming": "already conforms, no re-encode",
+                         "cached": "reused cached normalized clip",
+                         "encoded": "normalized"}.get(how, "normalization failed, using source")
+                status_cb("LOG", f"  ├─ Clip {idx + 1}/{len(video_paths)}: {Path(src).name} — {label}")
+            if clip_done_cb:
+                clip_done_cb()
+            return norm_path or src
+
+        if clips_concat_compatible(infos, target_res, fps):
+            # Already one format (e.g. section outputs): stream-copy them as they are
             if status_cb:
-                status_cb("LOG", f"  ├─ Normalizing clip {idx + 1}/{len(video_paths)}: {clip_name}")
-
-            norm_out = os.path.join(tmp_dir, f"norm_{idx}.mp4")
-            has_audio = has_audio_stream(src)
-
-            filter_chain = []
-            if target_res:
-                w, h = target_res
-                filter_chain.append(f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1")
-
-            cmd = ["ffmpeg", "-y"]
-            if has_audio:
-                cmd += ["-i", src]
-            else:
-                # Add silent audio stream matching video duration
-                cmd += ["-i", src, "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100", "-shortest"]
-
-            if filter_chain:
-                cmd += ["-vf", ",".join(filter_chain)]
-
-            if fps > 0:
-                cmd += ["-r", str(fps)]
-
-            if enable_gpu:
-                cmd += ["-c:v", "h264_nvenc", "-preset", "fast"]
-            else:
-                cmd += ["-c:v", "libx264", "-preset", quality, "-crf", "23"]
-
-            if has_audio:
-                cmd += ["-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k"]
-            else:
-                cmd += ["-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k"]
-
-            cmd.append(norm_out)
-
-            res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
-            if res.returncode != 0 and enable_gpu:
-                # GPU fallback to CPU
-                cmd_cpu = ["ffmpeg", "-y"]
-                if has_audio:
-                    cmd_cpu += ["-i", src]
-                else:
-                    cmd_cpu += ["-i", src, "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100", "-shortest"]
-
-                if filter_chain:
-                    cmd_cpu += ["-vf", ",".join(filter_chain)]
-
-                if fps > 0:
-                    cmd_cpu += ["-r", str(fps)]
-
-                cmd_cpu += ["-c:v", "libx264", "-preset", quality, "-crf", "23"]
-                if has_audio:
-                    cmd_cpu += ["-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k"]
-                else:
-                    cmd_cpu += ["-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "192k"]
-
-                cmd_cpu.append(norm_out)
-                res = subprocess.run(cmd_cpu, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
-
-            if res.returncode == 0 and os.path.exists(norm_out):
-                norm_clips.append(norm_out)
-            else:
-                norm_clips.append(src)
+                status_cb("LOG", f"  ├─ All {len(video_paths)} inputs share one format — stream copy, no re-encode")
+            norm_clips = list(video_paths)
+            if clip_done_cb:
+                for _ in video_paths:
+                    clip_done_cb()
+        else:
+            norm_clips = pool.map(_normalize, range(len(video_paths)))
+        if pool.cancelled:
+            return False, "cancelled"
 
         # Attempt Method 1: Concat Demuxer
         concat_txt = os.path.join(tmp_dir, "concat.txt")
@@ -196,10 +170,12 @@ def merge_video_list_robust(
                 f.write(f"file '{abs_p}'\n")
 
         cmd_concat = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_txt, "-c", "copy", "-avoid_negative_ts", "make_zero", output_path]
-        res = subprocess.run(cmd_concat, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+        ok, _ = pool.run(cmd_concat)
 
-        if res.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        if ok and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
             return True, ""
+        if pool.cancelled:
+            return False, "cancelled"
 
         # Attempt Method 2: Filter Complex Concat Fallback (Bulletproof)
         inputs_args = []
@@ -212,18 +188,20 @@ def merge_video_list_robust(
         vcodec = ["-c:v", "h264_nvenc", "-preset", "fast"] if enable_gpu else ["-c:v", "libx264", "-preset", quality]
         cmd_fallback = ["ffmpeg", "-y"] + inputs_args + ["-filter_complex", filter_complex_str, "-map", "[outv]", "-map", "[outa]"] + vcodec + ["-c:a", "aac", "-b:a", "192k", "-avoid_negative_ts", "make_zero", output_path]
 
-        res_fb = subprocess.run(cmd_fallback, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
-        if res_fb.returncode != 0 and enable_gpu:
+        ok, err = pool.run(cmd_fallback)
+        if not ok and enable_gpu and not pool.cancelled:
             vcodec_cpu = ["-c:v", "libx264", "-preset", quality]
             cmd_fallback_cpu = ["ffmpeg", "-y"] + inputs_args + ["-filter_complex", filter_complex_str, "-map", "[outv]", "-map", "[outa]"] + vcodec_cpu + ["-c:a", "aac", "-b:a", "192k", "-avoid_negative_ts", "make_zero", output_path]
-            res_fb = subprocess.run(cmd_fallback_cpu, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+            ok, err = pool.run(cmd_fallback_cpu)
 
-        if res_fb.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        if ok and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
             return True, ""
         else:
-            return False, res_fb.stderr
+            return False, err
 
     finally:
+        for path in pinned:
+            normalized_cache.release(path)
         shutil.rmtree(tmp_dir, ignore_errors=True)
 
 
@@ -244,32 +222,44 @@ async def transcribe_video(
     loop = asyncio.get_event_loop()
 
     def _transcribe():
+        cache_key = transcript_cache.make_key(
+            video_path, model=DEFAULT_MODEL_SIZE, language=language, word_timestamps=True,
+        )
+        cached = transcript_cache.get_words(cache_key)
+        if cached is not None:
+            return cached, True
+
         try:
-            from faster_whisper import WhisperModel
-            model = WhisperModel("base", device="cpu", compute_type="int8")
-            segments, _ = model.transcribe(video_path, word_timestamps=True, language=language)
-            words = []
-            for segment in segments:
-                if hasattr(segment, "words") and segment.words:
-                    for word in segment.words:
+            # Borrow the shared model the pool warms at startup; segments are consumed
+            # inside the block because faster-whisper decodes lazily while iterating.
+            with whisper_pool.acquire() as model:
+                segments, _ = model.transcribe(video_path, word_timestamps=True, language=language)
+                words = []
+                for segment in segments:
+                    if hasattr(segment, "words") and segment.words:
+                        for word in segment.words:
+                            words.append({
+                                "word": word.word.strip(),
+                                "start": word.start,
+                                "end": word.end,
+                            })
+                    else:
+                        # Fallback: treat whole segment as one word
                         words.append({
-                            "word": word.word.strip(),
-                            "start": word.start,
-                            "end": word.end,
+                            "word": segment.text.strip(),
+                            "start": segment.start,
+                            "end": segment.end,
                         })
-                else:
-                    # Fallback: treat whole segment as one word
-                    words.append({
-                        "word": segment.text.strip(),
-                        "start": segment.start,
-                        "end": segment.end,
-                    })
-            return words
         except ImportError:
-            return []  # faster_whisper not installed
+            return [], False  # faster_whisper not installed
+        transcript_cache.put_words(cache_key, words)
+        return words, False
 
-    words = await loop.run_in_executor(None, _transcribe)
-    await progress_cb("LOG", f"✅ Transcribed {len(words)} words", None)
+    words, from_cache = await loop.run_in_executor(None, _transcribe)
+    if from_cache:
+        await progress_cb("LOG", f"♻️ Reused cached transcript ({len(words)} words)", None)
+    else:
+        await progress_cb("LOG", f"✅ Transcribed {len(words)} words", None)
     return words
 
 
@@ -400,12 +390,12 @@ async def process_video(
     config: Dict[str, Any],
     progress_cb: ProgressCallback,
     stop_event: asyncio.Event,
-    _gpu_fallback: bool = False,
+    words: Optional[List[Dict]] = None,
 ) -> bool:
     """
     Apply FFmpeg processing pipeline to a single video:
     - Optional merge with extra video
-    - Add background music with optional ducking
+    - Add background music, ducked under the transcribed `words`
     - Burn in .ass subtitles
     - Quality/GPU settings
     Returns True on success.
@@ -413,60 +403,66 @@ async def process_video(
     success = False
     quality = config.get("quality_preset", "fast")
     music_volume = config.get("music_volume", 0.3)
-    enable_gpu = config.get("enable_gpu", True)
-    enable_ducking = config.get("enable_ducking", True)
+    caps = await asyncio.to_thread(encoder_registry.get)
+    enable_gpu = bool(config.get("enable_gpu", True)) and caps.gpu_available
+    enable_ducking = bool(config.get("enable_ducking", True))
 
     name = Path(input_path).name
     await progress_cb("STATUS", f"🎬 Starting pipeline for: {name}", None)
+    if config.get("enable_gpu", True) and not enable_gpu:
+        await progress_cb("LOG", "  ├─ No working NVENC encoder on this host — encoding on CPU", None)
     await progress_cb("LOG", f"  ├─ Quality preset : {quality}", None)
     await progress_cb("LOG", f"  ├─ GPU encoding   : {'Yes (h264_nvenc)' if enable_gpu else 'No  (libx264)'}", None)
     await progress_cb("LOG", f"  ├─ Music volume   : {music_volume}", None)
-    await progress_cb("LOG", f"  └─ Smart ducking  : {'enabled' if enable_ducking else 'disabled'}", None)
+    await progress_cb("LOG", f"  └─ Smart ducking  : {'enabled' if enable_ducking and words else 'disabled'}", None)
 
     loop = asyncio.get_event_loop()
 
-    # ── Async FFmpeg runner that streams stderr ──────────────────────────────
-    async def _run_streaming(cmd: List[str], label: str, timeout: int = 300) -> tuple[bool, str]:
-        """Run an ffmpeg command and stream stderr to the WebSocket."""
+    # ── Async FFmpeg runner with coalesced progress ──────────────────────────
+    async def _run_streaming(cmd: List[str], label: str, timeout: int = 300,
+                             duration: Optional[float] = None) -> tuple[bool, str]:
+        """
+        Run an ffmpeg command, parsing its -progress output into at most
+        FFMPEG_PROGRESS_HZ compact updates per second for the WebSocket.
+        """
         await progress_cb("LOG", f"▶ Running: {label}", None)
-        
+
         loop = asyncio.get_running_loop()
-        stderr_lines = []
+        progress = FFmpegProgressAggregator(
+            progress_cb, loop, label=label, duration=duration,
+            raw_log=bool(config.get("ffmpeg_raw_log", False)),
+            percent_events=True,
+        )
 
         def _sync_run():
             proc = subprocess.Popen(
-                cmd,
+                with_progress_args(cmd),
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 text=True,
                 encoding="utf-8",
                 errors="replace",
             )
-            
+
             try:
                 for line in iter(proc.stderr.readline, ''):
                     if stop_event.is_set():
                         proc.kill()
-                        asyncio.run_coroutine_threadsafe(progress_cb("STOPPED", "🛑 Processing stopped by user", None), loop)
+                        progress.post("STOPPED", "🛑 Processing stopped by user")
                         return False
-                        
-                    if not line:
-                        break
-                    line = line.rstrip()
-                    if line:
-                        stderr_lines.append(line)
-                        if any(kw in line for kw in ("frame=", "fps=", "size=", "time=", "speed=", "Error", "error", "Warning", "Invalid", "Cannot", "No such")):
-                            asyncio.run_coroutine_threadsafe(progress_cb("FFMPEG", line, None), loop)
-                
+                    progress.feed_line(line)
+
                 proc.wait(timeout=timeout)
                 return proc.returncode == 0
             except Exception as e:
                 proc.kill()
                 raise e
+            finally:
+                progress.finish()
 
         try:
             success = await asyncio.to_thread(_sync_run)
-            return success, "\n".join(stderr_lines)
+            return success, "\n".join(progress.raw_tail)
         except Exception as e:
             return False, f"FFmpeg process error: {str(e)}"
 
@@ -480,6 +476,7 @@ async def process_video(
 
     # ── Build temp dir (we keep it for the duration of the async pipeline) ───
     tmp_dir = tempfile.mkdtemp()
+    bed = None
     try:
         current_input = input_path
 
@@ -487,7 +484,8 @@ async def process_video(
         if extra_video and os.path.exists(extra_video):
             await progress_cb("STATUS", "🔗 Step 1/3 — Merging main video with extra video…", None)
             merged = os.path.join(tmp_dir, "merged.mp4")
-            ok, err = merge_video_list_robust(
+            ok, err = await asyncio.to_thread(
+                merge_video_list_robust,
                 video_paths=[current_input, extra_video],
                 output_path=merged,
                 enable_gpu=enable_gpu,
@@ -511,16 +509,24 @@ async def process_video(
 
         if background_music and os.path.exists(background_music):
             await progress_cb("LOG", "  ├─ Background music : enabled", None)
-            inputs += ["-i", background_music]
+            # Pre-rendered bed (decoded, resampled, volume applied) shared by every
+            # video that uses this track; the raw track is the fallback
+            bed = await asyncio.to_thread(music_beds.get, background_music, music_volume)
+            music_gain = 1.0 if bed else music_volume
+            # Streamed in a loop: the bed is never buffered, however short it is
+            inputs += loop_input_args(bed or background_music)
             music_idx = 1
-            if enable_ducking:
+            if enable_ducking and words:
+                # Music gain follows the word timestamps: one volume expression, no sidechain
+                curve = build_ducking_curve(words, music_gain)
                 filter_parts.append(
-                    f"[0:a]asplit=2[speech][sidechain];"
-                    f"[{music_idx}:a]volume={music_volume}[music_vol];"
-                    f"[music_vol][sidechain]sidechaincompress=threshold=0.003:ratio=20:attack=5:release=50[ducked_music];"
-                    f"[speech][ducked_music]amix=inputs=2:duration=first:dropout_transition=2[aout]"
+                    f"[{music_idx}:a]{curve.filter()}[ducked_music];"
+                    f"[0:a][ducked_music]amix=inputs=2:duration=first:dropout_transition=2[aout]"
                 )
-                await progress_cb("LOG", "  ├─ Audio ducking    : sidechaincompress-style", None)
+                await progress_cb("LOG", f"  ├─ Audio ducking    : {curve.summary()}", None)
+            elif bed:
+                # The bed already carries the volume and goes straight into the mix
+                filter_parts.append(f"[0:a][{music_idx}:a]amix=inputs=2:duration=first[aout]")
             else:
                 filter_parts.append(
                     f"[{music_idx}:a]volume={music_volume}[music_vol];"
@@ -530,7 +536,10 @@ async def process_video(
         else:
             await progress_cb("LOG", "  ├─ Background music : none", None)
 
-        if ass_path and os.path.exists(ass_path):
+        audio_filter = ";".join(filter_parts) if filter_parts else None
+        burn_ass = ass_path if ass_path and os.path.exists(ass_path) else None
+
+        if burn_ass:
             safe_path = str(ass_path).replace("\\", "/").replace(":", "\\:")
             filter_parts.append(f"{video_label}ass='{safe_path}'[vout]")
             video_label = "[vout]"
@@ -538,28 +547,74 @@ async def process_video(
         else:
             await progress_cb("LOG", "  └─ Subtitles        : none (no words transcribed)", None)
 
-        if enable_gpu:
-            vcodec = ["-c:v", "h264_nvenc", "-preset", "fast"]
-        else:
-            vcodec = ["-c:v", "libx264", "-preset", quality, "-crf", "23"]
+        def _build_cmd(use_gpu: bool) -> List[str]:
+            if use_gpu:
+                vcodec = ["-c:v", "h264_nvenc", "-preset", "fast"]
+            else:
+                vcodec = ["-c:v", "libx264", "-preset", quality, "-crf", "23"]
 
-        cmd = ["ffmpeg", "-y"] + inputs
-        if filter_parts:
-            cmd += ["-filter_complex", ";".join(filter_parts)]
-            cmd += ["-map", video_label if video_label != "[0:v]" else "0:v"]
-            cmd += ["-map", audio_label if audio_label != "[0:a]" else "0:a"]
-        else:
-            cmd += ["-map", "0:v", "-map", "0:a"]
-        cmd += vcodec + ["-c:a", "aac", "-b:a", "192k", output_path]
+            cmd = ["ffmpeg", "-y"] + inputs
+            if filter_parts:
+                cmd += ["-filter_complex", ";".join(filter_parts)]
+                cmd += ["-map", video_label if video_label != "[0:v]" else "0:v"]
+                cmd += ["-map", audio_label if audio_label != "[0:a]" else "0:a"]
+            else:
+                cmd += ["-map", "0:v", "-map", "0:a"]
+            return cmd + vcodec + ["-c:a", "aac", "-b:a", "192k", output_path]
 
         # Step 3: Encode
+        cmd = _build_cmd(enable_gpu)
         encoder_name = "h264_nvenc (GPU)" if enable_gpu else f"libx264 (CPU, {quality})"
         await progress_cb("STATUS", f"🎞️ Step 3/3 — Encoding with {encoder_name}…", None)
         await progress_cb("LOG", f"  FFmpeg cmd: {' '.join(cmd[:6])} … [{len(cmd)} args total]", None)
 
-        success, stderr = await _run_streaming(cmd, f"encode → {Path(output_path).name}")
+        duration = await asyncio.to_thread(get_video_duration, current_input)
+        success = False
+        segments = int(config.get("render_segments", 0))
+        if not enable_gpu and segments != 1 and duration >= MIN_SEGMENTED_SECONDS:
+            # Long CPU encode: render keyframe-aligned ranges in parallel instead
+            def _segment_video_cmd(seg: Segment) -> List[str]:
+                vf = ["-vf", ",".join(f"ass='{escape_filter_path(p)}'" for p in seg.ass_paths)] if seg.ass_paths else []
+                return (["ffmpeg", "-y"] + seg.input_args(current_input) + vf +
+                        ["-an", "-c:v", "libx264", "-preset", quality, "-crf", "23",
+                         "-threads", str(seg.threads), seg.output])
+
+            def _segment_audio_cmd(path: str) -> List[str]:
+                audio_map = ["-filter_complex", audio_filter, "-map", audio_label] if audio_filter else ["-map", "0:a"]
+                return ["ffmpeg", "-y"] + inputs + audio_map + ["-vn", "-c:a", "aac", "-b:a", "192k", path]
+
+            seg_pool = FFmpegPool(workers=MAX_SEGMENTS + 1, enable_gpu=False)
+            seg_watch = asyncio.create_task(seg_pool.cancel_on(stop_event))
+            seg_relay = FFmpegProgressAggregator(progress_cb, loop)
+            try:
+                has_audio = await asyncio.to_thread(has_audio_stream, current_input)
+                success, err = await asyncio.to_thread(
+                    render_segmented, current_input, output_path,
+                    _segment_video_cmd, _segment_audio_cmd if has_audio else None,
+                    [burn_ass] if burn_ass else None, segments, seg_pool.run, seg_relay.status_cb(),
+                )
+            finally:
+                seg_watch.cancel()
+                seg_relay.finish()
+            if stop_event.is_set():
+                await progress_cb("STOPPED", "🛑 Processing stopped by user", None)
+                return False
+            if not success:
+                await progress_cb("WARN", f"⚠️ Segmented render unavailable ({err}); encoding in one pass", None)
+
+        if not success:
+            success, stderr = await _run_streaming(cmd, f"encode → {Path(output_path).name}", duration=duration)
+
+        if not success and enable_gpu and not stop_event.is_set():
+            # NVENC passed detection but failed here: re-run only the encode, on CPU
+            encoder_registry.mark_failed("h264_nvenc")
+            await progress_cb("WARN", "⚠️ GPU encode failed, retrying with CPU…", None)
+            success, stderr = await _run_streaming(
+                _build_cmd(False), f"encode (CPU) → {Path(output_path).name}", duration=duration,
+            )
 
     finally:
+        music_beds.release(bed)
         # Clean up temp dir
         try:
             import shutil as _sh
@@ -569,19 +624,8 @@ async def process_video(
 
     if success:
         await progress_cb("LOG", f"✅ Processed: {Path(output_path).name}", None)
-    else:
-        if _gpu_fallback:
-            await progress_cb("LOG", f"❌ CPU encode also failed: {Path(input_path).name}", None)
-        else:
-            await progress_cb("WARN", f"⚠️ GPU encode failed, retrying with CPU…", None)
-            config_cpu = dict(config)
-            config_cpu["enable_gpu"] = False
-            return await process_video(
-                input_path, output_path, extra_video,
-                background_music, ass_path, config_cpu, progress_cb,
-                stop_event,
-                _gpu_fallback=True,
-            )
+    elif not stop_event.is_set():
+        await progress_cb("LOG", f"❌ Encode failed: {Path(input_path).name}", None)
 
     return success
 
@@ -602,78 +646,148 @@ async def process_all_videos(
 ) -> List[str]:
     """
     Process all input videos and return list of output file paths.
+
+    Videos flow through a two-stage pipeline: a transcription stage
+    (Whisper + .ass generation) and an encode stage (FFmpeg). Each stage has
+    its own worker limit (`transcribe_workers` / `encode_workers` in config),
+    so video N+1 is transcribed while video N is being encoded. Output paths
+    are returned in input order.
     """
     os.makedirs(output_dir, exist_ok=True)
-    output_files = []
     total = len(input_videos)
+    transcribe_workers = max(1, int(config.get("transcribe_workers", 1)))
+    encode_workers = max(1, int(config.get("encode_workers", 2)))
+    transcribe_sem = asyncio.Semaphore(transcribe_workers)
+    encode_sem = asyncio.Semaphore(encode_workers)
+    edited_transcripts = config.get("edited_transcripts") or {}
+
+    results: List[Optional[str]] = [None] * total
+    # Per-video completion (0..1); the job's progress is their mean
+    video_progress = [0.0] * total
+    failed: List[str] = []
+    stop_reported = False
 
     await progress_cb("STATUS", f"📋 Job started — {total} video(s) to process", 0.0)
+    await progress_cb(
+        "LOG",
+        f"  └─ Pipeline workers : {transcribe_workers} transcription / {encode_workers} encode",
+        None,
+    )
 
-    for i, video_path in enumerate(input_videos):
-        if stop_event.is_set():
+    async def _report_stop():
+        nonlocal stop_reported
+        if not stop_reported:
+            stop_reported = True
             await progress_cb("STOPPED", "🛑 Processing stopped by user", None)
-            break
 
-        pct = round((i / total) * 100, 1)
-        name = Path(video_path).name
-        size_mb = os.path.getsize(video_path) / (1024 * 1024) if os.path.exists(video_path) else 0
-        duration = get_video_duration(video_path)
+    def _overall() -> float:
+        return round(sum(video_progress) / total * 100, 1)
 
-        await progress_cb("STATUS", f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", pct)
-        await progress_cb("STATUS", f"📹 Video {i + 1}/{total}: {name}", pct)
-        await progress_cb("LOG",    f"  ├─ File size : {size_mb:.1f} MB", None)
-        await progress_cb("LOG",    f"  └─ Duration  : {duration:.1f}s", None)
+    async def _video_failed(name: str, reason: str = ""):
+        # Not ERROR: that is terminal and would end the job while other videos still run
+        failed.append(name)
+        await progress_cb("WARN", f"❌ Failed to process: {name}{f' ({reason})' if reason else ''}", None)
 
-        base_name = Path(video_path).stem
-        output_path = os.path.join(output_dir, f"{base_name}_processed.mp4")
+    async def _run_one(i: int, video_path: str):
+        name = Path(video_path).name
+        tag = f"[{i + 1}/{total}]"
+
+        async def video_cb(msg_type: str, message: str, progress: Optional[float]):
+            # Prefix per-video output so interleaved pipeline logs stay readable
+            if msg_type == "PROGRESS" and progress is not None:
+                # This video's own 0-100 becomes its share of the job's progress
+                video_progress[i] = max(video_progress[i], min(progress, 100.0) / 100.0)
+                progress = _overall()
+            await progress_cb(msg_type, f"{tag} {message}", progress)
 
-        # Transcribe or use provided edited transcript
-        words = []
         ass_path = None
-        
-        edited_transcripts = config.get("edited_transcripts", {})
-        
-        if name in edited_transcripts:
-            await progress_cb("STATUS", f"🎙️ Using provided edited transcript for {name}…", None)
-            words = edited_transcripts[name]
-        elif subtitle_settings.get("mode") in ("single", "multiple", "mixed"):
-            await progress_cb("STATUS", f"🎙️ Transcribing audio with Whisper…", None)
-            words = await transcribe_video(video_path, progress_cb, language)
-        else:
-            await progress_cb("LOG", "  ⏭ Skipping transcription (subtitle mode: none)", None)
-
-        # Generate subtitles
-        if words:
-            await progress_cb("STATUS", f"📝 Generating {subtitle_settings.get('mode','mixed')} subtitles…", None)
-            with tempfile.NamedTemporaryFile(suffix=".ass", delete=False, mode="w") as tmp_ass:
-                ass_path = tmp_ass.name
-            generate_ass_subtitles(words, subtitle_settings, ass_path)
-            await progress_cb("LOG", f"  ✅ Subtitles: {len(words)} words → {subtitle_settings.get('mode','mixed')} mode", None)
-        else:
-            await progress_cb("LOG", "  ℹ️ No words found — subtitles skipped", None)
+        try:
+            # ── Stage 1: transcription ──
+            async with transcribe_sem:
+                if stop_event.is_set():
+                    await _report_stop()
+                    return
+
+                size_mb = os.path.getsize(video_path) / (1024 * 1024) if os.path.exists(video_path) else 0
+                duration = await asyncio.to_thread(get_video_duration, video_path)
+
+                await progress_cb("STATUS", f"📹 Video {i + 1}/{total}: {name}", None)
+                await video_cb("LOG", f"  ├─ File size : {size_mb:.1f} MB", None)
+                await video_cb("LOG", f"  └─ Duration  : {duration:.1f}s", None)
+
+                words = []
+                if name in edited_transcripts:
+                    await video_cb("STATUS", f"🎙️ Using provided edited transcript for {name}…", None)
+                    words = edited_transcripts[name]
+                elif subtitle_settings.get("mode") in ("single", "multiple", "mixed"):
+                    await video_cb("STATUS", f"🎙️ Transcribing audio with Whisper…", None)
+                    words = await transcribe_video(video_path, video_cb, language)
+                else:
+                    await video_cb("LOG", "  ⏭ Skipping transcription (subtitle mode: none)", None)
+
+                if words:
+                    await video_cb("STATUS", f"📝 Generating {subtitle_settings.get('mode','mixed')} subtitles…", None)
+                    with tempfile.NamedTemporaryFile(suffix=".ass", delete=False, mode="w") as tmp_ass:
+                        ass_path = tmp_ass.name
+                    generate_ass_subtitles(words, subtitle_settings, ass_path)
+                    await video_cb("LOG", f"  ✅ Subtitles: {len(words)} words → {subtitle_settings.get('mode','mixed')} mode", None)
+                else:
+                    await video_cb("LOG", "  ℹ️ No words found — subtitles skipped", None)
+
+            # ── Stage 2: encode ──
+            async with encode_sem:
+                if stop_event.is_set():
+                    await _report_stop()
+                    return
+
+                output_path = os.path.join(output_dir, f"{Path(video_path).stem}_processed.mp4")
+                success = await process_video(
+                    video_path, output_path, extra_video,
+                    background_music, ass_path, config, video_cb, stop_event, words=words,
+                )
 
-        # Process video
-        success = await process_video(
-            video_path, output_path, extra_video,
-            background_music, ass_path, config, progress_cb, stop_event
-        )
+            if success and os.path.exists(output_path):
+                results[i] = output_path
+                out_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                await video_cb("LOG", f"💾 Output saved: {Path(output_path).name} ({out_size_mb:.1f} MB)", None)
+            elif stop_event.is_set():
+                await _report_stop()
+            else:
+                await _video_failed(name)
 
-        # Cleanup temp ass file
-        if ass_path and os.path.exists(ass_path):
-            os.remove(ass_path)
+        finally:
+            # Cleanup temp ass file
+            if ass_path and os.path.exists(ass_path):
+                os.remove(ass_path)
 
-        if success and os.path.exists(output_path):
-            output_files.append(output_path)
-            out_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-            await progress_cb("LOG", f"💾 Output saved: {Path(output_path).name} ({out_size_mb:.1f} MB)", None)
-        else:
-            await progress_cb("ERROR", f"❌ Failed to process: {name}", None)
+            video_progress[i] = 1.0
+            overall = _overall()
+            await progress_cb("PROGRESS", f"{overall}", overall)
 
-        overall = round(((i + 1) / total) * 100, 1)
-        await progress_cb("PROGRESS", f"{overall}", overall)
+    tasks = [asyncio.create_task(_run_one(i, path)) for i, path in enumerate(input_videos)]
+    try:
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    except asyncio.CancelledError:
+        stop_event.set()
+        for task in tasks:
+            task.cancel()
+        raise
+
+    for i, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("Video %s failed: %s", input_videos[i], outcome)
+            await _video_failed(Path(input_videos[i]).name, str(outcome))
+
+    outputs = [path for path in results if path]
+    # The caller sends the job's one terminal event; fail it only when nothing came out
+    if failed and not outputs and not stop_event.is_set():
+        raise RuntimeError(f"All {total} video(s) failed: {', '.join(failed)}")
+    if failed:
+        await progress_cb("WARN", f"⚠️ {len(failed)} of {total} video(s) failed: {', '.join(failed)}", None)
 
     await progress_cb("STATUS", f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 100.0)
-    return output_files
+    return outputs
+
 
 
 # ─────────────────────────── Section Video Merger ───────────────────────────
@@ -701,7 +815,7 @@ async def merge_sections_videos(
     resolution_mode = config.get("resolution", "1080p")
     fps_setting = int(config.get("fps", 30))
     quality = config.get("quality_preset", "fast")
-    enable_gpu = config.get("enable_gpu", True)
+    enable_gpu = await asyncio.to_thread(encoder_registry.resolve_gpu, config.get("enable_gpu", True))
     music_volume = float(config.get("music_volume", 0.30))
 
     # Resolution dimensions
@@ -718,26 +832,39 @@ async def merge_sections_videos(
     await progress_cb("LOG", f"  ├─ Resolution      : {resolution_mode}", None)
     await progress_cb("LOG", f"  ├─ Frame Rate      : {fps_setting if fps_setting > 0 else 'Source'} FPS", None)
     await progress_cb("LOG", f"  ├─ GPU Encoder     : {'NVENC' if enable_gpu else 'CPU (libx264)'}", None)
-    await progress_cb("LOG", f"  └─ Music Track     : {'Included' if background_music else 'None'}", None)
+    await progress_cb("LOG", f"  ├─ Music Track     : {'Included' if background_music else 'None'}", None)
 
     loop = asyncio.get_running_loop()
+    # Messages from merge worker threads are batched onto the loop
+    status_relay = FFmpegProgressAggregator(progress_cb, loop)
 
     def make_status_cb():
-        def _cb(mtype: str, msg: str):
-            asyncio.run_coroutine_threadsafe(progress_cb(mtype, msg, None), loop)
-        return _cb
+        return status_relay.status_cb()
+
+    # One bounded pool for every ffmpeg run of this job; stop_event kills what is in flight
+    pool = FFmpegPool(workers=config.get("merge_workers") or None, enable_gpu=enable_gpu)
+    stop_watch = asyncio.create_task(pool.cancel_on(stop_event))
+    await progress_cb("LOG", f"  └─ FFmpeg workers  : {pool.workers}", None)
+
+    total_clips = sum(len(sec.get("file_indices", [])) for sec in sections) or 1
+    clips_done = 0
+    clips_lock = threading.Lock()
+
+    def _clip_done():
+        # Step 1 spans 20% → 70% of the job, advanced per clip
+        nonlocal clips_done
+        with clips_lock:
+            clips_done += 1
+            prog = round(20.0 + min(clips_done / total_clips, 1.0) * 50.0, 1)
+        status_relay.post("PROGRESS", f"{prog}", prog)
 
     tmp_dir = tempfile.mkdtemp()
     try:
-        # Step 1: Concat per Section
+        # Step 1: Concat per Section (independent sections merge in parallel)
         await progress_cb("STATUS", "🎬 Step 1/3 — Merging clips section by section…", 20.0)
-        section_output_paths: List[Dict[str, str]] = []
-
-        for sec_idx, sec in enumerate(sections):
-            if stop_event.is_set():
-                await progress_cb("STOPPED", "🛑 Job stopped by user", None)
-                return []
+        section_sem = asyncio.Semaphore(pool.workers)
 
+        async def _merge_section(sec_idx: int, sec: Dict[str, Any]) -> Optional[Dict[str, str]]:
             sec_title = sec.get("title", f"Section_{sec_idx + 1}")
             safe_title = "".join([c if c.isalnum() or c in (" ", "_", "-") else "_" for c in sec_title]).strip().replace(" ", "_")
             if not safe_title:
@@ -746,42 +873,45 @@ async def merge_sections_videos(
             clip_indices = sec.get("file_indices", [])
             sec_clip_paths = [uploaded_file_paths[idx] for idx in clip_indices if idx < len(uploaded_file_paths)]
 
-            await progress_cb("LOG", f"  📂 Merging Section {sec_idx + 1}/{len(sections)}: '{sec_title}' ({len(sec_clip_paths)} clips)", None)
-
             if not sec_clip_paths:
                 await progress_cb("WARN", f"  ⚠️ Section '{sec_title}' has no valid clips, skipping", None)
-                continue
-
-            section_raw_mp4 = os.path.join(tmp_dir, f"section_{sec_idx}_raw.mp4")
-
-            cur_cb = make_status_cb()
-            cur_paths = list(sec_clip_paths)
-            cur_out = str(section_raw_mp4)
-            ok, err = await loop.run_in_executor(
-                None,
-                lambda: merge_video_list_robust(
-                    video_paths=cur_paths,
-                    output_path=cur_out,
+                return None
+
+            async with section_sem:
+                if stop_event.is_set():
+                    return None
+                await progress_cb("LOG", f"  📂 Merging Section {sec_idx + 1}/{len(sections)}: '{sec_title}' ({len(sec_clip_paths)} clips)", None)
+
+                section_raw_mp4 = os.path.join(tmp_dir, f"section_{sec_idx}_raw.mp4")
+                ok, err = await asyncio.to_thread(
+                    merge_video_list_robust,
+                    video_paths=sec_clip_paths,
+                    output_path=section_raw_mp4,
                     target_res=target_res,
                     fps=fps_setting,
                     enable_gpu=enable_gpu,
                     quality=quality,
-                    status_cb=cur_cb,
+                    status_cb=make_status_cb(),
+                    pool=pool,
+                    clip_done_cb=_clip_done,
                 )
-            )
 
+            if stop_event.is_set():
+                return None
             if ok and os.path.exists(section_raw_mp4):
-                section_output_paths.append({
-                    "title": sec_title,
-                    "safe_title": safe_title,
-                    "path": section_raw_mp4,
-                })
                 await progress_cb("LOG", f"  ✅ Section '{sec_title}' merged successfully", None)
-            else:
-                await progress_cb("WARN", f"  ⚠️ Section '{sec_title}' merge failed: {err}", None)
+                return {"title": sec_title, "safe_title": safe_title, "path": section_raw_mp4}
+            await progress_cb("WARN", f"  ⚠️ Section '{sec_title}' merge failed: {err}", None)
+            return None
 
-            prog = round(20.0 + ((sec_idx + 1) / len(sections)) * 50.0, 1)
-            await progress_cb("PROGRESS", f"{prog}", prog)
+        merged = await asyncio.gather(*(_merge_section(i, sec) for i, sec in enumerate(sections)))
+        status_relay.finish()
+        if stop_event.is_set():
+            await progress_cb("STOPPED", "🛑 Job stopped by user", None)
+            return []
+        # Gathered in section order, whatever order they finished in
+        section_output_paths: List[Dict[str, str]] = [m for m in merged if m]
+        await progress_cb("PROGRESS", "70.0", 70.0)
 
         # Step 2: Concat Master Video (if output_mode is 'master' or 'both')
         master_raw_mp4 = None
@@ -790,22 +920,21 @@ async def merge_sections_videos(
             master_raw_mp4 = os.path.join(tmp_dir, "master_raw.mp4")
 
             master_inputs = [s["path"] for s in section_output_paths]
-            cur_cb = make_status_cb()
-            cur_m_inputs = list(master_inputs)
-            cur_m_out = str(master_raw_mp4)
-            ok, err = await loop.run_in_executor(
-                None,
-                lambda: merge_video_list_robust(
-                    video_paths=cur_m_inputs,
-                    output_path=cur_m_out,
-                    target_res=target_res,
-                    fps=fps_setting,
-                    enable_gpu=enable_gpu,
-                    quality=quality,
-                    status_cb=cur_cb,
-                )
+            ok, err = await asyncio.to_thread(
+                merge_video_list_robust,
+                video_paths=master_inputs,
+                output_path=master_raw_mp4,
+                target_res=target_res,
+                fps=fps_setting,
+                enable_gpu=enable_gpu,
+                quality=quality,
+                status_cb=make_status_cb(),
+                pool=pool,
             )
 
+            if stop_event.is_set():
+                await progress_cb("STOPPED", "🛑 Job stopped by user", None)
+                return []
             if ok and os.path.exists(master_raw_mp4):
                 await progress_cb("LOG", "  ✅ Master composite video rendered successfully", None)
             else:
@@ -814,44 +943,62 @@ async def merge_sections_videos(
         # Step 3: Music Overlay & Final Output Copy
         await progress_cb("STATUS", "🎵 Step 3/3 — Finalizing outputs and audio mix…", 90.0)
 
+        # Every output of the job mixes the same bed: render it once up front
+        bed = None
+        if background_music and os.path.exists(background_music):
+            bed = await asyncio.to_thread(music_beds.get, background_music, music_volume, runner=pool.run)
+
         def _finalize_video(in_video_path: str, out_filename: str):
+            """Final path of one output and whether its music mix failed."""
+            # Video is only ever stream-copied here: music is an audio-only re-encode
             final_out_path = os.path.join(output_dir, out_filename)
+            mix_failed = False
             if background_music and os.path.exists(background_music):
-                cmd = ["ffmpeg", "-y", "-i", in_video_path, "-i", background_music,
-                       "-filter_complex", f"[1:a]volume={music_volume}[m];[0:a][m]amix=inputs=2:duration=first[aout]",
+                mix = ("[0:a][1:a]amix=inputs=2:duration=first[aout]" if bed
+                       else f"[1:a]volume={music_volume}[m];[0:a][m]amix=inputs=2:duration=first[aout]")
+                cmd = ["ffmpeg", "-y", "-i", in_video_path] + loop_input_args(bed or background_music) + [
+                       "-filter_complex", mix,
                        "-map", "0:v", "-map", "[aout]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", final_out_path]
-                res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
-                if res.returncode != 0:
-                    shutil.copyfile(in_video_path, final_out_path)
-            else:
-                shutil.copyfile(in_video_path, final_out_path)
-            return final_out_path
-
+                ok, _ = pool.run(cmd)
+                if ok or pool.cancelled:
+                    return final_out_path, False
+                mix_failed = True
+            # Intermediates live in tmp_dir and are not read again: move rather than copy
+            shutil.move(in_video_path, final_out_path)
+            return final_out_path, mix_failed
+
+        finals = []
         # Export Section Outputs if output_mode in ['sections', 'both']
         if output_mode in ("sections", "both"):
             for s_idx, s_item in enumerate(section_output_paths):
                 fname = f"Section_{s_idx + 1:02d}_{s_item['safe_title']}.mp4"
-                in_p = s_item["path"]
-                res_path = await loop.run_in_executor(None, lambda: _finalize_video(in_p, fname))
-                if os.path.exists(res_path):
-                    output_files.append(res_path)
-                    sz = os.path.getsize(res_path) / (1024 * 1024)
-                    await progress_cb("LOG", f"  💾 Saved Section Output: {fname} ({sz:.1f} MB)", None)
+                finals.append((s_item["path"], fname, "  💾 Saved Section Output"))
 
         # Export Master Output if output_mode in ['master', 'both']
         if output_mode in ("master", "both") and master_raw_mp4 and os.path.exists(master_raw_mp4):
-            fname = "Master_Full_Merged_Video.mp4"
-            in_p = master_raw_mp4
-            res_path = await loop.run_in_executor(None, lambda: _finalize_video(in_p, fname))
+            finals.append((master_raw_mp4, "Master_Full_Merged_Video.mp4", "  🌟 Saved Master Video"))
+
+        try:
+            results = await asyncio.gather(*(asyncio.to_thread(_finalize_video, in_p, fname) for in_p, fname, _ in finals))
+        finally:
+            # The bed stays pinned until the last mix has read it
+            music_beds.release(bed)
+        if stop_event.is_set():
+            await progress_cb("STOPPED", "🛑 Job stopped by user", None)
+            return []
+        for (res_path, mix_failed), (_, fname, label) in zip(results, finals):
+            if mix_failed:
+                await progress_cb("WARN", f"⚠️ Music mix failed for {fname}; saved without background music", None)
             if os.path.exists(res_path):
                 output_files.append(res_path)
                 sz = os.path.getsize(res_path) / (1024 * 1024)
-                await progress_cb("LOG", f"  🌟 Saved Master Video: {fname} ({sz:.1f} MB)", None)
+                await progress_cb("LOG", f"{label}: {fname} ({sz:.1f} MB)", None)
 
         await progress_cb("PROGRESS", "100.0", 100.0)
         return output_files
 
     finally:
+        stop_watch.cancel()
         shutil.rmtree(tmp_dir, ignore_errors=True)
 
 
@@ -0,0 +1,208 @@
+"""
+Whisper Model Pool
+Process-wide pool of faster-whisper models shared by every transcription call.
+Models are keyed by (size, device, compute_type), loaded lazily (or warmed at
+startup), capped per key, and evicted after sitting idle.
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, str]
+
+# ─────────────────────────── Defaults ───────────────────────────
+
+DEFAULT_MODEL_SIZE = os.environ.get("WHISPER_MODEL_SIZE", "base")
+DEFAULT_DEVICE = os.environ.get("WHISPER_DEVICE", "cpu")
+DEFAULT_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+MAX_INSTANCES_PER_KEY = int(os.environ.get("WHISPER_POOL_MAX_INSTANCES", "2"))
+IDLE_TTL_SECONDS = float(os.environ.get("WHISPER_POOL_IDLE_TTL", "600"))
+
+
+def _load_model(key: ModelKey):
+    """Construct a WhisperModel for the given key (blocking)."""
+    from faster_whisper import WhisperModel
+    size, device, compute_type = key
+    return WhisperModel(size, device=device, compute_type=compute_type)
+
+
+# ─────────────────────────── Pool ───────────────────────────
+
+class _KeyState:
+    """Bookkeeping for all instances of one (size, device, compute_type)."""
+
+    def __init__(self):
+        self.idle: List[Tuple[Any, float]] = []   # (model, last_used)
+        self.total = 0                            # idle + in use + loading
+        self.in_use = 0
+
+
+class WhisperModelPool:
+    """
+    Thread-safe pool of WhisperModel instances.
+
+    `acquire()` hands out an idle instance when one exists (a hit), loads a new
+    one while the key is below `max_instances`, and otherwise blocks until an
+    instance is released. Callers run inside executor threads, so the pool is
+    built on `threading` primitives rather than asyncio.
+    """
+
+    def __init__(self, max_instances: int = MAX_INSTANCES_PER_KEY, idle_ttl: float = IDLE_TTL_SECONDS):
+        self.max_instances = max(1, max_instances)
+        self.idle_ttl = idle_ttl
+        self._cond = threading.Condition()
+        self._keys: Dict[ModelKey, _KeyState] = {}
+        self._warm_keys: set = set()
+        self._metrics = {
+            "hits": 0,
+            "loads": 0,
+            "load_failures": 0,
+            "evictions": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "load_seconds_total": 0.0,
+        }
+
+    def _state(self, key: ModelKey) -> _KeyState:
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState()
+        return state
+
+    def _checkout(self, key: ModelKey):
+        """Take an idle instance or reserve a slot and load one outside the lock."""
+        waited_from = None
+        with self._cond:
+            state = self._state(key)
+            while True:
+                if state.idle:
+                    model, _ = state.idle.pop()
+                    state.in_use += 1
+                    self._metrics["hits"] += 1
+                    break
+                if state.total < self.max_instances:
+                    state.total += 1
+                    state.in_use += 1
+                    model = None
+                    break
+                if waited_from is None:
+                    waited_from = time.monotonic()
+                    self._metrics["waits"] += 1
+                self._cond.wait()
+
+            if waited_from is not None:
+                waited = time.monotonic() - waited_from
+                self._metrics["wait_seconds_total"] += waited
+                self._metrics["wait_seconds_max"] = max(self._metrics["wait_seconds_max"], waited)
+
+        if model is not None:
+            return model
+
+        started = time.monotonic()
+        try:
+            model = _load_model(key)
+        except BaseException:
+            with self._cond:
+                state.total -= 1
+                state.in_use -= 1
+                self._metrics["load_failures"] += 1
+                self._cond.notify()
+            raise
+        elapsed = time.monotonic() - started
+        with self._cond:
+            self._metrics["loads"] += 1
+            self._metrics["load_seconds_total"] += elapsed
+        logger.info("Loaded Whisper model %s in %.1fs", key, elapsed)
+        return model
+
+    def _checkin(self, key: ModelKey, model) -> None:
+        with self._cond:
+            state = self._state(key)
+            state.in_use -= 1
+            state.idle.append((model, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def acquire(
+        self,
+        size: str = DEFAULT_MODEL_SIZE,
+        device: str = DEFAULT_DEVICE,
+        compute_type: str = DEFAULT_COMPUTE_TYPE,
+    ):
+        """Borrow a model for the duration of the `with` block."""
+        key = (size, device, compute_type)
+        model = self._checkout(key)
+        try:
+            yield model
+        finally:
+            self._checkin(key, model)
+
+    def warm(
+        self,
+        size: str = DEFAULT_MODEL_SIZE,
+        device: str = DEFAULT_DEVICE,
+        compute_type: str = DEFAULT_COMPUTE_TYPE,
+    ) -> None:
+        """Load one instance up front; warmed keys always keep one idle instance."""
+        key = (size, device, compute_type)
+        with self._cond:
+            self._warm_keys.add(key)
+        with self.acquire(*key):
+            pass
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop instances idle for longer than `idle_ttl`. Returns count evicted."""
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        with self._cond:
+            for key, state in self._keys.items():
+                keep_min = 1 if key in self._warm_keys else 0
+                fresh = []
+                # Oldest first, so the most recently used instance survives
+                for model, last_used in sorted(state.idle, key=lambda item: item[1]):
+                    if now - last_used > self.idle_ttl and state.total > keep_min:
+                        state.total -= 1
+                        evicted += 1
+                        self._metrics["evictions"] += 1
+                    else:
+                        fresh.append((model, last_used))
+                state.idle = fresh
+        if evicted:
+            logger.info("Evicted %d idle Whisper model(s)", evicted)
+        return evicted
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of pool counters and per-key instance usage."""
+        with self._cond:
+            snapshot = dict(self._metrics)
+            requests = snapshot["hits"] + snapshot["loads"]
+            snapshot["hit_rate"] = round(snapshot["hits"] / requests, 3) if requests else 0.0
+            snapshot["wait_seconds_total"] = round(snapshot["wait_seconds_total"], 3)
+            snapshot["wait_seconds_max"] = round(snapshot["wait_seconds_max"], 3)
+            snapshot["load_seconds_total"] = round(snapshot["load_seconds_total"], 3)
+            snapshot["max_instances_per_key"] = self.max_instances
+            snapshot["idle_ttl_seconds"] = self.idle_ttl
+            snapshot["models"] = [
+                {
+                    "size": key[0],
+                    "device": key[1],
+                    "compute_type": key[2],
+                    "instances": state.total,
+                    "in_use": state.in_use,
+                    "idle": len(state.idle),
+                    "warm": key in self._warm_keys,
+                }
+                for key, state in self._keys.items()
+            ]
+        return snapshot
+
+
+# Shared process-wide instance
+whisper_pool = WhisperModelPool()
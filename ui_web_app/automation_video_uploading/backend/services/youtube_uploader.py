@@ -14,11 +14,15 @@ from typing import Optional, List, Callable, Awaitable
 import pytz
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 
 from models.schemas import CATEGORY_MAP, VideoUploadRequest
+from services.resumable_upload import ResumableUpload, ResumableUploadError, state_path_for, DEFAULT_CHUNK_SIZE
+from services.playlist_index import get_playlist_index
+from services.upload_scheduler import TokenBucket, ThroughputMeter, is_throttle_error, UPLOAD_CONCURRENCY
 
 SCOPES = [
     "https://www.googleapis.com/auth/youtube.upload",
@@ -164,32 +168,15 @@ def convert_ist_to_utc(ist_time_str: str) -> Optional[str]:
 
 # ─────────────────────────── Playlist Helpers ───────────────────────────
 
-def get_playlist_id(youtube, playlist_name: str) -> Optional[str]:
+def get_playlist_id(youtube, playlist_name: str, channel_key: Optional[str] = None) -> Optional[str]:
     """Get playlist ID by name; create if it doesn't exist."""
     try:
-        response = youtube.playlists().list(part="snippet", mine=True, maxResults=50).execute()
-        for playlist in response.get("items", []):
-            if playlist["snippet"]["title"] == playlist_name:
-                return playlist["id"]
-
-        # Create new playlist
-        created = youtube.playlists().insert(
-            part="snippet,status",
-            body={
-                "snippet": {
-                    "title": playlist_name,
-                    "description": f"Playlist for {playlist_name}",
-                    "defaultLanguage": "en",
-                },
-                "status": {"privacyStatus": "public"},
-            },
-        ).execute()
-        return created["id"]
+        return get_playlist_index(youtube, channel_key).resolve(youtube, playlist_name)
     except Exception:
         return None
 
 
-def add_video_to_playlist(youtube, video_id: str, playlist_id: str) -> None:
+def add_video_to_playlist(youtube, video_id: str, playlist_id: str, channel_key: Optional[str] = None) -> None:
     """Add a video to a playlist."""
     youtube.playlistItems().insert(
         part="snippet",
@@ -200,32 +187,24 @@ def add_video_to_playlist(youtube, video_id: str, playlist_id: str) -> None:
             }
         },
     ).execute()
+    get_playlist_index(youtube, channel_key).note_item_added(playlist_id)
 
 
-def add_video_to_multiple_playlists(youtube, video_id: str, playlist_names: List[str]) -> None:
+def add_video_to_multiple_playlists(
+    youtube, video_id: str, playlist_names: List[str], channel_key: Optional[str] = None
+) -> None:
     for name in playlist_names:
         if not isinstance(name, str) or not name.strip():
             continue
-        pid = get_playlist_id(youtube, name.strip())
+        pid = get_playlist_id(youtube, name.strip(), channel_key)
         if pid:
-            add_video_to_playlist(youtube, video_id, pid)
+            add_video_to_playlist(youtube, video_id, pid, channel_key)
 
 
-def get_all_playlists(youtube) -> List[dict]:
+def get_all_playlists(youtube, channel_key: Optional[str] = None) -> List[dict]:
     """Return list of user's YouTube playlists."""
     try:
-        response = youtube.playlists().list(
-            part="snippet,contentDetails", mine=True, maxResults=50
-        ).execute()
-        return [
-            {
-                "id": item["id"],
-                "title": item["snippet"]["title"],
-                "description": item["snippet"].get("description", ""),
-                "video_count": item["contentDetails"].get("itemCount", 0),
-            }
-            for item in response.get("items", [])
-        ]
+        return get_playlist_index(youtube, channel_key).playlists(youtube)
     except Exception:
         return []
 
@@ -241,15 +220,53 @@ def upload_thumbnail(youtube, video_id: str, thumbnail_path: str) -> None:
 
 # ─────────────────────────── Core Upload Logic ───────────────────────────
 
-async def upload_video(
+API_THROTTLE_RETRIES = 5
+
+
+def _retry_after(resp) -> Optional[float]:
+    try:
+        return float(resp.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+async def _call_api(fn, bucket: Optional[TokenBucket] = None, retries: int = API_THROTTLE_RETRIES):
+    """
+    Run a blocking API call in the executor. With a bucket, the call is paced
+    and throttling responses slow the bucket down and retry.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(retries + 1):
+        if bucket:
+            await bucket.acquire()
+        try:
+            result = await loop.run_in_executor(None, fn)
+            if bucket:
+                bucket.success()
+            return result
+        except HttpError as e:
+            status = getattr(e.resp, "status", None)
+            if bucket and attempt < retries and is_throttle_error(status, e.content):
+                bucket.throttle(_retry_after(e.resp))
+                continue
+            raise
+
+
+async def _upload_media(
     youtube,
     video_data: VideoUploadRequest,
     progress_cb: ProgressCallback,
+    state_dir: Optional[str] = None,
+    resume_context: Optional[dict] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    bucket: Optional[TokenBucket] = None,
+    on_bytes: Optional[Callable[[int, int], None]] = None,
 ) -> Optional[str]:
     """
-    Upload a single video to YouTube with full metadata.
-    Returns video_id on success, None on failure.
-    Calls progress_cb(type, message, progress%) for real-time updates.
+    Send the video bytes and metadata; returns the new video_id or None.
+
+    Per-chunk progress goes to `on_bytes(sent, total)` (called on the event
+    loop) when given, otherwise it is reported as PROGRESS messages.
     """
     video_file = video_data.video_file_path
     if not video_file or not os.path.exists(video_file):
@@ -285,46 +302,124 @@ async def upload_video(
             request_body["status"]["privacyStatus"] = "private"
 
     try:
-        media = MediaFileUpload(video_file, chunksize=-1, resumable=True)
+        # googleapiclient builds the resumable initiation request (URI, JSON
+        # metadata, auth transport); the chunk loop itself is ours.
+        media = MediaFileUpload(video_file, chunksize=chunk_size, resumable=True)
         request = youtube.videos().insert(
             part="snippet,status",
             body=request_body,
             media_body=media,
         )
+        media.stream().close()
 
-        response = None
         loop = asyncio.get_event_loop()
 
-        def _do_chunk():
-            return request.next_chunk()
+        def _on_progress(sent: int, total: int):
+            if on_bytes:
+                loop.call_soon_threadsafe(on_bytes, sent, total)
+                return
+            pct = round(sent / total * 100, 1) if total else 100.0
+            mb_sent, mb_total = sent / (1024 * 1024), total / (1024 * 1024)
+            asyncio.run_coroutine_threadsafe(
+                progress_cb("PROGRESS", f"🚀 Upload Progress: {pct}% ({mb_sent:.1f}/{mb_total:.1f} MB)", pct),
+                loop,
+            )
+
+        def _on_retry(status: Optional[int], retry_after: Optional[float]):
+            if bucket and is_throttle_error(status):
+                loop.call_soon_threadsafe(bucket.throttle, retry_after)
+
+        context = dict(resume_context or {})
+        context["request"] = video_data.model_dump(mode="json")
+        engine = ResumableUpload(
+            request.http,
+            video_file,
+            state_path_for(video_file, state_dir),
+            mimetype=media.mimetype(),
+            chunk_size=chunk_size,
+            on_progress=_on_progress,
+            on_retry=_on_retry,
+            context=context,
+        )
 
-        while response is None:
-            status, response = await loop.run_in_executor(None, _do_chunk)
-            if status:
-                pct = round(status.progress() * 100, 1)
-                await progress_cb("PROGRESS", f"🚀 Upload Progress: {pct}%", pct)
+        for attempt in range(API_THROTTLE_RETRIES + 1):
+            if bucket:
+                await bucket.acquire()
+            try:
+                response = await loop.run_in_executor(None, engine.run, request.uri, request.body, request.headers)
+                break
+            except ResumableUploadError as e:
+                # 403 rate-limit replies are final for the engine; back off here
+                if bucket and attempt < API_THROTTLE_RETRIES and is_throttle_error(e.status, e.content):
+                    bucket.throttle()
+                    continue
+                raise
+        if bucket:
+            bucket.success()
+        if engine.retries_used:
+            await progress_cb("LOG", f"🔁 Upload recovered after {engine.retries_used} retried request(s)", None)
 
         video_id = response["id"]
         await progress_cb("LOG", f"✅ Uploaded: {video_data.title} (ID: {video_id})", None)
+        return video_id
 
-        # Upload thumbnail
-        if video_data.thumbnail_path and os.path.exists(video_data.thumbnail_path):
-            await progress_cb("LOG", "🖼️ Uploading thumbnail...", None)
-            await loop.run_in_executor(
-                None, lambda: upload_thumbnail(youtube, video_id, video_data.thumbnail_path)
-            )
-            await progress_cb("LOG", "✅ Thumbnail uploaded", None)
-
-        # Add to playlists
-        if video_data.playlist_names:
-            await progress_cb("LOG", f"📋 Adding to playlists: {video_data.playlist_names}", None)
-            await loop.run_in_executor(
-                None,
-                lambda: add_video_to_multiple_playlists(youtube, video_id, video_data.playlist_names),
-            )
+    except Exception as e:
+        await progress_cb("ERROR", f"❌ Upload failed: {e}", None)
+        return None
 
-        return video_id
 
+async def _finalize_video(
+    youtube,
+    video_id: str,
+    video_data: VideoUploadRequest,
+    progress_cb: ProgressCallback,
+    bucket: Optional[TokenBucket] = None,
+    channel_key: Optional[str] = None,
+) -> None:
+    """
+    Thumbnail and playlist calls for an uploaded video. Playlist names are
+    resolved through the channel's shared playlist index (`channel_key`).
+    """
+    # Upload thumbnail
+    if video_data.thumbnail_path and os.path.exists(video_data.thumbnail_path):
+        await progress_cb("LOG", "🖼️ Uploading thumbnail...", None)
+        await _call_api(lambda: upload_thumbnail(youtube, video_id, video_data.thumbnail_path), bucket)
+        await progress_cb("LOG", "✅ Thumbnail uploaded", None)
+
+    # Add to playlists
+    if video_data.playlist_names:
+        await progress_cb("LOG", f"📋 Adding to playlists: {video_data.playlist_names}", None)
+        await _call_api(
+            lambda: add_video_to_multiple_playlists(youtube, video_id, video_data.playlist_names, channel_key),
+            bucket,
+        )
+
+
+async def upload_video(
+    youtube,
+    video_data: VideoUploadRequest,
+    progress_cb: ProgressCallback,
+    state_dir: Optional[str] = None,
+    resume_context: Optional[dict] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Optional[str]:
+    """
+    Upload a single video to YouTube with full metadata.
+    Returns video_id on success, None on failure.
+    Calls progress_cb(type, message, progress%) for real-time updates.
+
+    The media is sent in `chunk_size` pieces through a resumable session whose
+    URI and offset are persisted under `state_dir` (default: the video's
+    folder), so a retry or a restarted server continues from the last chunk.
+    `resume_context` is stored alongside to let the router re-create the job.
+    """
+    video_id = await _upload_media(youtube, video_data, progress_cb, state_dir, resume_context, chunk_size)
+    if not video_id:
+        return None
+    try:
+        channel_key = (resume_context or {}).get("channel_id")
+        await _finalize_video(youtube, video_id, video_data, progress_cb, channel_key=channel_key)
+        return video_id
     except Exception as e:
         await progress_cb("ERROR", f"❌ Upload failed: {e}", None)
         return None
@@ -334,28 +429,75 @@ async def upload_batch(
     youtube,
     videos: List[VideoUploadRequest],
     progress_cb: ProgressCallback,
+    state_dir: Optional[str] = None,
+    resume_context: Optional[dict] = None,
+    concurrency: int = UPLOAD_CONCURRENCY,
+    bucket: Optional[TokenBucket] = None,
 ) -> dict:
-    """Upload multiple videos sequentially with progress reporting."""
+    """
+    Upload multiple videos with bounded concurrency and aggregate progress.
+
+    Up to `concurrency` videos stream bytes at once. API calls share a token
+    bucket that slows down on 429 / rate-limit responses rather than sleeping
+    a fixed interval between videos. A video's thumbnail and playlist calls run
+    after it releases its transfer slot, overlapping the next video's bytes.
+    Overall progress and throughput (MB/s, videos/min) are reported as
+    PROGRESS messages. Playlist titles are resolved from one cached listing
+    of the channel's playlists, not one listing per video.
+    """
     total = len(videos)
-    successful, failed = 0, 0
-
-    for i, video in enumerate(videos, 1):
-        overall_pct = round(((i - 1) / total) * 100, 1)
-        await progress_cb(
-            "STATUS",
-            f"📦 Processing video {i}/{total}: {video.title}",
-            overall_pct,
-        )
-
-        video_id = await upload_video(youtube, video, progress_cb)
+    bucket = bucket or TokenBucket()
+    meter = ThroughputMeter(total)
+    channel_key = (resume_context or {}).get("channel_id")
+    transfer_slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def _report():
+        pct = meter.percent()
+        await progress_cb("PROGRESS", f"🚀 Batch {pct}% · {meter.summary()}", pct)
+
+    def _bytes_cb(i: int):
+        def _cb(sent: int, total_bytes: int):
+            meter.update(i, sent, total_bytes)
+            if meter.should_report():
+                asyncio.ensure_future(_report())
+        return _cb
+
+    async def _one(i: int, video: VideoUploadRequest) -> Optional[str]:
+        async def cb(msg_type, message, progress):
+            # Per-video percentages would fight the aggregate progress bar
+            await progress_cb(msg_type, f"[{i}/{total}] {message}", None)
+
+        async with transfer_slots:
+            await cb("STATUS", f"📦 Processing video: {video.title}", None)
+            video_id = await _upload_media(
+                youtube, video, cb, state_dir, resume_context,
+                bucket=bucket, on_bytes=_bytes_cb(i),
+            )
         if video_id:
-            successful += 1
-        else:
-            failed += 1
-
-        if i < total:
-            await progress_cb("LOG", "⏳ Waiting 10 seconds before next upload...", None)
-            await asyncio.sleep(10)
+            try:
+                await _finalize_video(youtube, video_id, video, cb, bucket, channel_key)
+            except Exception as e:
+                await cb("LOG", f"⚠️ Uploaded, but thumbnail/playlist step failed: {e}", None)
+        meter.finish(i, success=bool(video_id))
+        await _report()
+        return video_id
 
-    await progress_cb("LOG", f"📊 Done: {successful} succeeded, {failed} failed", 100.0)
+    await progress_cb(
+        "STATUS",
+        f"📦 Uploading {total} videos, {min(total, max(1, concurrency))} at a time",
+        0.0,
+    )
+    results = await asyncio.gather(
+        *(_one(i, video) for i, video in enumerate(videos, 1)),
+        return_exceptions=True,
+    )
+    successful = sum(1 for r in results if r and not isinstance(r, BaseException))
+    failed = total - successful
+
+    throttled = f", throttled {bucket.throttle_events}x" if bucket.throttle_events else ""
+    await progress_cb(
+        "LOG",
+        f"📊 Done: {successful} succeeded, {failed} failed · {meter.videos_per_minute():.1f} videos/min{throttled}",
+        100.0,
+    )
     return {"successful": successful, "failed": failed, "total": total}
@@ -0,0 +1,293 @@
+"""
+ResumableUpload against a local stand-in for the resumable upload protocol.
+
+The stand-in is a plain `http.server` that opens a session on POST, answers
+each chunk PUT with 308 + `Range`, answers `bytes */N` status queries, can
+fail chosen chunks with a 5xx and can be stopped and started again on the
+same port while the client is uploading.
+
+Run with `python -m unittest test_resumable_upload` (or pytest) from this
+directory.
+"""
+
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import http.client
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from services.resumable_upload import (
+    ResumableUpload, ResumableUploadError, state_path_for, CHUNK_ALIGNMENT, BACKOFF_BASE_SECONDS,
+)
+
+CHUNK = CHUNK_ALIGNMENT
+FILE_SIZE = 3 * CHUNK + 1000  # three full chunks and a short last one
+VIDEO_ID = "stand-in-video"
+
+
+# ─────────────────────────── Stand-in server ───────────────────────────
+
+class UploadSession:
+    """Server-side state; outlives server restarts like a real session would."""
+
+    def __init__(self, total):
+        self.total = total
+        self.data = bytearray()
+        self.fail_chunks = {}      # chunk start offset -> (status, retry_after) returned once
+        self.stop_after_chunks = None  # stop the server once this many chunks were committed
+        self.puts = []             # (start, end) of every chunk PUT received
+        self.queries = 0
+        self.posts = 0
+
+    @property
+    def complete(self):
+        return len(self.data) == self.total
+
+
+class StandInServer:
+    """http.server speaking enough of the resumable protocol for ResumableUpload."""
+
+    def __init__(self, session, port=0):
+        self.session = session
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    @property
+    def init_uri(self):
+        return f"http://127.0.0.1:{self.port}/upload?uploadType=resumable"
+
+    def _handler(self):
+        server = self
+        session = self.session
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, headers=None, body=b""):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _incomplete(self):
+                headers = {"Range": f"bytes=0-{len(session.data) - 1}"} if session.data else {}
+                self._reply(308, headers)
+
+            def _done(self):
+                self._reply(200, {"Content-Type": "application/json"}, json.dumps({"id": VIDEO_ID}).encode())
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                session.posts += 1
+                self._reply(200, {"Location": f"http://127.0.0.1:{server.port}/session/1"})
+
+            def do_PUT(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                spec = self.headers.get("Content-Range", "").split(" ", 1)[-1]
+                span, _, _ = spec.partition("/")
+                if span == "*":
+                    session.queries += 1
+                    return self._done() if session.complete else self._incomplete()
+
+                start, end = (int(x) for x in span.split("-"))
+                session.puts.append((start, end))
+                failure = session.fail_chunks.pop(start, None)
+                if failure:
+                    status, retry_after = failure
+                    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+                    return self._reply(status, headers)
+                if start == len(session.data):
+                    session.data.extend(body)
+                if session.complete:
+                    return self._done()
+                if session.stop_after_chunks is not None and len(session.puts) >= session.stop_after_chunks:
+                    # Stop listening first: this reply still goes out, the next request is refused
+                    session.stop_after_chunks = None
+                    server.stop()
+                self._incomplete()
+
+        return Handler
+
+
+# ─────────────────────────── Transport ───────────────────────────
+
+class _Response(dict):
+    """httplib2-style response: a dict of lower-cased headers with a `status`."""
+
+    def __init__(self, resp):
+        super().__init__((key.lower(), value) for key, value in resp.getheaders())
+        self.status = resp.status
+
+
+class LocalHttp:
+    """The `http.request(uri, method, body, headers)` transport ResumableUpload expects."""
+
+    def request(self, uri, method="GET", body=None, headers=None):
+        parts = urlsplit(uri)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+        try:
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            return _Response(resp), resp.read()
+        finally:
+            conn.close()
+
+
+# ─────────────────────────── Tests ───────────────────────────
+
+class ResumableUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.video = self.tmp / "video.mp4"
+        self.payload = bytes(i % 251 for i in range(FILE_SIZE))
+        self.video.write_bytes(self.payload)
+        self.state_path = state_path_for(str(self.video), str(self.tmp / "job"))
+        self.session = UploadSession(FILE_SIZE)
+        self.server = StandInServer(self.session).start()
+        self.delays = []
+        self.retries = []
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _upload(self, sleep=None, max_retries=4):
+        return ResumableUpload(
+            LocalHttp(), str(self.video), self.state_path,
+            mimetype="video/mp4", chunk_size=CHUNK, max_retries=max_retries,
+            on_retry=lambda status, retry_after: self.retries.append((status, retry_after)),
+            sleep=sleep or self.delays.append,
+        )
+
+    def _run(self, upload):
+        return upload.run(self.server.init_uri, init_body=b'{"snippet": {"title": "t"}}',
+                          init_headers={"Content-Type": "application/json"})
+
+    def _state(self):
+        return json.loads(self.state_path.read_text(encoding="utf-8"))
+
+    def test_uploads_in_chunks_and_clears_state(self):
+        result = self._run(self._upload())
+
+        self.assertEqual(result, {"id": VIDEO_ID})
+        self.assertEqual(bytes(self.session.data), self.payload)
+        self.assertEqual(self.session.puts, [
+            (0, CHUNK - 1), (CHUNK, 2 * CHUNK - 1), (2 * CHUNK, 3 * CHUNK - 1), (3 * CHUNK, FILE_SIZE - 1),
+        ])
+        self.assertEqual(self.delays, [])
+        self.assertFalse(self.state_path.exists())
+
+    def test_5xx_chunk_backs_off_and_resends_from_committed_offset(self):
+        self.session.fail_chunks[CHUNK] = (503, None)
+        self.session.fail_chunks[2 * CHUNK] = (500, 3)
+        upload = self._upload()
+
+        result = self._run(upload)
+
+        self.assertEqual(result, {"id": VIDEO_ID})
+        self.assertEqual(bytes(self.session.data), self.payload)
+        # Each failed chunk is re-sent once, after asking the server for its offset
+        starts = [start for start, _ in self.session.puts]
+        self.assertEqual(starts, [0, CHUNK, CHUNK, 2 * CHUNK, 2 * CHUNK, 3 * CHUNK])
+        self.assertEqual(self.session.queries, 2)
+        self.assertEqual(self.retries, [(503, None), (500, 3.0)])
+        self.assertEqual(upload.retries_used, 2)
+        # First retry of a chunk: base delay plus jitter; Retry-After raises the floor
+        self.assertGreaterEqual(self.delays[0], BACKOFF_BASE_SECONDS)
+        self.assertLess(self.delays[0], 2 * BACKOFF_BASE_SECONDS)
+        self.assertGreaterEqual(self.delays[1], 3.0)
+        self.assertFalse(self.state_path.exists())
+
+    def test_backoff_grows_while_the_server_is_down(self):
+        self.session.fail_chunks[CHUNK] = (503, None)
+
+        def sleep(delay):
+            self.delays.append(delay)
+            if len(self.delays) == 1:
+                # The 5xx landed; the server now goes away while the client asks for its offset
+                self.server.stop()
+            elif len(self.delays) == 4:
+                self.server.start()
+
+        upload = self._upload(sleep=sleep)
+        result = self._run(upload)
+
+        self.assertEqual(result, {"id": VIDEO_ID})
+        self.assertEqual(bytes(self.session.data), self.payload)
+        # One backoff for the chunk, then three doubling ones for the refused status query
+        self.assertEqual(self.retries, [(503, None), (None, None), (None, None), (None, None)])
+        self.assertEqual(upload.retries_used, 4)
+        for delay, floor in zip(self.delays, (1, 1, 2, 4)):
+            self.assertGreaterEqual(delay, floor * BACKOFF_BASE_SECONDS)
+            self.assertLess(delay, (floor + 1) * BACKOFF_BASE_SECONDS)
+        self.assertEqual([start for start, _ in self.session.puts], [0, CHUNK, CHUNK, 2 * CHUNK, 3 * CHUNK])
+        self.assertFalse(self.state_path.exists())
+
+    def test_resumes_after_restart_from_persisted_offset(self):
+        # The stand-in goes away after two chunks and the client gives up
+        self.session.stop_after_chunks = 2
+        with self.assertRaises(ResumableUploadError):
+            self._run(self._upload(max_retries=2))
+
+        state = self._state()
+        self.assertEqual(state["offset"], 2 * CHUNK)
+        self.assertEqual(state["offset"], len(self.session.data))
+        self.assertEqual(state["file_size"], FILE_SIZE)
+        self.assertTrue(state["resumable_uri"].endswith("/session/1"))
+
+        # Server back on the same port, new process: a fresh instance resumes the session
+        self.server.start()
+        self.session.puts.clear()
+        result = self._run(self._upload())
+
+        self.assertEqual(result, {"id": VIDEO_ID})
+        self.assertEqual(self.session.posts, 1)  # no second session was opened
+        self.assertEqual([start for start, _ in self.session.puts], [2 * CHUNK, 3 * CHUNK])
+        self.assertEqual(bytes(self.session.data), self.payload)
+        self.assertFalse(self.state_path.exists())
+
+    def test_state_tracks_offset_after_each_chunk(self):
+        offsets = []
+
+        def on_progress(committed, total):
+            if self.state_path.exists():
+                offsets.append((committed, self._state()["offset"]))
+
+        upload = self._upload()
+        upload.on_progress = on_progress
+        self._run(upload)
+
+        self.assertIn((CHUNK, CHUNK), offsets)
+        self.assertIn((2 * CHUNK, 2 * CHUNK), offsets)
+        self.assertIn((3 * CHUNK, 3 * CHUNK), offsets)
+        self.assertFalse(self.state_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
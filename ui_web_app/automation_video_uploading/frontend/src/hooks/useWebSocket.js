@@ -17,6 +17,9 @@ export function useWebSocket(jobId, prefix = 'editor') {
 
   const wsRef = useRef(null);
   const pollIntervalRef = useRef(null);
+  const lastSeqRef = useRef(0);
+  const finishedRef = useRef(false);
+  const reconnectRef = useRef(null);
 
   const addLog = useCallback((type, message) => {
     setLogs((prev) => {
@@ -29,7 +32,8 @@ export function useWebSocket(jobId, prefix = 'editor') {
 
   const connect = useCallback((id) => {
     if (!id) return;
-    const url = `${WS_BASE}/${prefix}/ws/${id}`;
+    // Resume after the last event we saw so a reconnect only receives what was missed
+    const url = `${WS_BASE}/${prefix}/ws/${id}?since=${lastSeqRef.current}`;
     const ws = new WebSocket(url);
     wsRef.current = ws;
 
@@ -41,15 +45,20 @@ export function useWebSocket(jobId, prefix = 'editor') {
     ws.onmessage = (event) => {
       try {
         const msg = JSON.parse(event.data);
-        const { type, message, progress: pct } = msg;
+        const { seq, type, message, progress: pct } = msg;
+
+        if (seq != null) {
+          if (seq <= lastSeqRef.current) return;
+          lastSeqRef.current = seq;
+        }
 
         addLog(type || 'LOG', message);
 
         if (pct != null) setProgress(pct);
 
-        if (type === 'COMPLETE') setStatus('complete');
-        else if (type === 'ERROR' || type === 'FAILED') setStatus('failed');
-        else if (type === 'STOPPED') setStatus('stopped');
+        if (type === 'COMPLETE') { finishedRef.current = true; setStatus('complete'); }
+        else if (type === 'ERROR' || type === 'FAILED') { finishedRef.current = true; setStatus('failed'); }
+        else if (type === 'STOPPED') { finishedRef.current = true; setStatus('stopped'); }
       } catch (err) {
         console.warn('WS parse error:', err);
       }
@@ -61,6 +70,10 @@ export function useWebSocket(jobId, prefix = 'editor') {
 
     ws.onclose = () => {
       setIsConnected(false);
+      // Dropped mid-job: reconnect with the seq cursor
+      if (!finishedRef.current && wsRef.current === ws) {
+        reconnectRef.current = setTimeout(() => connect(id), 1000);
+      }
     };
   }, [prefix, addLog]);
 
@@ -79,6 +92,7 @@ export function useWebSocket(jobId, prefix = 'editor') {
         const data = res.data;
 
         if (data.status) setStatus(data.status);
+        if (['complete', 'failed', 'stopped'].includes(data.status)) finishedRef.current = true;
         if (data.progress != null) setProgress(data.progress);
 
         if (Array.isArray(data.logs)) {
@@ -105,17 +119,26 @@ export function useWebSocket(jobId, prefix = 'editor') {
 
   useEffect(() => {
     if (jobId) {
+      lastSeqRef.current = 0;
+      finishedRef.current = false;
       setStatus('running');
       connect(jobId);
     }
     return () => {
-      if (wsRef.current) wsRef.current.close();
+      clearTimeout(reconnectRef.current);
+      const ws = wsRef.current;
+      wsRef.current = null;
+      if (ws) ws.close();
       if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
     };
   }, [jobId, connect]);
 
   const reset = useCallback(() => {
-    if (wsRef.current) wsRef.current.close();
+    clearTimeout(reconnectRef.current);
+    const ws = wsRef.current;
+    wsRef.current = null;
+    if (ws) ws.close();
+    lastSeqRef.current = 0;
     if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
     setLogs([]);
     setProgress(0);
@@ -1,7 +1,6 @@
 from flask import Flask, render_template, request, jsonify, send_file, session
 from werkzeug.utils import secure_filename
 import os
-import threading
 import queue
 import uuid
 import json
@@ -10,6 +9,7 @@ from datetime import datetime
 # Import services
 from services.video_processor import VideoProcessor
 from services.youtube_service import YouTubeService
+from services.task_manager import task_manager
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-in-production'
@@ -28,9 +28,6 @@ os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 video_processor = VideoProcessor()
 youtube_service = YouTubeService()
 
-# Store for background tasks
-background_tasks = {}
-
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
@@ -111,50 +108,24 @@ def process_video():
         if not data.get('video_path'):
             return jsonify({'error': 'Video path is required'}), 400
         
-        # Create background task
-        def process_task():
-            try:
-                background_tasks[task_id] = {
-                    'status': 'processing',
-                    'progress': 0,
-                    'message': 'Starting video processing',
-                    'result': None,
-                    'error': None
-                }
-                
-                result = video_processor.process_video(
-                    video_path=data['video_path'],
-                    options=data.get('options', {}),
-                    task_id=task_id
-                )
-                
-                background_tasks[task_id] = {
-                    'status': 'completed',
-                    'progress': 100,
-                    'message': 'Video processing completed',
-                    'result': result,
-                    'error': None
-                }
-            except Exception as e:
-                background_tasks[task_id] = {
-                    'status': 'failed',
-                    'progress': 0,
-                    'message': 'Video processing failed',
-                    'result': None,
-                    'error': str(e)
-                }
-        
-        # Start background task
-        thread = threading.Thread(target=process_task)
-        thread.daemon = True
-        thread.start()
+        # Queue background task
+        task_manager.submit(
+            'Video processing',
+            video_processor.process_video,
+            video_path=data['video_path'],
+            options=data.get('options', {}),
+            task_id=task_id
+        )
         
         return jsonify({
             'success': True,
             'task_id': task_id,
-            'message': 'Video processing started'
+            'message': 'Video processing queued',
+            'status': task_manager.status(task_id)
         })
         
+    except queue.Full:
+        return jsonify({'error': 'Too many tasks waiting, try again later'}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -168,50 +139,25 @@ def merge_videos():
         if not data.get('video_paths') or not isinstance(data['video_paths'], list):
             return jsonify({'error': 'Video paths list is required'}), 400
         
-        def merge_task():
-            try:
-                background_tasks[task_id] = {
-                    'status': 'processing',
-                    'progress': 0,
-                    'message': 'Starting video merge',
-                    'result': None,
-                    'error': None
-                }
-                
-                result = video_processor.merge_videos(
-                    video_paths=data['video_paths'],
-                    extra_video=data.get('extra_video'),
-                    background_music=data.get('background_music'),
-                    output_path=os.path.join(app.config['OUTPUT_FOLDER'], f"merged_{task_id}.mp4"),
-                    task_id=task_id
-                )
-                
-                background_tasks[task_id] = {
-                    'status': 'completed',
-                    'progress': 100,
-                    'message': 'Video merge completed',
-                    'result': result,
-                    'error': None
-                }
-            except Exception as e:
-                background_tasks[task_id] = {
-                    'status': 'failed',
-                    'progress': 0,
-                    'message': 'Video merge failed',
-                    'result': None,
-                    'error': str(e)
-                }
-        
-        thread = threading.Thread(target=merge_task)
-        thread.daemon = True
-        thread.start()
+        task_manager.submit(
+            'Video merge',
+            video_processor.merge_videos,
+            video_paths=data['video_paths'],
+            extra_video=data.get('extra_video'),
+            background_music=data.get('background_music'),
+            output_path=os.path.join(app.config['OUTPUT_FOLDER'], f"merged_{task_id}.mp4"),
+            task_id=task_id
+        )
         
         return jsonify({
             'success': True,
             'task_id': task_id,
-            'message': 'Video merge started'
+            'message': 'Video merge queued',
+            'status': task_manager.status(task_id)
         })
         
+    except queue.Full:
+        return jsonify({'error': 'Too many tasks waiting, try again later'}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -225,49 +171,24 @@ def add_subtitles():
         if not data.get('video_path'):
             return jsonify({'error': 'Video path is required'}), 400
         
-        def subtitle_task():
-            try:
-                background_tasks[task_id] = {
-                    'status': 'processing',
-                    'progress': 0,
-                    'message': 'Starting subtitle generation',
-                    'result': None,
-                    'error': None
-                }
-                
-                result = video_processor.generate_subtitles(
-                    video_path=data['video_path'],
-                    language=data.get('language', 'en'),
-                    output_path=os.path.join(app.config['OUTPUT_FOLDER'], f"subtitles_{task_id}.srt"),
-                    task_id=task_id
-                )
-                
-                background_tasks[task_id] = {
-                    'status': 'completed',
-                    'progress': 100,
-                    'message': 'Subtitle generation completed',
-                    'result': result,
-                    'error': None
-                }
-            except Exception as e:
-                background_tasks[task_id] = {
-                    'status': 'failed',
-                    'progress': 0,
-                    'message': 'Subtitle generation failed',
-                    'result': None,
-                    'error': str(e)
-                }
-        
-        thread = threading.Thread(target=subtitle_task)
-        thread.daemon = True
-        thread.start()
+        task_manager.submit(
+            'Subtitle generation',
+            video_processor.generate_subtitles,
+            video_path=data['video_path'],
+            language=data.get('language', 'en'),
+            output_path=os.path.join(app.config['OUTPUT_FOLDER'], f"subtitles_{task_id}.srt"),
+            task_id=task_id
+        )
         
         return jsonify({
             'success': True,
             'task_id': task_id,
-            'message': 'Subtitle generation started'
+            'message': 'Subtitle generation queued',
+            'status': task_manager.status(task_id)
         })
         
+    except queue.Full:
+        return jsonify({'error': 'Too many tasks waiting, try again later'}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -336,55 +257,30 @@ def upload_to_youtube():
         if not data.get('video_path'):
             return jsonify({'error': 'Video path is required'}), 400
         
-        def upload_task():
-            try:
-                background_tasks[task_id] = {
-                    'status': 'processing',
-                    'progress': 0,
-                    'message': 'Starting YouTube upload',
-                    'result': None,
-                    'error': None
-                }
-                
-                result = youtube_service.upload_video(
-                    video_path=data['video_path'],
-                    title=data.get('title', 'My Video'),
-                    description=data.get('description', ''),
-                    tags=data.get('tags', []),
-                    category=data.get('category', '22'),
-                    privacy_status=data.get('privacy_status', 'private'),
-                    playlist_names=data.get('playlist_names', []),
-                    thumbnail_path=data.get('thumbnail_path'),
-                    publish_at=data.get('publish_at'),
-                    task_id=task_id
-                )
-                
-                background_tasks[task_id] = {
-                    'status': 'completed',
-                    'progress': 100,
-                    'message': 'YouTube upload completed',
-                    'result': result,
-                    'error': None
-                }
-            except Exception as e:
-                background_tasks[task_id] = {
-                    'status': 'failed',
-                    'progress': 0,
-                    'message': 'YouTube upload failed',
-                    'result': None,
-                    'error': str(e)
-                }
-        
-        thread = threading.Thread(target=upload_task)
-        thread.daemon = True
-        thread.start()
+        task_manager.submit(
+            'YouTube upload',
+            youtube_service.upload_video,
+            video_path=data['video_path'],
+            title=data.get('title', 'My Video'),
+            description=data.get('description', ''),
+            tags=data.get('tags', []),
+            category=data.get('category', '22'),
+            privacy_status=data.get('privacy_status', 'private'),
+            playlist_names=data.get('playlist_names', []),
+            thumbnail_path=data.get('thumbnail_path'),
+            publish_at=data.get('publish_at'),
+            task_id=task_id
+        )
         
         return jsonify({
             'success': True,
             'task_id': task_id,
-            'message': 'YouTube upload started'
+            'message': 'YouTube upload queued',
+            'status': task_manager.status(task_id)
         })
         
+    except queue.Full:
+        return jsonify({'error': 'Too many tasks waiting, try again later'}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -403,8 +299,9 @@ def get_playlists():
 @app.route('/api/status/<task_id>', methods=['GET'])
 def get_status(task_id):
     """Get processing status"""
-    if task_id in background_tasks:
-        return jsonify(background_tasks[task_id])
+    status = task_manager.status(task_id)
+    if status is not None:
+        return jsonify(status)
     else:
         return jsonify({'error': 'Task not found'}), 404
 
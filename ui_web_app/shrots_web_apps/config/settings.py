@@ -25,9 +25,12 @@ class Config:
     DEFAULT_OUTPUT_QUALITY = 'high'
     ENABLE_SUBTITLE_GENERATION = False
     DEFAULT_SUBTITLE_LANGUAGE = 'en'
+    TEXT_FONT_FILE = os.environ.get('TEXT_FONT_FILE')  # unset = resolve the font family via fontconfig
     WHISPER_MODEL_SIZE = 'base'
     WHISPER_DEVICE = 'cpu'
     WHISPER_COMPUTE_TYPE = 'int8'
+    TRANSCRIPT_CACHE_FOLDER = str(BASE_DIR / 'cache' / 'transcripts')
+    TRANSCRIPT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512MB
     
     # YouTube settings
     DEFAULT_PRIVACY_STATUS = 'private'
@@ -36,9 +39,10 @@ class Config:
     YOUTUBE_TOKEN_FILE = 'token.json'
     
     # Background processing
-    MAX_CONCURRENT_TASKS = 2
-    TASK_TIMEOUT = 3600  # 1 hour
-    CLEANUP_INTERVAL = 3600  # 1 hour
+    MAX_CONCURRENT_TASKS = int(os.environ.get('MAX_CONCURRENT_TASKS', '2'))
+    MAX_QUEUED_TASKS = int(os.environ.get('MAX_QUEUED_TASKS', '100'))
+    TASK_TIMEOUT = int(os.environ.get('TASK_TIMEOUT', '3600'))  # 1 hour
+    CLEANUP_INTERVAL = 3600  # 1 hour (finished tasks are kept this long)
     
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
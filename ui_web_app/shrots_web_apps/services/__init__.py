@@ -1,5 +1,10 @@
 from .video_processor import VideoProcessor
 from .youtube_service import YouTubeService
 from .whisper_service import WhisperService
+from .transcript_cache import TranscriptCache
+from .filter_graph import FilterGraphBuilder
+from .playlist_index import PlaylistIndex
+from .media_probe import MediaProbe, MediaInfo
+from .task_manager import TaskManager, task_manager
 
-__all__ = ['VideoProcessor', 'YouTubeService', 'WhisperService']
\ No newline at end of file
+__all__ = ['VideoProcessor', 'YouTubeService', 'WhisperService', 'TranscriptCache', 'FilterGraphBuilder', 'PlaylistIndex', 'MediaProbe', 'MediaInfo', 'TaskManager', 'task_manager']
\ No newline at end of file
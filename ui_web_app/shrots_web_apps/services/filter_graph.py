@@ -0,0 +1,158 @@
+import logging
+import ffmpeg
+
+from config.settings import Config
+from services.task_manager import track_process
+
+logger = logging.getLogger(__name__)
+
+
+class FilterGraphBuilder:
+    """
+    Compose per-video effects into a single ffmpeg filter graph.
+
+    Each effect extends the video and/or audio chain of one source; render()
+    then emits one `-filter_complex` and encodes exactly once. Video is only
+    re-encoded when a video filter or concat is part of the graph, so a
+    music-only render still stream-copies the picture.
+    """
+
+    def __init__(self, video_path, width=None, height=None):
+        """
+        Args:
+            video_path: Path to the main input video
+            width: Main video width, used to fit appended clips (optional)
+            height: Main video height, used to fit appended clips (optional)
+        """
+        source = ffmpeg.input(str(video_path))
+        self.video = source.video
+        self.audio = source.audio
+        self.width = width
+        self.height = height
+        self.video_filtered = False
+        self.audio_filtered = False
+        self.steps = []
+
+    @property
+    def has_effects(self):
+        """True when at least one effect was added."""
+        return bool(self.steps)
+
+    def add_text(self, text, font_size=24, color='#ffffff', font='Arial', fontfile=None):
+        """
+        Overlay centred text on the main video.
+
+        The font is `fontfile` (or Config.TEXT_FONT_FILE) when set, otherwise
+        the `font` family looked up through fontconfig.
+        """
+        fontfile = fontfile or Config.TEXT_FONT_FILE
+        font_args = {'fontfile': fontfile} if fontfile else {'font': font}
+        self.video = self.video.drawtext(
+            text=text,
+            fontsize=font_size,
+            fontcolor=color,
+            x='(w-text_w)/2',
+            y='(h-text_h)/2',
+            **font_args
+        )
+        self.video_filtered = True
+        self.steps.append('text')
+        return self
+
+    def add_subtitles(self, subtitle_path):
+        """Burn an SRT/ASS file into the main video."""
+        # ffmpeg wants forward slashes even on Windows
+        self.video = self.video.filter('subtitles', str(subtitle_path).replace('\\', '/'))
+        self.video_filtered = True
+        self.steps.append('subtitles')
+        return self
+
+    def append_video(self, extra_path):
+        """
+        Concatenate another clip after the current graph output.
+
+        The extra clip is letterboxed to the main video's size (when known) and
+        both audio tracks are brought to a common format, as concat requires.
+        """
+        extra = ffmpeg.input(str(extra_path))
+        main_v = self.video.filter('setsar', 1)
+        extra_v = extra.video
+        if self.width and self.height:
+            extra_v = (
+                extra_v
+                .filter('scale', self.width, self.height, force_original_aspect_ratio='decrease')
+                .filter('pad', self.width, self.height, '(ow-iw)/2', '(oh-ih)/2')
+            )
+        extra_v = extra_v.filter('setsar', 1)
+        main_a = self.audio.filter('aformat', sample_rates=48000, channel_layouts='stereo')
+        extra_a = extra.audio.filter('aformat', sample_rates=48000, channel_layouts='stereo')
+
+        joined = ffmpeg.concat(main_v, main_a, extra_v, extra_a, v=1, a=1).node
+        self.video = joined[0]
+        self.audio = joined[1]
+        self.video_filtered = True
+        self.audio_filtered = True
+        self.steps.append('concat')
+        return self
+
+    def mix_music(self, music_path, volume=0.3):
+        """Mix a music bed under the current audio (volume is 0-1), looping it to the end of the video."""
+        music = ffmpeg.input(str(music_path), stream_loop=-1).audio.filter('volume', volume)
+        self.audio = ffmpeg.filter(
+            [self.audio, music], 'amix',
+            inputs=2, duration='first', dropout_transition=2
+        )
+        self.audio_filtered = True
+        self.steps.append('music')
+        return self
+
+    def build(self, output_path, vcodec='libx264', acodec='aac', audio_bitrate='192k'):
+        """
+        Build the ffmpeg output node for the accumulated graph.
+
+        Returns:
+            ffmpeg-python output stream, ready to run()
+        """
+        kwargs = {'vcodec': vcodec if self.video_filtered else 'copy'}
+        if self.audio_filtered:
+            kwargs['acodec'] = acodec
+            kwargs['audio_bitrate'] = audio_bitrate
+        else:
+            kwargs['acodec'] = 'copy'
+        return ffmpeg.output(self.video, self.audio, str(output_path), **kwargs).overwrite_output()
+
+    def render(self, output_path, **kwargs):
+        """
+        Run the graph in a single ffmpeg invocation.
+
+        Args:
+            output_path: Destination file
+            **kwargs: Codec overrides passed to build()
+
+        Returns:
+            output_path
+        """
+        stream = self.build(output_path, **kwargs)
+        logger.info(f"Rendering [{' + '.join(self.steps) or 'copy'}] in one pass: {output_path}")
+        logger.debug(' '.join(stream.compile()))
+        try:
+            run_stream(stream)
+        except ffmpeg.Error as e:
+            stderr = e.stderr.decode('utf-8', errors='replace') if e.stderr else ''
+            logger.error(f"ffmpeg render failed: {stderr[-2000:]}")
+            raise
+        return output_path
+
+
+def run_stream(stream):
+    """
+    Run an ffmpeg-python output stream like `stream.run(capture_stdout=True,
+    capture_stderr=True)`, registering the ffmpeg process with the current
+    background task so a task timeout kills it.
+    """
+    proc = stream.run_async(pipe_stdout=True, pipe_stderr=True)
+    with track_process(proc):
+        out, err = proc.communicate()
+    if proc.returncode:
+        raise ffmpeg.Error('ffmpeg', out, err)
+    return out, err
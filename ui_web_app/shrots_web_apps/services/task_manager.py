@@ -0,0 +1,340 @@
+"""
+Task Manager
+Bounded background execution for the long-running API requests.
+
+Submitted work waits in a FIFO queue and runs on at most
+MAX_CONCURRENT_TASKS worker threads, so a burst of requests queues instead
+of starting one ffmpeg/Whisper job per request and thrashing the CPU. Each
+task gets a registry entry that `/api/status/<task_id>` reads, including its
+position in the queue while it waits.
+
+Tasks that run longer than TASK_TIMEOUT are timed out: every child process
+the task started through `run_process` / `track_process` is killed, which
+makes the blocking ffmpeg call in the worker fail. Work that runs in-process
+(Whisper transcription, the YouTube upload) can't be killed; it calls
+`check_timeout()` between segments or upload chunks and stops at the next
+one. Either way the worker slot is only free once the task's function has
+returned, so a timed-out task that is still winding down counts as running.
+Finished entries are evicted CLEANUP_INTERVAL seconds after they finish, so
+the registry no longer grows for the life of the process.
+"""
+
+import time
+import uuid
+import queue
+import logging
+import subprocess
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, List
+
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# How often the monitor checks deadlines and evicts finished tasks
+MONITOR_INTERVAL = 5.0
+
+QUEUED = 'queued'
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+FAILED = 'failed'
+TIMED_OUT = 'timed_out'
+
+FINISHED = (COMPLETED, FAILED, TIMED_OUT)
+
+
+class TaskTimeout(Exception):
+    """Raised inside a task that keeps starting processes after its deadline."""
+
+
+class Task:
+    """Registry entry for one submitted job."""
+
+    def __init__(self, task_id: str, label: str, func: Callable, args: tuple, kwargs: dict):
+        self.task_id = task_id
+        self.label = label
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        # True while a worker is inside `func`, including after a timeout
+        self.running = False
+        self.progress = 0
+        self.message = f'{label} queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.processes: List[subprocess.Popen] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'task_id': self.task_id,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+_current = threading.local()
+
+
+def current_task() -> Optional[Task]:
+    """Task the calling worker thread is running, if any."""
+    return getattr(_current, 'task', None)
+
+
+class TaskManager:
+    """FIFO queue in front of a fixed number of worker threads, plus the task registry."""
+
+    def __init__(self, max_workers: int = Config.MAX_CONCURRENT_TASKS,
+                 timeout: float = Config.TASK_TIMEOUT,
+                 ttl: float = Config.CLEANUP_INTERVAL,
+                 max_queued: int = Config.MAX_QUEUED_TASKS):
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_queued = max_queued
+        self._tasks: 'OrderedDict[str, Task]' = OrderedDict()
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._monitor: Optional[threading.Thread] = None
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timed_out': 0,
+                       'rejected': 0, 'evicted': 0}
+
+    # ─────────────────────────── Submission ───────────────────────────
+
+    def submit(self, label: str, func: Callable, *args, **kwargs) -> str:
+        """
+        Queue `func(*args, **kwargs)` and return its task id.
+
+        Args:
+            label: Human-readable job name used in status messages ("Video merge")
+            func: Callable run on a worker thread; its return value becomes the result
+            task_id: Keyword passed through to `func` and used as the registry id
+                     (a new id is generated when absent)
+
+        Raises:
+            queue.Full: when max_queued tasks are already waiting
+        """
+        task_id = kwargs.get('task_id') or str(uuid.uuid4())
+        with self._cond:
+            if self.max_queued and len(self._queue) >= self.max_queued:
+                self._stats['rejected'] += 1
+                raise queue.Full(f'{len(self._queue)} tasks already waiting')
+            task = Task(task_id, label, func, args, kwargs)
+            self._tasks[task_id] = task
+            self._queue.append(task)
+            self._stats['submitted'] += 1
+            self._ensure_threads()
+            self._cond.notify()
+        logger.info(f"{label} queued as {task_id} (position {len(self._queue)})")
+        return task_id
+
+    def _ensure_threads(self):
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f'task-worker-{len(self._workers)}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._watch, name='task-monitor', daemon=True)
+            self._monitor.start()
+
+    # ─────────────────────────── Workers ───────────────────────────
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                task = self._queue.popleft()
+                task.status = PROCESSING
+                task.running = True
+                task.message = f'{task.label} started'
+                task.started_at = time.time()
+                if self.timeout:
+                    task.deadline = task.started_at + self.timeout
+            self._run(task)
+
+    def _run(self, task: Task):
+        _current.task = task
+        try:
+            result = task.func(*task.args, **task.kwargs)
+            error = None
+        except Exception as e:
+            result, error = None, e
+        finally:
+            _current.task = None
+        with self._cond:
+            task.running = False
+            task.finished_at = time.time()
+            task.processes = []
+            task.func = task.args = task.kwargs = None
+            if task.status == TIMED_OUT:
+                # The monitor already recorded the timeout; whatever the job returned after its kill is moot
+                return
+            if error is None:
+                task.status, task.progress, task.result = COMPLETED, 100, result
+                task.message = f'{task.label} completed'
+                self._stats['completed'] += 1
+            else:
+                task.status, task.error = FAILED, str(error)
+                task.message = f'{task.label} failed'
+                self._stats['failed'] += 1
+        if error is not None:
+            logger.error(f"{task.label} {task.task_id} failed: {error}")
+
+    # ─────────────────────────── Child processes ───────────────────────────
+
+    def _register(self, task: Task, proc: subprocess.Popen):
+        with self._cond:
+            expired = task.status == TIMED_OUT
+            if not expired:
+                task.processes.append(proc)
+        if expired:
+            _kill(proc)
+            raise TaskTimeout(f'{task.label} timed out')
+
+    def _unregister(self, task: Task, proc: subprocess.Popen):
+        with self._cond:
+            if proc in task.processes:
+                task.processes.remove(proc)
+
+    # ─────────────────────────── Timeouts and eviction ───────────────────────────
+
+    def _watch(self):
+        while True:
+            time.sleep(MONITOR_INTERVAL)
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"Task monitor pass failed: {e}")
+
+    def check(self, now: Optional[float] = None):
+        """Time out overdue tasks and evict finished ones older than the TTL."""
+        now = now or time.time()
+        to_kill = []
+        with self._cond:
+            for task in self._tasks.values():
+                if task.status == PROCESSING and task.deadline and now >= task.deadline:
+                    task.status = TIMED_OUT
+                    task.error = f'Task exceeded the {self.timeout:g}s time limit'
+                    task.message = f'{task.label} timed out'
+                    task.finished_at = now
+                    to_kill.extend(task.processes)
+                    self._stats['timed_out'] += 1
+                    logger.warning(f"{task.label} {task.task_id} timed out; "
+                                   f"killing {len(task.processes)} child process(es)")
+            if self.ttl:
+                expired = [tid for tid, task in self._tasks.items()
+                           if task.finished and not task.running
+                           and task.finished_at and now - task.finished_at >= self.ttl]
+                for tid in expired:
+                    del self._tasks[tid]
+                self._stats['evicted'] += len(expired)
+        for proc in to_kill:
+            _kill(proc)
+
+    # ─────────────────────────── Queries ───────────────────────────
+
+    def status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Status dict for `task_id` (with queue_position while queued), or None if unknown."""
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            status = task.to_dict()
+            position = 0
+            if task.status == QUEUED:
+                position = next((i for i, t in enumerate(self._queue, 1) if t is task), 0)
+            status['queue_position'] = position
+            status['queue_length'] = len(self._queue)
+            status['running_tasks'] = self._busy_locked()
+        return status
+
+    def _busy_locked(self) -> int:
+        # Timed-out tasks whose function has not returned yet still hold a worker
+        return sum(1 for t in self._tasks.values() if t.running)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot['queued'] = len(self._queue)
+            snapshot['running'] = self._busy_locked()
+            snapshot['overrunning'] = sum(1 for t in self._tasks.values() if t.running and t.status == TIMED_OUT)
+            snapshot['tracked'] = len(self._tasks)
+        snapshot['max_workers'] = self.max_workers
+        snapshot['timeout'] = self.timeout
+        return snapshot
+
+
+def _kill(proc: subprocess.Popen):
+    if proc.poll() is None:
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+
+# Shared process-wide instance
+task_manager = TaskManager()
+
+
+def check_timeout():
+    """
+    Raise TaskTimeout when the task on this thread has timed out.
+    Called between units of in-process work that no process kill can stop.
+    """
+    task = current_task()
+    if task is not None and task.status == TIMED_OUT:
+        raise TaskTimeout(f'{task.label} timed out')
+
+
+@contextmanager
+def track_process(proc: subprocess.Popen):
+    """
+    Register `proc` with the task running on this thread so a timeout kills it.
+    A no-op outside tasks; kills `proc` and raises TaskTimeout if the task already timed out.
+    """
+    task = current_task()
+    if task is None:
+        yield proc
+        return
+    task_manager._register(task, proc)
+    try:
+        yield proc
+    finally:
+        task_manager._unregister(task, proc)
+
+
+def run_process(cmd: List[str], check: bool = False, timeout: Optional[float] = None,
+                **popen_kwargs) -> subprocess.CompletedProcess:
+    """`subprocess.run` whose child is killed when the calling task times out."""
+    if popen_kwargs.pop('capture_output', False):
+        popen_kwargs['stdout'] = popen_kwargs['stderr'] = subprocess.PIPE
+    proc = subprocess.Popen(cmd, **popen_kwargs)
+    with track_process(proc):
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
@@ -0,0 +1,217 @@
+"""
+Transcript Cache
+Persistent, content-addressed cache of Whisper transcripts.
+
+Entries are keyed by a hash of the source's audio stream plus the model and
+decode parameters, so re-rendering the same clip with different subtitle
+styling never runs Whisper again. Payloads are stored as gzip'd JSON with the
+word list packed column-wise; the directory is kept under a byte budget by
+evicting least-recently-used entries.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import logging
+import subprocess
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.environ.get(
+    "TRANSCRIPT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".video_editor", "transcripts"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("TRANSCRIPT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_HASH_CHUNK = 1024 * 1024
+
+
+# ─────────────────────────── Fingerprinting ───────────────────────────
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def audio_fingerprint(path: str) -> str:
+    """
+    Hash the first audio stream's packets (stream copy, no decode) so the key
+    ignores container metadata and video changes. Falls back to hashing the
+    whole file when ffmpeg is unavailable or the file has no audio stream.
+    """
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", str(path),
+        "-map", "0:a:0", "-c", "copy", "-f", "hash", "-hash", "sha256", "-",
+    ]
+    try:
+        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=600)
+        line = res.stdout.strip()
+        if res.returncode == 0 and line.upper().startswith("SHA256="):
+            return "a:" + line.split("=", 1)[1]
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return "f:" + _file_sha256(str(path))
+
+
+# ─────────────────────────── Word Packing ───────────────────────────
+
+def pack_words(words: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pack [{word, start, end, ...}] into column names + row tuples."""
+    fields = ["word", "start", "end"]
+    for w in words:
+        for k in w:
+            if k not in fields:
+                fields.append(k)
+    rows = []
+    for w in words:
+        row = []
+        for k in fields:
+            v = w.get(k)
+            row.append(round(v, 3) if isinstance(v, float) else v)
+        rows.append(row)
+    return {"fields": fields, "rows": rows}
+
+
+def unpack_words(packed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    fields = packed.get("fields", [])
+    return [
+        {k: v for k, v in zip(fields, row) if v is not None}
+        for row in packed.get("rows", [])
+    ]
+
+
+# ─────────────────────────── Cache ───────────────────────────
+
+class TranscriptCache:
+    """On-disk LRU cache of transcripts (recency tracked through file mtime)."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def make_key(self, audio_path: str, model: str, language: Optional[str], **decode_params) -> str:
+        """Content address for (audio stream, model, language, decode params)."""
+        return self.key_for(audio_fingerprint(audio_path), model, language, **decode_params)
+
+    def key_for(self, fingerprint: str, model: str, language: Optional[str], **decode_params) -> str:
+        """Like make_key, for callers that already hold the audio fingerprint."""
+        ident = {
+            "v": CACHE_VERSION,
+            "audio": fingerprint,
+            "model": model,
+            "language": language,
+            "params": decode_params,
+        }
+        blob = json.dumps(ident, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    payload = json.load(f)
+                os.utime(path, None)  # bump recency for LRU
+                self._stats["hits"] += 1
+                return payload
+            except FileNotFoundError:
+                self._stats["misses"] += 1
+                return None
+            except Exception as e:
+                logger.warning(f"Discarding unreadable transcript cache entry {path.name}: {e}")
+                self._stats["errors"] += 1
+                self._stats["misses"] += 1
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                return None
+
+    def put(self, key: str, payload: Any) -> None:
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                    json.dump(payload, f, separators=(",", ":"))
+                os.replace(tmp, path)
+                self._stats["stores"] += 1
+                self._evict_locked()
+            except Exception as e:
+                logger.warning(f"Could not store transcript cache entry: {e}")
+                self._stats["errors"] += 1
+
+    def get_words(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        payload = self.get(key)
+        if payload is None or "words" not in payload:
+            return None
+        return unpack_words(payload["words"])
+
+    def put_words(self, key: str, words: List[Dict[str, Any]]) -> None:
+        self.put(key, {"words": pack_words(words)})
+
+    def _entries(self):
+        if not self.cache_dir.exists():
+            return []
+        entries = []
+        for p in self.cache_dir.glob("*.json.gz"):
+            try:
+                st = p.stat()
+                entries.append((st.st_mtime, st.st_size, p))
+            except OSError:
+                continue
+        return entries
+
+    def _evict_locked(self) -> None:
+        entries = sorted(self._entries())  # oldest first
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+                self._stats["evictions"] += 1
+            except OSError:
+                continue
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = 0
+            for _, _, p in self._entries():
+                try:
+                    p.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries()
+            snapshot = dict(self._stats)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 3) if lookups else 0.0
+        snapshot["entries"] = len(entries)
+        snapshot["bytes"] = sum(size for _, size, _ in entries)
+        snapshot["max_bytes"] = self.max_bytes
+        snapshot["cache_dir"] = str(self.cache_dir)
+        return snapshot
+
+
+# Shared process-wide instance
+transcript_cache = TranscriptCache()
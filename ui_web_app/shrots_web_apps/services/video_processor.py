@@ -1,12 +1,14 @@
 import os
-import subprocess
 import json
 import tempfile
 from pathlib import Path
 import logging
 import shutil
 from faster_whisper import WhisperModel
-import ffmpeg
+
+from services.filter_graph import FilterGraphBuilder
+from services.media_probe import media_probe
+from services.task_manager import run_process
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -47,49 +49,55 @@ class VideoProcessor:
             # Create temporary working directory
             temp_dir = tempfile.mkdtemp()
             
-            # Build processing chain based on options
-            processed_video = video_path
-            
-            # Add background music if enabled
-            if options.get('enable_music') and options.get('background_music'):
-                processed_video = self._add_background_music(
-                    processed_video, 
-                    options['background_music'],
-                    options.get('music_volume', 30),
-                    temp_dir
-                )
-            
-            # Add text effects if enabled
-            if options.get('enable_text_effects') and options.get('text_content'):
-                processed_video = self._add_text_effects(
-                    processed_video,
-                    options['text_content'],
-                    options.get('text_font', 'Arial'),
-                    options.get('font_size', 24),
-                    options.get('text_color', '#ffffff'),
-                    temp_dir
-                )
-            
-            # Generate subtitles if enabled
-            if options.get('enable_subtitles'):
-                subtitle_path = self.generate_subtitles(
-                    processed_video,
-                    options.get('subtitle_language', 'en'),
-                    os.path.join(temp_dir, 'subtitles.srt'),
-                    task_id
-                )
-                processed_video = self._burn_subtitles(processed_video, subtitle_path, temp_dir)
-            
-            # Prepare output path
-            output_filename = options.get('output_filename', 'output')
-            output_format = options.get('output_format', 'mp4')
-            output_path = self.output_dir / f"{output_filename}.{output_format}"
-            
-            # Copy final result to output location
-            shutil.copy(processed_video, output_path)
-            
-            # Clean up temporary directory
-            shutil.rmtree(temp_dir)
+            try:
+                # Compose every enabled effect into one filter graph so the
+                # video is decoded and encoded a single time
+                info = self.get_video_info(video_path) or {}
+                graph = FilterGraphBuilder(video_path, info.get('width'), info.get('height'))
+                
+                # Add text effects if enabled
+                if options.get('enable_text_effects') and options.get('text_content'):
+                    graph.add_text(
+                        options['text_content'],
+                        options.get('font_size', 24),
+                        options.get('text_color', '#ffffff'),
+                        font=options.get('text_font', 'Arial')
+                    )
+                
+                # Generate subtitles if enabled (from the untouched source, so
+                # no intermediate render is needed and music can't mask speech)
+                if options.get('enable_subtitles'):
+                    subtitle_path = self.generate_subtitles(
+                        video_path,
+                        options.get('subtitle_language', 'en'),
+                        os.path.join(temp_dir, 'subtitles.srt'),
+                        task_id
+                    )
+                    graph.add_subtitles(subtitle_path)
+                
+                # Append extra video if enabled
+                if options.get('enable_merge') and options.get('extra_video'):
+                    graph.append_video(options['extra_video'])
+                
+                # Add background music if enabled
+                if options.get('enable_music') and options.get('background_music'):
+                    graph.mix_music(
+                        options['background_music'],
+                        float(options.get('music_volume', 30)) / 100.0
+                    )
+                
+                # Prepare output path
+                output_filename = options.get('output_filename', 'output')
+                output_format = options.get('output_format', 'mp4')
+                output_path = self.output_dir / f"{output_filename}.{output_format}"
+                
+                if graph.has_effects:
+                    graph.render(output_path)
+                else:
+                    shutil.copy(video_path, output_path)
+            finally:
+                # Clean up temporary directory
+                shutil.rmtree(temp_dir, ignore_errors=True)
             
             logger.info(f"Video processing completed: {output_path}")
             
@@ -149,20 +157,17 @@ class VideoProcessor:
             ]
             
             logger.info(f"Running ffmpeg merge command")
-            subprocess.run(cmd, check=True, capture_output=True)
-            
-            # Add extra video if provided
-            if extra_video:
-                merged_video = self._merge_extra_video(merged_video, extra_video, temp_dir)
-            
-            # Add background music if provided
-            if background_music:
-                merged_video = self._add_background_music(
-                    merged_video,
-                    background_music,
-                    30,  # default volume
-                    temp_dir
-                )
+            run_process(cmd, check=True, capture_output=True)
+            
+            # Append extra video and mix music in a single re-encode
+            if extra_video or background_music:
+                info = self.get_video_info(merged_video) or {}
+                graph = FilterGraphBuilder(merged_video, info.get('width'), info.get('height'))
+                if extra_video:
+                    graph.append_video(extra_video)
+                if background_music:
+                    graph.mix_music(background_music, 0.3)  # default volume
+                merged_video = graph.render(os.path.join(temp_dir, 'merged_final.mp4'))
             
             # Copy final result to output location
             shutil.copy(merged_video, output_path)
@@ -245,13 +250,10 @@ class VideoProcessor:
         output_path = tempfile.mktemp(suffix='.wav')
         
         try:
-            (
-                ffmpeg
-                .input(video_path)
-                .output(output_path, acodec='pcm_s16le', ac=1, ar='16000')
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
+            run_process([
+                'ffmpeg', '-y', '-i', str(video_path), '-vn',
+                '-acodec', 'pcm_s16le', '-ac', '1', '-ar', '16000', output_path
+            ], check=True, capture_output=True)
             return output_path
         except Exception as e:
             logger.error(f"Audio extraction failed: {e}")
@@ -267,124 +269,19 @@ class VideoProcessor:
         milliseconds = int((seconds % 1) * 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
     
-    def _add_background_music(self, video_path, music_path, volume=30, temp_dir=None):
-        """Add background music to video"""
-        try:
-            output_path = os.path.join(temp_dir or tempfile.mkdtemp(), 'with_music.mp4')
-            
-            # Normalize volume (0-1)
-            volume_norm = volume / 100.0
-            
-            (
-                ffmpeg
-                .input(video_path)
-                .input(music_path)
-                .output(
-                    output_path,
-                    vcodec='copy',
-                    acodec='aac',
-                    audio_bitrate='192k',
-                    filter_complex=f"[1:a]volume={volume_norm}[music];[0:a][music]amix=inputs=2:duration=first:dropout_transition=2[out]",
-                    map=['0:v', '[out]']
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-            
-            return output_path
-        except Exception as e:
-            logger.error(f"Background music addition failed: {e}")
-            raise
-    
-    def _add_text_effects(self, video_path, text, font='Arial', font_size=24, 
-                         color='#ffffff', temp_dir=None):
-        """Add text overlay to video"""
-        try:
-            output_path = os.path.join(temp_dir or tempfile.mkdtemp(), 'with_text.mp4')
-            
-            (
-                ffmpeg
-                .input(video_path)
-                .output(
-                    output_path,
-                    vf=f"drawtext=text='{text}':fontfile=/Windows/Fonts/arial.ttf:fontsize={font_size}:fontcolor={color}:x=(w-text_w)/2:y=(h-text_h)/2",
-                    vcodec='libx264',
-                    acodec='copy'
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-            
-            return output_path
-        except Exception as e:
-            logger.error(f"Text effects addition failed: {e}")
-            raise
-    
-    def _burn_subtitles(self, video_path, subtitle_path, temp_dir=None):
-        """Burn subtitles into video"""
-        try:
-            output_path = os.path.join(temp_dir or tempfile.mkdtemp(), 'with_subtitles.mp4')
-            
-            # Fix path for ffmpeg (replace backslashes with forward slashes)
-            subtitle_path_fixed = subtitle_path.replace('\\', '/')
-            
-            (
-                ffmpeg
-                .input(video_path)
-                .output(
-                    output_path,
-                    vf=f"subtitles='{subtitle_path_fixed}'",
-                    vcodec='libx264',
-                    acodec='copy'
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-            
-            return output_path
-        except Exception as e:
-            logger.error(f"Subtitle burning failed: {e}")
-            raise
-    
-    def _merge_extra_video(self, main_video, extra_video, temp_dir):
-        """Merge extra video with main video"""
-        try:
-            output_path = os.path.join(temp_dir, 'merged_with_extra.mp4')
-            
-            (
-                ffmpeg
-                .input(main_video)
-                .input(extra_video)
-                .output(
-                    output_path,
-                    filter_complex="[0:v][1:v]concat=n=2:v=1[outv];[0:a][1:a]concat=n=2:a=1[outa]",
-                    map=['[outv]', '[outa]'],
-                    vcodec='libx264',
-                    acodec='aac'
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-            
-            return output_path
-        except Exception as e:
-            logger.error(f"Extra video merge failed: {e}")
-            raise
-    
     def get_video_info(self, video_path):
-        """Get video information using ffprobe"""
-        try:
-            probe = ffmpeg.probe(video_path)
-            video_info = probe['streams'][0] if probe['streams'] else {}
-            
-            return {
-                'duration': float(probe['format'].get('duration', 0)),
-                'width': int(video_info.get('width', 0)),
-                'height': int(video_info.get('height', 0)),
-                'codec': video_info.get('codec_name', 'unknown'),
-                'bitrate': int(probe['format'].get('bit_rate', 0)),
-                'size': int(probe['format'].get('size', 0))
-            }
-        except Exception as e:
-            logger.error(f"Failed to get video info: {e}")
-            return None
\ No newline at end of file
+        """Get video information (cached ffprobe)"""
+        info = media_probe.probe(video_path)
+        if info is None:
+            logger.error(f"Failed to get video info: {video_path}")
+            return None
+        return {
+            'duration': info.duration or 0.0,
+            'width': info.width or 0,
+            'height': info.height or 0,
+            'codec': info.vcodec or 'unknown',
+            'bitrate': info.bit_rate or 0,
+            'size': info.size or 0,
+            'fps': info.fps,
+            'has_audio': info.has_audio,
+        }
\ No newline at end of file
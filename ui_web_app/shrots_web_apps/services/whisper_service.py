@@ -1,14 +1,19 @@
 import os
 import logging
+from types import SimpleNamespace
 from faster_whisper import WhisperModel
 import tempfile
 
+from config.settings import Config
+from services.transcript_cache import TranscriptCache
+from services.task_manager import check_timeout
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class WhisperService:
-    def __init__(self, model_size="base", device="cpu", compute_type="int8"):
+    def __init__(self, model_size="base", device="cpu", compute_type="int8", transcript_cache=None):
         """
         Initialize Whisper service for speech recognition
         
@@ -16,11 +21,15 @@ class WhisperService:
             model_size: Model size (tiny, base, small, medium, large)
             device: Device to run model on (cpu, cuda, auto)
             compute_type: Compute type (int8, float16, float32)
+            transcript_cache: Optional TranscriptCache (defaults to the configured cache folder)
         """
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
         self.model = None
+        self.transcript_cache = transcript_cache or TranscriptCache(
+            Config.TRANSCRIPT_CACHE_FOLDER, Config.TRANSCRIPT_CACHE_MAX_BYTES
+        )
         self._load_model()
     
     def _load_model(self):
@@ -54,6 +63,15 @@ class WhisperService:
             if not os.path.exists(audio_path):
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
             
+            cache_key = self.transcript_cache.make_key(
+                audio_path, self.model_size, language,
+                task=task, word_timestamps=word_timestamps
+            )
+            cached = self.transcript_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached transcript for: {audio_path}")
+                return self._segments_from_cache(cached)
+            
             logger.info(f"Transcribing audio: {audio_path}")
             
             segments, info = self.model.transcribe(
@@ -63,17 +81,87 @@ class WhisperService:
                 word_timestamps=word_timestamps
             )
             
-            # Convert to list for multiple iterations
-            segments_list = list(segments)
+            # Convert to list for multiple iterations; segments decode lazily, so a
+            # timed-out task stops here instead of transcribing to the end
+            segments_list = []
+            for segment in segments:
+                check_timeout()
+                segments_list.append(segment)
             
             logger.info(f"Transcription completed. Detected language: {info.language} with probability {info.language_probability:.2f}")
             
+            self.transcript_cache.put(cache_key, self._segments_to_cache(segments_list, info))
+            
             return segments_list, info
             
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             raise
     
+    def _segments_to_cache(self, segments, info):
+        """
+        Serialize segments and info into a compact cache payload
+        
+        Args:
+            segments: List of faster-whisper segments
+            info: faster-whisper TranscriptionInfo
+            
+        Returns:
+            JSON-serializable dictionary
+        """
+        return {
+            'info': {
+                'language': info.language,
+                'language_probability': info.language_probability,
+                'duration': info.duration
+            },
+            'segments': [
+                {
+                    'id': segment.id,
+                    'start': round(segment.start, 3),
+                    'end': round(segment.end, 3),
+                    'text': segment.text,
+                    'words': [
+                        [w.word, round(w.start, 3), round(w.end, 3), round(w.probability, 4)]
+                        for w in (getattr(segment, 'words', None) or [])
+                    ]
+                }
+                for segment in segments
+            ]
+        }
+    
+    def _segments_from_cache(self, payload):
+        """
+        Rebuild segment/info objects from a cache payload
+        
+        Args:
+            payload: Dictionary produced by _segments_to_cache
+            
+        Returns:
+            Tuple of (segments, info) exposing the same attributes as faster-whisper results
+        """
+        info = SimpleNamespace(**payload['info'])
+        segments = []
+        for seg in payload['segments']:
+            words = [
+                SimpleNamespace(word=w[0], start=w[1], end=w[2], probability=w[3])
+                for w in seg['words']
+            ]
+            segments.append(SimpleNamespace(
+                id=seg['id'], start=seg['start'], end=seg['end'],
+                text=seg['text'], words=words
+            ))
+        return segments, info
+    
+    def get_cache_stats(self):
+        """
+        Get transcript cache statistics
+        
+        Returns:
+            Dictionary with hit/miss counters and on-disk size
+        """
+        return self.transcript_cache.stats()
+    
     def transcribe_with_timestamps(self, audio_path, language="en"):
         """
         Transcribe audio with detailed timestamps
@@ -10,6 +10,9 @@ from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 import logging
 
+from services.playlist_index import get_playlist_index
+from services.task_manager import check_timeout
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -20,6 +23,9 @@ SCOPES = [
     "https://www.googleapis.com/auth/youtube.force-ssl"
 ]
 
+# Resumable upload chunk size (a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
 CATEGORY_MAP = {
     "Film & Animation": "1",
     "Autos & Vehicles": "2",
@@ -186,6 +192,11 @@ class YouTubeService:
             logger.error(f"Error converting time: {e}")
             return None
     
+    @property
+    def playlist_index(self):
+        """Cached title → id index of this account's playlists (one listing per TTL)"""
+        return get_playlist_index(self.youtube)
+    
     def get_playlist_id(self, playlist_name):
         """
         Get playlist ID by name, create if doesn't exist
@@ -197,31 +208,14 @@ class YouTubeService:
             Playlist ID string or None if failed
         """
         try:
-            request = self.youtube.playlists().list(
-                part="snippet",
-                mine=True,
-                maxResults=50
-            )
-            response = request.execute()
-            
-            for playlist in response.get("items", []):
-                if playlist["snippet"]["title"] == playlist_name:
-                    logger.info(f"Found existing playlist: {playlist_name}")
-                    return playlist["id"]
+            index = self.playlist_index
+            playlist_id = index.get(self.youtube, playlist_name)
+            if playlist_id:
+                logger.info(f"Found existing playlist: {playlist_name}")
+                return playlist_id
             
             logger.info(f"Creating new playlist: {playlist_name}")
-            create_request = self.youtube.playlists().insert(
-                part="snippet,status",
-                body={
-                    "snippet": {
-                        "title": playlist_name,
-                        "description": f"Playlist for {playlist_name}",
-                        "defaultLanguage": "en"
-                    },
-                    "status": {"privacyStatus": "public"}
-                }
-            )
-            return create_request.execute()["id"]
+            return index.resolve(self.youtube, playlist_name)
             
         except Exception as e:
             logger.error(f"Error handling playlist: {e}")
@@ -245,6 +239,7 @@ class YouTubeService:
                     }
                 }
             ).execute()
+            self.playlist_index.note_item_added(playlist_id)
             logger.info("Video added to playlist successfully")
         except Exception as e:
             logger.error(f"Failed to add video to playlist: {e}")
@@ -349,8 +344,8 @@ class YouTubeService:
                     request_body["status"]["publishAt"] = utc_publish_time
                     request_body["status"]["privacyStatus"] = "private"
             
-            # Upload video
-            media = MediaFileUpload(video_path, chunksize=-1, resumable=True)
+            # Upload video in chunks so a timed-out task stops between them
+            media = MediaFileUpload(video_path, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
             request = self.youtube.videos().insert(
                 part="snippet,status,recordingDetails",
                 body=request_body,
@@ -359,6 +354,7 @@ class YouTubeService:
             
             response = None
             while response is None:
+                check_timeout()
                 try:
                     status, response = request.next_chunk()
                     if status:
@@ -404,21 +400,7 @@ class YouTubeService:
             if not self.youtube:
                 raise Exception("YouTube service not authenticated")
             
-            request = self.youtube.playlists().list(
-                part="snippet,contentDetails",
-                mine=True,
-                maxResults=50
-            )
-            response = request.execute()
-            
-            playlists = []
-            for playlist in response.get("items", []):
-                playlists.append({
-                    'id': playlist['id'],
-                    'title': playlist['snippet']['title'],
-                    'description': playlist['snippet'].get('description', ''),
-                    'video_count': playlist['contentDetails']['itemCount']
-                })
+            playlists = self.playlist_index.playlists(self.youtube)
             
             logger.info(f"Retrieved {len(playlists)} playlists")
             return playlists
@@ -89,7 +89,7 @@ function pollStatus(taskId, callback, interval = 2000) {
             const data = await apiRequest(`/api/status/${taskId}`);
             callback(data);
             
-            if (data.status === 'processing') {
+            if (data.status === 'queued' || data.status === 'processing') {
                 setTimeout(poll, interval);
             }
         } catch (error) {
@@ -169,6 +169,7 @@ function updateStatusDisplay(elementId, data) {
         statusDiv.innerHTML = `
             <p><strong>Status:</strong> <span class="${statusClass}">${data.status}</span></p>
             <p><strong>Message:</strong> ${data.message}</p>
+            ${data.queue_position ? `<p><strong>Queue position:</strong> ${data.queue_position} of ${data.queue_length}</p>` : ''}
             <p><strong>Progress:</strong> ${data.progress}%</p>
         `;
     }
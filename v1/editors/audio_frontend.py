@@ -0,0 +1,414 @@
+"""
+Audio Front End
+Decode a media file's audio once into a mono float32 PCM buffer that every
+consumer (Whisper, chunk workers, analysis passes) can slice without copying.
+
+ffmpeg writes raw f32le samples to a pipe and the blocks land straight in a
+numpy array, so no WAV is written and Whisper gets samples instead of a path
+it would decode again. The same blocks are teed to analyzers (loudness,
+silence, waveform peaks) while they stream past, so one decode serves every
+measurement. Inputs longer than PCM_MEMORY_LIMIT_SECONDS spill to a raw temp
+file opened as a read-only memmap instead (an hour of 16 kHz audio is
+~230 MB), and slices handed to worker threads are views either way.
+"""
+
+import os
+import logging
+import tempfile
+
+import numpy as np
+
+from ffmpeg_runner import FFmpegRunner, ProgressInfo, probe_duration
+from media_probe import media_probe
+
+WHISPER_SAMPLE_RATE = 16000
+# Longer inputs are buffered in a memmapped temp file instead of RAM
+PCM_MEMORY_LIMIT_SECONDS = float(os.environ.get("PCM_MEMORY_LIMIT_SECONDS", str(4 * 3600)))
+
+_SAMPLE_BYTES = 4
+_SILENCE_FLOOR_DB = -120.0
+
+
+def to_db(value):
+    """Amplitude (or RMS) to dBFS, floored for digital silence."""
+    return float(20 * np.log10(value)) if value > 0 else _SILENCE_FLOOR_DB
+
+
+# ─────────────────────────── Buffers ───────────────────────────
+
+class PcmBuffer:
+    """
+    Mono float32 PCM held in memory or memory-mapped from a temp file; use as
+    a context manager or call close() to release it.
+    """
+
+    def __init__(self, path, sample_rate, samples=None):
+        self.path = path
+        self.sample_rate = sample_rate
+        if samples is not None:
+            self.samples = samples
+        elif path and os.path.getsize(path):
+            self.samples = np.memmap(path, dtype=np.float32, mode="r")
+        else:
+            self.samples = np.zeros(0, dtype=np.float32)
+
+    @property
+    def duration(self):
+        return len(self.samples) / float(self.sample_rate)
+
+    def slice(self, start, end):
+        """Zero-copy view of [start, end) seconds."""
+        first = max(0, int(round(start * self.sample_rate)))
+        last = min(len(self.samples), int(round(end * self.sample_rate)))
+        return self.samples[first:max(first, last)]
+
+    def close(self):
+        # The mapping must be released before the file can be removed on Windows
+        samples, self.samples = self.samples, np.zeros(0, dtype=np.float32)
+        mmap = getattr(samples, "_mmap", None)
+        del samples
+        if mmap is not None:
+            try:
+                mmap.close()
+            except Exception:
+                pass
+        if self.path and os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                logging.warning(f"Could not remove PCM buffer {self.path}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ArraySink:
+    """Growable float32 array; sized up front from the expected duration."""
+
+    def __init__(self, expected_samples):
+        self._data = np.empty(max(expected_samples, 1 << 16), dtype=np.float32)
+        self._length = 0
+
+    def write(self, block):
+        end = self._length + len(block)
+        if end > len(self._data):
+            grown = np.empty(max(end, len(self._data) * 2), dtype=np.float32)
+            grown[:self._length] = self._data[:self._length]
+            self._data = grown
+        self._data[self._length:end] = block
+        self._length = end
+
+    def finish(self, sample_rate):
+        samples = self._data[:self._length]
+        if len(self._data) - self._length > self._length // 8:
+            samples = samples.copy()  # drop a badly overestimated preallocation
+        self._data = None
+        return PcmBuffer(None, sample_rate, samples)
+
+    def abort(self):
+        self._data = None
+
+
+class _FileSink:
+    """Raw f32le temp file, memmapped once decoding is done."""
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix=".f32")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, block):
+        self._file.write(block.tobytes())
+
+    def finish(self, sample_rate):
+        self._file.close()
+        return PcmBuffer(self.path, sample_rate)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ─────────────────────────── Analyzers ───────────────────────────
+
+class PcmAnalyzer:
+    """
+    Consumer teed off a decode: begin() once with the sample rate, feed() with
+    consecutive sample blocks, finish() at the end of the stream.
+    """
+
+    sample_rate = None
+
+    def begin(self, sample_rate):
+        self.sample_rate = sample_rate
+
+    def feed(self, block):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class _Framer:
+    """Regroups arbitrary blocks into whole frames of `size` samples."""
+
+    def __init__(self, size):
+        self.size = max(1, int(size))
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def frames(self, block):
+        """(n, size) array of the frames completed by `block`."""
+        if len(self._pending):
+            block = np.concatenate((self._pending, block))
+        whole = len(block) - len(block) % self.size
+        self._pending = block[whole:].copy()
+        return block[:whole].reshape(-1, self.size)
+
+    def rest(self):
+        """The trailing partial frame (possibly empty)."""
+        pending, self._pending = self._pending, np.zeros(0, dtype=np.float32)
+        return pending
+
+
+class LoudnessMeter(PcmAnalyzer):
+    """
+    Peak, RMS and gated loudness of the whole stream, in dBFS.
+
+    `loudness_db` gates 400 ms blocks the way BS.1770 does (-70 dB absolute,
+    then 10 dB below the ungated mean), without the K-weighting filter, so it
+    tracks LUFS closely for speech but is not a calibrated LUFS value.
+    """
+
+    def __init__(self, block_seconds=0.4):
+        self.block_seconds = block_seconds
+        self.peak_db = _SILENCE_FLOOR_DB
+        self.rms_db = _SILENCE_FLOOR_DB
+        self.loudness_db = _SILENCE_FLOOR_DB
+        self._framer = None
+        self._peak = 0.0
+        self._sum_squares = 0.0
+        self._count = 0
+        self._block_energy = []
+
+    def begin(self, sample_rate):
+        super().begin(sample_rate)
+        self._framer = _Framer(sample_rate * self.block_seconds)
+
+    def feed(self, block):
+        if len(block):
+            self._peak = max(self._peak, float(np.abs(block).max()))
+            self._sum_squares += float(np.dot(block, block))
+            self._count += len(block)
+        frames = self._framer.frames(block)
+        if len(frames):
+            self._block_energy.append(np.mean(np.square(frames), axis=1))
+
+    def finish(self):
+        if not self._count:
+            return
+        self.peak_db = to_db(self._peak)
+        self.rms_db = to_db(np.sqrt(self._sum_squares / self._count))
+        if not self._block_energy:
+            self.loudness_db = self.rms_db
+            return
+        energy = np.concatenate(self._block_energy)
+        gated = energy[energy > 10 ** (-70 / 10)]
+        if len(gated):
+            gated = gated[gated > np.mean(gated) * 10 ** (-10 / 10)]
+        self.loudness_db = float(10 * np.log10(np.mean(gated))) if len(gated) else _SILENCE_FLOOR_DB
+
+    def summary(self):
+        return {"peak_db": round(self.peak_db, 2), "rms_db": round(self.rms_db, 2),
+                "loudness_db": round(self.loudness_db, 2)}
+
+
+class SilenceDetector(PcmAnalyzer):
+    """
+    RMS envelope in `window`-second frames plus the stretches that stay below
+    `threshold_db` for at least `min_silence` seconds.
+
+    After finish(): `envelope_db` holds one dBFS value per frame and
+    `intervals` the silent (start, end) ranges in seconds.
+    """
+
+    def __init__(self, threshold_db=-40.0, min_silence=0.5, window=0.02):
+        self.threshold_db = threshold_db
+        self.min_silence = min_silence
+        self.window = window
+        self.envelope_db = np.zeros(0, dtype=np.float32)
+        self.intervals = []
+        self._framer = None
+        self._envelope = []
+        self._samples = 0
+
+    def begin(self, sample_rate):
+        super().begin(sample_rate)
+        self._framer = _Framer(sample_rate * self.window)
+
+    def _push(self, frames):
+        if len(frames):
+            rms = np.sqrt(np.mean(np.square(frames), axis=1))
+            self._envelope.append((20 * np.log10(np.maximum(rms, 1e-6))).astype(np.float32))
+
+    @property
+    def frame_seconds(self):
+        """Actual length of one envelope frame (the window rounded to whole samples)."""
+        return self._framer.size / float(self.sample_rate) if self._framer else self.window
+
+    def feed(self, block):
+        self._samples += len(block)
+        self._push(self._framer.frames(block))
+
+    def finish(self):
+        rest = self._framer.rest()
+        if len(rest):
+            self._push(rest.reshape(1, -1))
+        if self._envelope:
+            self.envelope_db = np.concatenate(self._envelope)
+            self._envelope = []
+        frame = self.frame_seconds
+        duration = self._samples / float(self.sample_rate)
+        quiet = np.concatenate(([False], self.envelope_db < self.threshold_db, [False]))
+        edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+        self.intervals = []
+        for first, last in zip(edges[::2], edges[1::2]):
+            start, end = first * frame, min(last * frame, duration)
+            if end - start >= self.min_silence:
+                self.intervals.append((round(float(start), 3), round(float(end), 3)))
+
+    @property
+    def silent_seconds(self):
+        return sum(end - start for start, end in self.intervals)
+
+
+class WaveformPeaks(PcmAnalyzer):
+    """Min/max sample per bucket, `points_per_second` buckets, for drawing a waveform."""
+
+    def __init__(self, points_per_second=50):
+        self.points_per_second = points_per_second
+        self.peaks = np.zeros((0, 2), dtype=np.float32)
+        self._framer = None
+        self._parts = []
+
+    def begin(self, sample_rate):
+        super().begin(sample_rate)
+        self._framer = _Framer(sample_rate / float(self.points_per_second))
+
+    def _push(self, frames):
+        if len(frames):
+            self._parts.append(np.stack((frames.min(axis=1), frames.max(axis=1)), axis=1))
+
+    def feed(self, block):
+        self._push(self._framer.frames(block))
+
+    def finish(self):
+        rest = self._framer.rest()
+        if len(rest):
+            self._push(rest.reshape(1, -1))
+        if self._parts:
+            self.peaks = np.concatenate(self._parts).astype(np.float32)
+            self._parts = []
+
+    def to_list(self, digits=3):
+        return [[round(float(lo), digits), round(float(hi), digits)] for lo, hi in self.peaks]
+
+
+# ─────────────────────────── Decoding ───────────────────────────
+
+class _PcmTee:
+    """Turns raw stdout bytes into float32 blocks for the sink and every analyzer."""
+
+    def __init__(self, sink, analyzers, sample_rate, duration, on_progress):
+        self.sink = sink
+        self.analyzers = analyzers
+        self.sample_rate = sample_rate
+        self.duration = duration
+        self.on_progress = on_progress
+        self.samples = 0
+        self._carry = b""
+
+    def __call__(self, chunk):
+        if self._carry:
+            chunk = self._carry + chunk
+        whole = len(chunk) - len(chunk) % _SAMPLE_BYTES
+        self._carry = chunk[whole:]
+        if not whole:
+            return
+        block = np.frombuffer(chunk[:whole], dtype=np.float32)
+        self.sink.write(block)
+        for analyzer in self.analyzers:
+            analyzer.feed(block)
+        self.samples += len(block)
+        if self.on_progress:
+            self._report(done=False)
+
+    def _report(self, done):
+        out_time = self.samples / float(self.sample_rate)
+        percent = 100.0 if done else None
+        if not done and self.duration:
+            percent = max(0.0, min(100.0, out_time / self.duration * 100))
+        try:
+            self.on_progress(ProgressInfo(out_time=out_time, percent=percent, done=done))
+        except Exception as e:
+            logging.debug(f"Progress callback failed: {e}")
+
+    def finish(self):
+        for analyzer in self.analyzers:
+            analyzer.finish()
+        if self.on_progress:
+            self._report(done=True)
+
+
+def decode_pcm(media_path, sample_rate=WHISPER_SAMPLE_RATE, timeout=None, on_progress=None,
+               analyzers=(), should_stop=None, duration=None):
+    """
+    Decode the first audio stream of `media_path` to mono float32 at `sample_rate`.
+
+    Args:
+        analyzers: PcmAnalyzer instances fed from the same decode; their
+            results are ready when this returns
+        should_stop: Predicate polled while decoding; True aborts with RuntimeError
+        duration: Expected seconds (probed when omitted), for sizing the
+            buffer and percent-complete
+
+    Returns:
+        PcmBuffer; close() releases it (and removes the spill file, if any).
+        Empty (duration 0) when the file has no audio stream.
+    """
+    analyzers = list(analyzers)
+    info = media_probe.probe(media_path)
+    if info is not None and not info.has_audio:
+        # `-map 0:a:0` would fail with a bare "matches no streams" error
+        logging.info(f"ℹ️ No audio stream in {os.path.basename(str(media_path))}; nothing to decode")
+        sink = _ArraySink(0)
+        for analyzer in analyzers:
+            analyzer.begin(sample_rate)
+        _PcmTee(sink, analyzers, sample_rate, 0.0, on_progress).finish()
+        return sink.finish(sample_rate)
+    if duration is None:
+        duration = probe_duration(media_path) or 0.0
+    if duration > PCM_MEMORY_LIMIT_SECONDS:
+        sink = _FileSink()
+    else:
+        # A little headroom: container durations are often a frame short
+        sink = _ArraySink(int((duration + 1.0) * sample_rate))
+    for analyzer in analyzers:
+        analyzer.begin(sample_rate)
+    tee = _PcmTee(sink, analyzers, sample_rate, duration, on_progress)
+    runner = FFmpegRunner([
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", str(media_path),
+        "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "-acodec", "pcm_f32le", "pipe:1"
+    ], timeout=timeout, should_stop=should_stop, on_stdout=tee)
+    try:
+        result = runner.run()
+        if result.cancelled:
+            raise RuntimeError("Audio decode cancelled")
+        tee.finish()
+        return sink.finish(sample_rate)
+    except BaseException:
+        sink.abort()
+        raise
@@ -4,6 +4,7 @@ import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 import moviepy as mp
 import ffmpeg
+from ffmpeg_runner import run_ffmpeg, log_progress
 
 class VideoAudioTool:
     def __init__(self):
@@ -221,13 +222,8 @@ class VideoAudioTool:
                 output_path
             ]
             
-            # Run with minimal output
-            result = subprocess.run(
-                command, 
-                check=True, 
-                capture_output=True, 
-                text=True
-            )
+            # Run with drained pipes and percent-complete reporting
+            run_ffmpeg(command, on_progress=log_progress(os.path.basename(output_path), step=25, emit=print))
             
             print(f"Successfully created: {os.path.basename(output_path)}")
             return True
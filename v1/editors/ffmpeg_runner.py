@@ -0,0 +1,320 @@
+"""
+FFmpeg Runner
+Shared subprocess runner for the desktop editors (short_gui_v8, v17,
+audio_replacer).
+
+stdout and stderr are drained on background threads so a chatty encode can
+never fill a pipe and stall. ffmpeg commands get `-progress pipe:1` injected
+and the key=value blocks are parsed into ProgressInfo, with percent-complete
+computed against the ffprobe duration of the first input. Commands that
+write raw media to stdout can hand it to an `on_stdout` callback in binary
+chunks instead. Cancellation is immediate: cancel() or cancel_all()
+terminate the process from any thread, and a `should_stop` predicate is
+polled every `poll_interval` seconds.
+"""
+
+import os
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+
+from media_probe import media_probe
+
+STDERR_TAIL_LINES = 400
+STDOUT_CHUNK_BYTES = 64 * 1024
+
+_ACTIVE = set()
+_ACTIVE_LOCK = threading.Lock()
+
+
+# ─────────────────────────── Helpers ───────────────────────────
+
+def probe_duration(path, timeout=30):
+    """Container duration in seconds (cached ffprobe), or None if unknown."""
+    return media_probe.duration(path)
+
+
+def _is_ffmpeg(cmd):
+    return bool(cmd) and os.path.splitext(os.path.basename(str(cmd[0])))[0].lower() == "ffmpeg"
+
+
+def _writes_stdout(cmd):
+    last = str(cmd[-1])
+    return last == "-" or last.startswith("pipe:")
+
+
+def _first_input(cmd):
+    args = [str(a) for a in cmd]
+    for i, arg in enumerate(args[:-1]):
+        if arg == "-i":
+            return args[i + 1]
+    return None
+
+
+def _parse_out_time(value):
+    """Parse 'HH:MM:SS.micro' into seconds."""
+    try:
+        h, m, s = value.split(":")
+        return int(h) * 3600 + int(m) * 60 + float(s)
+    except (ValueError, AttributeError):
+        return None
+
+
+def log_progress(label, step=10, emit=None):
+    """Progress callback that reports every `step` percent through `emit`."""
+    emit = emit or logging.info
+    state = {"next": step}
+
+    def _callback(progress):
+        if progress.percent is None:
+            return
+        if progress.percent >= state["next"] or progress.done:
+            emit(f"⏳ {label}: {progress.percent:.0f}% (speed {progress.speed or '?'})")
+            while state["next"] <= progress.percent:
+                state["next"] += step
+    return _callback
+
+
+def cancel_all():
+    """Terminate every process currently started through this module."""
+    with _ACTIVE_LOCK:
+        runners = list(_ACTIVE)
+    for runner in runners:
+        runner.cancel()
+
+
+# ─────────────────────────── Results ───────────────────────────
+
+class ProgressInfo:
+    """One `-progress` block from ffmpeg."""
+
+    def __init__(self, frame=None, fps=None, out_time=None, speed=None, percent=None, done=False):
+        self.frame = frame
+        self.fps = fps
+        self.out_time = out_time
+        self.speed = speed
+        self.percent = percent
+        self.done = done
+
+    def __repr__(self):
+        return (f"ProgressInfo(frame={self.frame}, out_time={self.out_time}, "
+                f"speed={self.speed}, percent={self.percent}, done={self.done})")
+
+
+class RunResult:
+    """Outcome of a run; mirrors the subprocess.CompletedProcess fields."""
+
+    def __init__(self, args, returncode, stdout, stderr, cancelled=False):
+        self.args = args
+        self.returncode = returncode
+        self.stdout = stdout or ""
+        self.stderr = stderr or ""
+        self.cancelled = cancelled
+
+
+# ─────────────────────────── Runner ───────────────────────────
+
+class FFmpegRunner:
+    """
+    Run one command with drained pipes, structured progress and cancellation.
+
+    Args:
+        cmd: Command list
+        timeout: Seconds before the process is killed (None = no limit)
+        duration: Expected output duration for percent-complete; probed from
+            the first `-i` input when omitted and a progress callback is set
+        on_progress: Called with ProgressInfo for every ffmpeg progress block
+        should_stop: Predicate polled while waiting; True cancels the run
+        poll_interval: Seconds between should_stop/timeout checks
+        on_stdout: Called with raw stdout chunks (bytes) of a command that
+            writes to `-`/`pipe:`; stdout is then not collected. An exception
+            raised by the callback cancels the run and is re-raised by run().
+    """
+
+    def __init__(self, cmd, timeout=None, duration=None, on_progress=None,
+                 should_stop=None, poll_interval=0.1, on_stdout=None, **popen_kwargs):
+        self.cmd = [str(c) for c in cmd]
+        self.timeout = timeout
+        self.duration = duration
+        self.on_progress = on_progress
+        self.should_stop = should_stop
+        self.poll_interval = poll_interval
+        self.on_stdout = on_stdout
+        self.popen_kwargs = popen_kwargs
+        self.process = None
+        self.last_progress = None
+        self._cancelled = threading.Event()
+        self._stdout_lines = []
+        self._stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        self._stdout_error = None
+        self._progress_mode = _is_ffmpeg(self.cmd) and not _writes_stdout(self.cmd)
+
+    def _build_cmd(self):
+        if not self._progress_mode:
+            return self.cmd
+        return [self.cmd[0], "-progress", "pipe:1", "-nostats"] + self.cmd[1:]
+
+    def _pump_stdout(self, stream):
+        try:
+            for chunk in iter(lambda: stream.read(STDOUT_CHUNK_BYTES), b""):
+                self.on_stdout(chunk)
+        except Exception as e:
+            self._stdout_error = e
+            self.cancel()
+        finally:
+            stream.close()
+
+    def _read_stdout(self, stream):
+        if self.on_stdout is not None:
+            self._pump_stdout(stream)
+            return
+        block = {}
+        for line in iter(stream.readline, ""):
+            if not self._progress_mode:
+                self._stdout_lines.append(line)
+                continue
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                continue
+            block[key] = value
+            if key == "progress":
+                self._emit_progress(block, done=(value == "end"))
+                block = {}
+        stream.close()
+
+    def _read_stderr(self, stream):
+        binary = self.on_stdout is not None
+        for line in iter(stream.readline, b"" if binary else ""):
+            self._stderr_tail.append(line.decode("utf-8", "replace") if binary else line)
+        stream.close()
+
+    def _emit_progress(self, block, done):
+        out_time = None
+        for key in ("out_time_us", "out_time_ms"):  # both are microseconds
+            try:
+                out_time = int(block[key]) / 1_000_000
+                break
+            except (KeyError, ValueError):
+                continue
+        if out_time is None:
+            out_time = _parse_out_time(block.get("out_time"))
+        percent = None
+        if self.duration and out_time is not None:
+            percent = max(0.0, min(100.0, out_time / self.duration * 100))
+        if done:
+            percent = 100.0
+        try:
+            frame = int(block["frame"]) if "frame" in block else None
+        except ValueError:
+            frame = None
+        try:
+            fps = float(block["fps"]) if "fps" in block else None
+        except ValueError:
+            fps = None
+        speed = block.get("speed", "").strip() or None
+        progress = ProgressInfo(frame, fps, out_time, speed, percent, done)
+        self.last_progress = progress
+        if self.on_progress:
+            try:
+                self.on_progress(progress)
+            except Exception as e:
+                logging.debug(f"Progress callback failed: {e}")
+
+    def cancel(self):
+        """Terminate the process now; safe to call from any thread."""
+        self._cancelled.set()
+        proc = self.process
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self, check=True):
+        """
+        Run to completion.
+
+        Returns:
+            RunResult (with cancelled=True if stopped before finishing)
+
+        Raises:
+            subprocess.TimeoutExpired: timeout elapsed
+            subprocess.CalledProcessError: non-zero exit and check=True
+        """
+        if self._progress_mode and self.on_progress and self.duration is None:
+            source = _first_input(self.cmd)
+            self.duration = probe_duration(source) if source else None
+
+        kwargs = {
+            'stdin': subprocess.DEVNULL,
+            'stdout': subprocess.PIPE,
+            'stderr': subprocess.PIPE,
+            'text': True,
+            'encoding': 'utf-8',
+            'errors': 'replace',
+        }
+        if self.on_stdout is not None:
+            kwargs = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        kwargs.update(self.popen_kwargs)
+
+        self.process = subprocess.Popen(self._build_cmd(), **kwargs)
+        with _ACTIVE_LOCK:
+            _ACTIVE.add(self)
+        readers = [
+            threading.Thread(target=self._read_stdout, args=(self.process.stdout,), daemon=True),
+            threading.Thread(target=self._read_stderr, args=(self.process.stderr,), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        started = time.monotonic()
+        timed_out = False
+        try:
+            while True:
+                try:
+                    self.process.wait(timeout=self.poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if self.cancelled or (self.should_stop and self.should_stop()):
+                    self.cancel()
+                    break
+                if self.timeout and time.monotonic() - started > self.timeout:
+                    timed_out = True
+                    self.cancel()
+                    break
+        finally:
+            if self.process.poll() is None:
+                self.process.kill()
+                self.process.wait()
+            for reader in readers:
+                # A stdout consumer must see every byte, so wait for it to drain
+                reader.join(timeout=None if self.on_stdout is not None else 5)
+            with _ACTIVE_LOCK:
+                _ACTIVE.discard(self)
+
+        stdout = "".join(self._stdout_lines)
+        stderr = "".join(self._stderr_tail)
+        if self._stdout_error is not None:
+            raise self._stdout_error
+        if timed_out:
+            raise subprocess.TimeoutExpired(self.cmd, self.timeout, output=stdout, stderr=stderr)
+        if self.cancelled:
+            return RunResult(self.cmd, self.process.returncode, stdout, stderr, cancelled=True)
+        if check and self.process.returncode != 0:
+            raise subprocess.CalledProcessError(self.process.returncode, self.cmd, stdout, stderr)
+        return RunResult(self.cmd, self.process.returncode, stdout, stderr)
+
+
+def run_ffmpeg(cmd, timeout=None, check=True, **kwargs):
+    """Convenience wrapper: FFmpegRunner(cmd, ...).run(check)."""
+    return FFmpegRunner(cmd, timeout=timeout, **kwargs).run(check=check)
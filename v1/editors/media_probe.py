@@ -0,0 +1,394 @@
+"""
+Media Probe
+One ffprobe per file, cached.
+
+`probe(path)` runs a single `ffprobe -show_format -show_streams` (plus the
+packet flags of the first seconds, for the keyframe interval) and returns a
+MediaInfo record with everything the editors ask about: duration, codecs,
+resolution, frame rate, pixel format and audio layout. Records are cached in
+memory and on disk keyed by (path, size, mtime), so a file is probed once no
+matter how many helpers ask, and a modified file is probed again. Whole
+folders can be probed concurrently with `probe_folder`.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MEDIA_PROBE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".video_editor", "probe"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("MEDIA_PROBE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MEMORY_ENTRIES = int(os.environ.get("MEDIA_PROBE_MEMORY_ENTRIES", "4096"))
+PROBE_WORKERS = int(os.environ.get("MEDIA_PROBE_WORKERS", "8"))
+
+# Seconds of packets read to measure the keyframe interval (no decoding)
+KEYFRAME_SCAN_SECONDS = 20
+EVICT_EVERY = 256
+
+MEDIA_EXTENSIONS = (
+    ".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v", ".flv", ".wmv",
+    ".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg",
+)
+
+
+# ─────────────────────────── Record ───────────────────────────
+
+def _parse_rate(value: Optional[str]) -> Optional[float]:
+    try:
+        num, _, den = (value or "").partition("/")
+        rate = float(num) / float(den or 1)
+        return rate if rate > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        number = float(value)
+        return number if number > 0 else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MediaInfo:
+    """What one ffprobe run says about a media file."""
+
+    __slots__ = (
+        "path", "size", "mtime", "format_name", "duration", "bit_rate", "streams",
+        "vcodec", "width", "height", "fps", "frame_rate", "pix_fmt", "sar", "video_duration",
+        "keyframe_interval", "acodec", "sample_rate", "channels", "channel_layout",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+        if self.streams is None:
+            self.streams = []
+
+    @property
+    def has_video(self) -> bool:
+        return self.vcodec is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.acodec is not None
+
+    @property
+    def resolution(self) -> Optional[Tuple[int, int]]:
+        if self.width and self.height:
+            return self.width, self.height
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MediaInfo":
+        return cls(**data)
+
+    @classmethod
+    def from_ffprobe(cls, path: str, size: int, mtime: float, data: Dict[str, Any]) -> "MediaInfo":
+        fmt = data.get("format") or {}
+        streams = data.get("streams") or []
+        video = next((s for s in streams if s.get("codec_type") == "video"
+                      and not (s.get("disposition") or {}).get("attached_pic")), None)
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+        duration = _to_float(fmt.get("duration"))
+        if duration is None:
+            duration = max((_to_float(s.get("duration")) or 0.0 for s in streams), default=0.0) or None
+
+        info = cls(
+            path=path,
+            size=size,
+            mtime=mtime,
+            format_name=fmt.get("format_name"),
+            duration=duration,
+            bit_rate=_to_int(fmt.get("bit_rate")),
+            streams=[
+                {"index": s.get("index"), "type": s.get("codec_type"), "codec": s.get("codec_name")}
+                for s in streams
+            ],
+        )
+        if video:
+            info.vcodec = video.get("codec_name")
+            info.width = _to_int(video.get("width"))
+            info.height = _to_int(video.get("height"))
+            info.fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+            # Exact nominal rate as ffprobe spells it ("30000/1001"), for comparisons fps can't make
+            info.frame_rate = video.get("r_frame_rate") if _parse_rate(video.get("r_frame_rate")) else None
+            info.pix_fmt = video.get("pix_fmt")
+            info.sar = video.get("sample_aspect_ratio", "1:1")
+            info.video_duration = _to_float(video.get("duration"))
+            info.keyframe_interval = _keyframe_interval(data.get("packets") or [], video.get("index"))
+        if audio:
+            info.acodec = audio.get("codec_name")
+            info.sample_rate = _to_int(audio.get("sample_rate"))
+            info.channels = _to_int(audio.get("channels"))
+            info.channel_layout = audio.get("channel_layout")
+        return info
+
+    def __repr__(self):
+        return (f"MediaInfo({Path(str(self.path)).name!r}, {self.duration}s, "
+                f"{self.vcodec} {self.width}x{self.height}@{self.fps}, {self.acodec})")
+
+
+def _keyframe_interval(packets: List[Dict[str, Any]], video_index) -> Optional[float]:
+    """Median spacing in seconds between the keyframes seen in `packets`."""
+    times = []
+    for packet in packets:
+        if packet.get("stream_index") != video_index or "K" not in (packet.get("flags") or ""):
+            continue
+        try:
+            times.append(float(packet["pts_time"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    times.sort()
+    gaps = sorted(b - a for a, b in zip(times, times[1:]) if b > a)
+    if not gaps:
+        return None
+    return round(gaps[len(gaps) // 2], 3)
+
+
+# ─────────────────────────── Probing ───────────────────────────
+
+def run_ffprobe(path: str, timeout: int = 60) -> Optional[Dict[str, Any]]:
+    """Raw ffprobe JSON for `path` (format, streams, leading video packets), or None."""
+    cmd = [
+        "ffprobe", "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams",
+        "-show_entries", "packet=stream_index,pts_time,flags",
+        "-read_intervals", f"%+{KEYFRAME_SCAN_SECONDS}",
+        str(path),
+    ]
+    try:
+        res = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=timeout,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
+        )
+        if res.returncode != 0:
+            logger.debug("ffprobe failed for %s: %s", path, res.stderr.strip()[:200])
+            return None
+        return json.loads(res.stdout or "{}")
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.debug("ffprobe failed for %s: %s", path, e)
+        return None
+
+
+# ─────────────────────────── Cache ───────────────────────────
+
+class MediaProbe:
+    """ffprobe front end with an in-memory LRU and an on-disk cache of records."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 memory_entries: int = MEMORY_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, int, int], threading.Lock] = {}
+        self._stores_since_evict = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "probes": 0, "errors": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(path: str) -> Optional[Tuple[str, int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+    def _entry_path(self, key: Tuple[str, int, int]) -> Path:
+        blob = json.dumps([CACHE_VERSION, *key]).encode("utf-8")
+        return self.cache_dir / f"{hashlib.sha1(blob).hexdigest()}.json"
+
+    def _remember(self, key, info: MediaInfo) -> None:
+        with self._lock:
+            self._memory[key] = info
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, key) -> Optional[MediaInfo]:
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            info = MediaInfo.from_dict(data)
+        except (OSError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+        return info
+
+    def _store(self, key, info: MediaInfo) -> None:
+        entry = self._entry_path(key)
+        tmp = entry.with_name(f".{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(info.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp, entry)
+        except OSError as e:
+            logger.debug("Could not store probe cache entry: %s", e)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._stores_since_evict += 1
+            if self._stores_since_evict < EVICT_EVERY:
+                return
+            self._stores_since_evict = 0
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                with self._lock:
+                    self._stats["evictions"] += 1
+            except OSError:
+                pass
+
+    def probe(self, path, refresh: bool = False) -> Optional[MediaInfo]:
+        """MediaInfo for `path`, or None when it is missing or ffprobe cannot read it."""
+        path = str(path)
+        key = self._key(path)
+        if key is None:
+            return None
+
+        if not refresh:
+            with self._lock:
+                info = self._memory.get(key)
+                if info is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return info
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Callers racing on the same file share one ffprobe
+        with key_lock:
+            try:
+                if not refresh:
+                    with self._lock:
+                        info = self._memory.get(key)
+                    if info is not None:
+                        return info
+                    info = self._load(key)
+                    if info is not None:
+                        with self._lock:
+                            self._stats["disk_hits"] += 1
+                        self._remember(key, info)
+                        return info
+
+                data = run_ffprobe(path)
+                with self._lock:
+                    self._stats["probes"] += 1
+                if data is None:
+                    with self._lock:
+                        self._stats["errors"] += 1
+                    return None
+                info = MediaInfo.from_ffprobe(key[0], key[1], key[2] / 1e9, data)
+                self._remember(key, info)
+                self._store(key, info)
+                return info
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def probe_many(self, paths: Iterable, workers: int = PROBE_WORKERS) -> List[Optional[MediaInfo]]:
+        """Probe `paths` concurrently; results are in input order."""
+        paths = [str(p) for p in paths]
+        if len(paths) <= 1:
+            return [self.probe(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths))),
+                                thread_name_prefix="media-probe") as executor:
+            return list(executor.map(self.probe, paths))
+
+    def probe_folder(self, folder, recursive: bool = False,
+                     extensions: Iterable[str] = MEDIA_EXTENSIONS,
+                     workers: int = PROBE_WORKERS) -> Dict[str, Optional[MediaInfo]]:
+        """Probe every media file in `folder` (sorted by path) concurrently."""
+        extensions = tuple(e.lower() for e in extensions)
+        pattern = "**/*" if recursive else "*"
+        paths = sorted(
+            str(p) for p in Path(folder).glob(pattern)
+            if p.is_file() and p.suffix.lower() in extensions
+        )
+        return dict(zip(paths, self.probe_many(paths, workers)))
+
+    def duration(self, path) -> Optional[float]:
+        info = self.probe(path)
+        return info.duration if info else None
+
+    def forget(self, path) -> None:
+        """Drop `path` from the memory cache (disk entries expire with size/mtime)."""
+        prefix = os.path.abspath(str(path))
+        with self._lock:
+            for key in [k for k in self._memory if k[0] == prefix]:
+                del self._memory[key]
+
+    def clear(self) -> int:
+        with self._lock:
+            self._memory.clear()
+        removed = 0
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["memory_entries"] = len(self._memory)
+        snapshot["cache_dir"] = str(self.cache_dir)
+        return snapshot
+
+
+# Shared process-wide instance
+media_probe = MediaProbe()
@@ -0,0 +1,266 @@
+"""
+Music Bed Cache
+Decode, resample, loudness-match and volume-scale each background track
+once, and let every mix in every job reuse the result.
+
+A bed is the track rendered to PCM WAV at the mix sample rate and layout,
+with the optional loudness normalization and the music volume already
+applied. Mixing steps then read raw PCM (no MP3 decode, no resampler, no
+volume filter) and loop it with `-stream_loop -1`, which re-reads the file
+as the output needs it, so a bed of any length covers a video of any
+length. Beds are content-addressed by the SHA-256 of the track plus the
+render parameters and kept under a byte budget with least-recently-used
+eviction; beds handed to a caller stay pinned (never evicted) until the
+caller releases them.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, List, Callable
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MUSIC_BED_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".video_editor", "music_beds"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("MUSIC_BED_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Integrated loudness (LUFS) every bed is normalized to before the volume; unset = as mastered
+_LOUDNESS = os.environ.get("MUSIC_BED_LOUDNESS", "").strip()
+DEFAULT_LOUDNESS: Optional[float] = float(_LOUDNESS) if _LOUDNESS else None
+
+BED_SAMPLE_RATE = 44100
+BED_CHANNELS = 2
+
+Runner = Callable[[List[str]], Tuple[bool, str]]
+
+_HASH_CHUNK = 1024 * 1024
+HASH_MEMO_ENTRIES = 4096
+_hash_memo: "OrderedDict[Tuple[str, int, float], str]" = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+def _track_hash(path: str) -> str:
+    """SHA-256 of the track's bytes, memoized per (path, size, mtime)."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+        if cached:
+            _hash_memo.move_to_end(memo_key)
+            return cached
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_memo[memo_key] = value
+        while len(_hash_memo) > HASH_MEMO_ENTRIES:
+            _hash_memo.popitem(last=False)
+    return value
+
+
+def _run(cmd: List[str]) -> Tuple[bool, str]:
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                         text=True, encoding="utf-8", errors="replace")
+    return res.returncode == 0, res.stderr
+
+
+def build_bed_cmd(src: str, output_path: str, volume: float, sample_rate: int,
+                  channels: int, loudness: Optional[float]) -> List[str]:
+    """ffmpeg command rendering `src` to a bed WAV."""
+    filters = []
+    if loudness is not None:
+        filters.append(f"loudnorm=I={loudness:g}:TP=-1.5:LRA=11")
+    filters.append(f"volume={volume:g}")
+    return [
+        "ffmpeg", "-y", "-v", "error", "-i", src, "-map", "0:a:0", "-vn",
+        "-af", ",".join(filters), "-ar", str(sample_rate), "-ac", str(channels),
+        "-c:a", "pcm_s16le", output_path,
+    ]
+
+
+def loop_input_args(path: str) -> List[str]:
+    """Input arguments that play `path` on repeat; pair with amix `duration=first`."""
+    return ["-stream_loop", "-1", "-i", path]
+
+
+class MusicBedCache:
+    """
+    On-disk LRU cache of rendered music beds (recency tracked through file mtime).
+
+    Every path `get` returns is pinned for the caller, and eviction skips
+    pinned entries, so a bed can't be deleted by another job's store while
+    mixes still read it. Callers pass each returned path to `release` after
+    their last mix.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._pins: Dict[str, int] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def make_key(self, src: str, volume: float, sample_rate: int, channels: int,
+                 loudness: Optional[float]) -> str:
+        ident = {
+            "v": CACHE_VERSION,
+            "source": _track_hash(src),
+            "volume": round(float(volume), 4),
+            "rate": sample_rate,
+            "channels": channels,
+            "loudness": loudness,
+        }
+        return hashlib.sha256(json.dumps(ident, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.wav"
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _entries(self):
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for path in self.cache_dir.glob("*.wav"):
+            if path.name.startswith("."):  # render in progress
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _pin_locked(self, path: Path) -> str:
+        key = str(path)
+        self._pins[key] = self._pins.get(key, 0) + 1
+        return key
+
+    def release(self, path: Optional[str]) -> None:
+        """Unpin a path returned by `get` (no-op for None and unknown paths)."""
+        if not path:
+            return
+        with self._lock:
+            count = self._pins.get(str(path))
+            if count is None:
+                return
+            if count > 1:
+                self._pins[str(path)] = count - 1
+                return
+            del self._pins[str(path)]
+            # Entries kept only because they were pinned can go now
+            self._evict_locked()
+
+    def _evict_locked(self, keep: Optional[Path] = None) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep or str(path) in self._pins:
+                continue
+            try:
+                path.unlink()
+                total -= size
+                self._stats["evictions"] += 1
+            except OSError:
+                pass
+
+    def get(
+        self,
+        src: str,
+        volume: float = 1.0,
+        sample_rate: int = BED_SAMPLE_RATE,
+        channels: int = BED_CHANNELS,
+        loudness: Optional[float] = DEFAULT_LOUDNESS,
+        runner: Optional[Runner] = None,
+    ) -> Optional[str]:
+        """
+        Path of the bed for `src` at these settings, rendering it on first use.
+        The volume is baked in, so mix the bed at unity gain. The bed stays
+        pinned until the caller passes the path to `release`.
+
+        Returns:
+            WAV path, or None when the track can't be rendered (mix the
+            original track with a volume filter instead)
+        """
+        try:
+            key = self.make_key(src, volume, sample_rate, channels, loudness)
+        except OSError as e:
+            logger.warning("Music bed unavailable for %s: %s", src, e)
+            return None
+        entry = self._entry_path(key)
+        # One render per key even when several outputs ask for the same bed at once
+        with self._key_lock(key):
+            if entry.exists():
+                try:
+                    os.utime(entry, None)
+                except OSError:
+                    pass
+                with self._lock:
+                    self._stats["hits"] += 1
+                    return self._pin_locked(entry)
+
+            with self._lock:
+                self._stats["misses"] += 1
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp.wav"
+            cmd = build_bed_cmd(src, str(tmp), volume, sample_rate, channels, loudness)
+            ok, err = (runner or _run)(cmd)
+            if not ok or not tmp.exists() or tmp.stat().st_size == 0:
+                with self._lock:
+                    self._stats["errors"] += 1
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+                logger.warning("Could not render music bed for %s: %s", src, (err or "no output").strip()[-300:])
+                return None
+            os.replace(tmp, entry)
+            with self._lock:
+                self._stats["stores"] += 1
+                pinned = self._pin_locked(entry)
+                self._evict_locked(keep=entry)
+            logger.info("Rendered music bed for %s (volume %g)", os.path.basename(src), volume)
+            return pinned
+
+    def clear(self) -> int:
+        removed = 0
+        with self._lock:
+            for _, _, path in self._entries():
+                if str(path) in self._pins:
+                    continue
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            entries = self._entries()
+        snapshot["entries"] = len(entries)
+        snapshot["pinned"] = len(self._pins)
+        snapshot["bytes"] = sum(size for _, size, _ in entries)
+        snapshot["max_bytes"] = self.max_bytes
+        snapshot["cache_dir"] = str(self.cache_dir)
+        return snapshot
+
+
+# Shared process-wide instance
+music_beds = MusicBedCache()
@@ -1,5 +1,4 @@
 import os
-import subprocess
 import json
 import threading
 import queue
@@ -9,10 +8,16 @@ import logging
 from tkinter import ttk, filedialog, messagebox, colorchooser
 import tkinter as tk
 from faster_whisper import WhisperModel
-import time
 import tempfile
-import traceback
 import random
+from transcript_cache import transcript_cache, audio_fingerprint
+from ffmpeg_runner import FFmpegRunner, probe_duration
+from media_probe import media_probe
+from encoder_caps import encoder_registry
+from audio_frontend import decode_pcm, SilenceDetector
+from silence_cut import plan_cuts, detect_silence
+from ducking import build_ducking_curve
+from music_bed import music_beds, loop_input_args
 
 # --- Custom Logging Handler ---
 
@@ -55,6 +60,8 @@ class VideoProcessorGUI:
         self.load_video_titles()
         self.setup_ui()
         self.check_progress()
+        # Detect encoders while the user picks files (cached on disk after the first run)
+        threading.Thread(target=encoder_registry.get, daemon=True).start()
 
     def setup_logging(self):
         logger = logging.getLogger()
@@ -833,6 +840,7 @@ class OptimizedVideoProcessor:
         self.progress_queue = progress_queue
         self.video_title_map = video_title_map
         self.whisper_model = None
+        self.whisper_model_name = None
         self.stop_event = stop_event
         self.font_families = [
             "Impact", "Arial Black", "Comic Sans MS", "Times New Roman",
@@ -859,15 +867,18 @@ class OptimizedVideoProcessor:
             logging.info("🧠 Loading Whisper model...", extra={'is_status': True})
             try:
                 self.whisper_model = WhisperModel("large-v3", compute_type="int8")
+                self.whisper_model_name = "large-v3"
                 logging.info("✅ Loaded large-v3 Whisper model")
             except Exception as e:
                 logging.warning(f"⚠️ Could not load 'large-v3' model, trying 'small'. Reason: {e}")
                 try:
                     self.whisper_model = WhisperModel("small", compute_type="int8")
+                    self.whisper_model_name = "small"
                     logging.info("✅ Loaded small Whisper model")
                 except Exception as e2:
                     logging.warning(f"⚠️ Could not load 'small' model, falling back to 'tiny'. Reason: {e2}")
                     self.whisper_model = WhisperModel("tiny", device="cpu", compute_type="int8")
+                    self.whisper_model_name = "tiny"
                     logging.info("✅ Loaded tiny Whisper model")
         return self.whisper_model
 
@@ -1013,47 +1024,61 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             raise
 
     def check_ffmpeg_availability(self):
+        if getattr(self, "_tools_checked", False):
+            return True
         missing_tools = []
-        try:
-            result = subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, text=True, timeout=10)
-            logging.info("✅ FFmpeg is available")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        caps = encoder_registry.get()
+        if caps.ffmpeg_available:
+            logging.info(f"✅ FFmpeg is available ({'GPU h264_nvenc' if caps.gpu_available else 'CPU libx264'} encoding)")
+        else:
             missing_tools.append("FFmpeg")
-        try:
-            result = subprocess.run(["auto-editor", "--version"], capture_output=True, check=True, text=True, timeout=10)
-            logging.info("✅ auto-editor is available")
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            missing_tools.append("auto-editor")
         if missing_tools:
             raise Exception(f"Required tools not found: {', '.join(missing_tools)}. Please install them and ensure they are in your system's PATH.")
+        self._tools_checked = True
         return True
 
-    def transcribe_audio_optimized(self, audio_path):
+    def transcribe_audio_optimized(self, audio_path, analyzers=()):
+        # `analyzers` are fed from the transcription decode; a cached transcript leaves them empty
         try:
             if self.check_stop():
                 return []
             if not os.path.exists(audio_path):
                 logging.error(f"Audio file not found: {audio_path}")
                 return []
+            decode_params = {"beam_size": 1, "best_of": 1, "word_timestamps": True, "condition_on_previous_text": False}
+            # Before a model is loaded we don't know which fallback will win, so
+            # accept a cached transcript from any model in preference order.
+            fingerprint = audio_fingerprint(audio_path)
+            model_names = [self.whisper_model_name] if self.whisper_model_name else ["large-v3", "small", "tiny"]
+            for model_name in model_names:
+                cached = transcript_cache.get_words(transcript_cache.key_for(fingerprint, model_name, "en", **decode_params))
+                if cached is not None:
+                    logging.info(f"♻️ Reusing cached transcript ({model_name}): {len(cached)} words")
+                    return cached
             logging.info(f"🧠 Transcribing: {os.path.basename(audio_path)}", extra={'is_status': True})
             model = self.get_whisper_model()
-            segments, _ = model.transcribe(
-                audio_path, beam_size=1, best_of=1, word_timestamps=True,
-                language="en", condition_on_previous_text=False
-            )
-            words = []
-            for segment in segments:
-                if self.check_stop():
-                    break
-                if hasattr(segment, 'words') and segment.words:
-                    for w in segment.words:
-                        if w.word and w.word.strip():
-                            words.append({
-                                "word": w.word.strip(),
-                                "start": max(0, w.start),
-                                "end": max(w.start, w.end),
-                                "confidence": getattr(w, 'probability', 0.5)
-                            })
+            # Decode the audio once into memory and hand Whisper the samples;
+            # segments are generated lazily, so consume them inside the block
+            with decode_pcm(audio_path, should_stop=self.check_stop, analyzers=analyzers) as pcm:
+                if not pcm.duration:
+                    logging.warning(f"⚠️ No audio in {os.path.basename(audio_path)}; skipping transcription")
+                    return []
+                segments, _ = model.transcribe(pcm.samples, language="en", **decode_params)
+                words = []
+                for segment in segments:
+                    if self.check_stop():
+                        break
+                    if hasattr(segment, 'words') and segment.words:
+                        for w in segment.words:
+                            if w.word and w.word.strip():
+                                words.append({
+                                    "word": w.word.strip(),
+                                    "start": max(0, w.start),
+                                    "end": max(w.start, w.end),
+                                    "confidence": getattr(w, 'probability', 0.5)
+                                })
+            if not self.check_stop():
+                transcript_cache.put_words(transcript_cache.key_for(fingerprint, self.whisper_model_name, "en", **decode_params), words)
             logging.info(f"✅ Transcribed {len(words)} words with speech recognition confidence")
             return words
         except Exception as e:
@@ -1096,146 +1121,224 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             logging.error(f"❌ Failed to copy video: {copy_error}")
             raise
 
-    def run_subprocess_with_timeout(self, cmd, timeout=None, check_stop_interval=1):
+    def run_subprocess_with_timeout(self, cmd, timeout=None, check_stop_interval=0.1, on_progress=None, duration=None):
         try:
-            process = subprocess.Popen(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            )
-            start_time = time.time()
-            while process.poll() is None:
-                if self.check_stop():
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    return None
-                if timeout and (time.time() - start_time) > timeout:
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    raise subprocess.TimeoutExpired(cmd, timeout)
-                time.sleep(check_stop_interval)
-            if process.returncode != 0:
-                stderr_output = process.stderr.read()
-                raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr_output)
-            return process
-        except Exception as e:
+            result = FFmpegRunner(
+                cmd, timeout=timeout, duration=duration, on_progress=on_progress,
+                should_stop=self.check_stop, poll_interval=check_stop_interval
+            ).run()
+            return None if result.cancelled else result
+        except Exception:
             if self.check_stop():
                 return None
             raise
 
-    def add_background_music_with_ducking(self, video_path, music_path, output_path, words, volume=0.15, enable_ducking=True):
-        if self.check_stop():
-            return False
+    def report_video_progress(self, progress):
+        # Map one video's render progress onto the overall batch bar.
+        index, total = getattr(self, "_batch_position", (0, 1))
+        if progress.percent is not None:
+            self.update_progress((index + progress.percent / 100.0) / total * 100)
+
+    def get_video_dimensions(self, video_path):
+        info = media_probe.probe(video_path)
+        if info is None or not info.has_video:
+            logging.warning(f"⚠️ Could not read video size: {video_path}")
+            return None, None
+        return info.width, info.height
+
+    def gpu_encoder_available(self):
+        return encoder_registry.get().gpu_available
+
+    def plan_silence_cuts(self, video_path, silence, words):
+        """CutList removing the silent parts (None when there is nothing to cut)."""
         try:
-            logging.info(f"🎵 Adding background music: {os.path.basename(music_path)}", extra={'is_status': True})
-            for file_path, file_type in [(video_path, "Video"), (music_path, "Music")]:
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"{file_type} file not found: {file_path}")
-            if not enable_ducking or not words:
-                logging.info("🎵 Adding music without ducking...")
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
-                    "-stream_loop", "-1", "-i", music_path,
-                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a][music]amix=inputs=2:duration=first:dropout_transition=2[audio_out]",
-                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
-                ]
+            if not len(silence.envelope_db):
+                # Cached transcript: nothing was decoded to tee the envelope from
+                silence = detect_silence(video_path, should_stop=self.check_stop)
+            duration = probe_duration(video_path) or len(silence.envelope_db) * silence.frame_seconds
+            cuts = plan_cuts(silence, words, duration)
+        except Exception as e:
+            if not self.check_stop():
+                logging.warning(f"⚠️ Silence detection failed: {e}. Using original video.")
+            return None
+        if cuts.is_noop:
+            logging.info("ℹ️ No silent parts worth cutting.")
+            return None
+        logging.info(f"✂️ Silence cut: {cuts.summary()}")
+        return cuts
+
+    def plan_render(self, video_path, ass_path, background_music, ducking, extra_video, cuts=None):
+        """
+        Collect the enabled steps for one video; every step lands in a single ffmpeg pass.
+        `ducking` is the DuckingCurve for the music (None mixes it at a flat volume).
+        """
+        info = media_probe.probe(video_path)
+        plan = {
+            "cuts": cuts,
+            "subtitles": str(ass_path) if ass_path else None,
+            "music": background_music,
+            "ducking": ducking,
+            "extra": extra_video,
+            "size": (None, None),
+            "duration": cuts.duration if cuts else probe_duration(video_path),
+            # Unknown (probe failed) is treated as having audio, like before
+            "audio": info.has_audio if info else True,
+        }
+        if extra_video:
+            plan["size"] = self.get_video_dimensions(video_path)
+            extra_info = media_probe.probe(extra_video)
+            plan["extra_audio"] = extra_info.has_audio if extra_info else True
+        return plan
+
+    def describe_plan(self, plan):
+        steps = []
+        if plan["cuts"]:
+            steps.append("silence cut")
+        if plan["subtitles"]:
+            steps.append("subtitles")
+        if plan["music"]:
+            steps.append("ducked music" if plan["ducking"] else "music")
+        if plan["extra"]:
+            steps.append("merge")
+        if not steps:
+            return "no edits (copy)"
+        encodes = "1 encode" if plan["cuts"] or plan["subtitles"] or plan["extra"] else "audio-only encode, video copied"
+        return f"{' + '.join(steps)} → {encodes}"
+
+    def build_render_command(self, video_path, plan, output_path, quality_preset, use_gpu, music_volume):
+        inputs = ["-i", str(video_path)]
+        filters = []
+        v_label, a_label = "0:v:0", "0:a:0"
+        next_input = 1
+        open_ended = False
+        if not plan["audio"]:
+            if plan["music"] or plan["extra"]:
+                # Silent source: a silent track of the same length stands in for its audio
+                length = media_probe.duration(video_path)
+                open_ended = not length
+                trim = f",atrim=duration={length:.3f}" if length else ""
+                filters.append(f"anullsrc=r=44100:cl=stereo{trim}[asilent]")
+                a_label = "asilent"
             else:
-                logging.info("🎵 Adding music with smart ducking based on speech recognition...")
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "warning", "-i", video_path,
-                    "-stream_loop", "-1", "-i", music_path,
-                    "-filter_complex", f"[1:a]volume={volume}[music];[0:a]asplit[original][sidechain];[music][sidechain]sidechaincompress=threshold=0.003:ratio=20:attack=5:release=50[ducked_music];[original][ducked_music]amix=inputs=2:duration=first[audio_out]",
-                    "-map", "0:v", "-map", "[audio_out]", "-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-shortest", output_path
-                ]
-            process = self.run_subprocess_with_timeout(cmd, timeout=3600)
-            if process is None:
-                return False
-            if os.path.exists(output_path):
-                size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                logging.info(f"✅ Background music added successfully with speech-aware ducking (Size: {size_mb:.1f}MB)")
-                return True
+                a_label = None
+        if plan["cuts"]:
+            # Cut first so every later step (subtitles, music, merge) sees the shortened timeline
+            filters += plan["cuts"].filters(v_label, a_label, "vcut", "acut")
+            v_label = "vcut"
+            if a_label:
+                a_label = "acut"
+        if plan["subtitles"]:
+            ass_escaped = plan["subtitles"].replace("\\", "/").replace(":", "\\:")
+            filters.append(f"[{v_label}]ass='{ass_escaped}'[vsub]")
+            v_label = "vsub"
+        if plan["music"]:
+            inputs += loop_input_args(str(plan["music"]))
+            music_idx = next_input
+            next_input += 1
+            if plan["ducking"]:
+                # Gain automation from the word timestamps replaces the sidechain compressor
+                filters.append(f"[{music_idx}:a:0]{plan['ducking'].filter()}[ducked_music]")
+                filters.append(f"[{a_label}][ducked_music]amix=inputs=2:duration=first[amixed]")
             else:
-                raise Exception("Output file was not created")
-        except Exception as e:
+                filters.append(f"[{music_idx}:a:0]volume={music_volume}[music]")
+                filters.append(f"[{a_label}][music]amix=inputs=2:duration=first:dropout_transition=2[amixed]")
+            a_label = "amixed"
+        if plan["extra"]:
+            inputs += ["-i", str(plan["extra"])]
+            extra_idx = next_input
+            next_input += 1
+            width, height = plan["size"]
+            fit = f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2," if width and height else ""
+            filters.append(f"[{v_label}]fps=30,setsar=1[v0]")
+            filters.append(f"[{extra_idx}:v:0]{fit}fps=30,setsar=1[v1]")
+            filters.append(f"[{a_label}]aresample=44100,aformat=channel_layouts=stereo[a0]")
+            extra_length = None if plan.get("extra_audio", True) else media_probe.duration(plan["extra"])
+            if extra_length:
+                filters.append(f"anullsrc=r=44100:cl=stereo,atrim=duration={extra_length:.3f}[a1]")
+            else:
+                filters.append(f"[{extra_idx}:a:0]aresample=44100,aformat=channel_layouts=stereo[a1]")
+            filters.append("[v0][a0][v1][a1]concat=n=2:v=1:a=1[vcat][acat]")
+            v_label, a_label = "vcat", "acat"
+
+        def map_arg(label):
+            return label if ":" in label else f"[{label}]"
+
+        cmd = ["ffmpeg", "-y", "-loglevel", "error"] + inputs
+        if filters:
+            cmd += ["-filter_complex", ";".join(filters)]
+        cmd += ["-map", map_arg(v_label)]
+        cmd += ["-map", map_arg(a_label)] if a_label else ["-an"]
+        if plan["cuts"] or plan["subtitles"] or plan["extra"]:
+            if use_gpu and self.gpu_encoder_available():
+                cmd += ["-c:v", "h264_nvenc", "-preset", quality_preset]
+                logging.info("🚀 Using GPU (h264_nvenc) acceleration.")
+            else:
+                if use_gpu:
+                    logging.warning("⚠️ GPU (h264_nvenc) not available, falling back to CPU (libx264).")
+                cmd += ["-c:v", "libx264", "-preset", quality_preset, "-crf", "23"]
+        else:
+            cmd += ["-c:v", "copy"]
+        if a_label and (plan["cuts"] or plan["music"] or plan["extra"]):
+            cmd += ["-c:a", "aac", "-b:a", "192k"]
+        elif a_label:
+            cmd += ["-c:a", "copy"]
+        if open_ended:
+            cmd += ["-shortest"]
+        cmd += ["-avoid_negative_ts", "make_zero", str(output_path)]
+        return cmd
+
+    def render_plan(self, video_path, plan, output_path, quality_preset, use_gpu, music_volume):
+        # If the combined graph fails on NVENC, first retry the whole plan on
+        # libx264 (session limits and driver errors only show up at encode
+        # time). Then retry on CPU without the optional steps in the order the
+        # old chained pipeline would have skipped them. The cut goes last:
+        # subtitles are timed for the cut timeline.
+        steps = ("music", "extra", "subtitles", "cuts")
+        encodes_video = plan["cuts"] or plan["subtitles"] or plan["extra"]
+        gpu = bool(use_gpu and encodes_video and self.gpu_encoder_available())
+        attempts = [(plan, gpu)]
+        if gpu:
+            attempts.append((plan, False))
+        for step in steps:
+            current = attempts[-1][0]
+            if current[step]:
+                stripped = dict(current, **{step: None})
+                if step == "cuts":
+                    stripped["duration"] = probe_duration(video_path)
+                attempts.append((stripped, False))
+        for i, (attempt, attempt_gpu) in enumerate(attempts):
             if self.check_stop():
                 return False
-            logging.warning(f"⚠️ Music processing failed: {e}. Continuing without background music.")
-            try:
-                self._copy_file_safely(video_path, output_path)
-                return False
-            except Exception as copy_error:
-                logging.error(f"❌ Failed to copy video after music failure: {copy_error}")
-                raise
-
-    def merge_videos_fast(self, main_video, extra_video, output_path):
-        if self.check_stop():
-            return
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir = Path(temp_dir)
-            concat_file = temp_dir / "concat_list.txt"
-            temp_main = temp_dir / "temp_main.mp4"
-            temp_extra = temp_dir / "temp_extra.mp4"
+            if not (attempt["cuts"] or attempt["subtitles"] or attempt["music"] or attempt["extra"]):
+                self._copy_file_safely(str(video_path), str(output_path))
+                return True
+            logging.info(f"🎬 Rendering: {self.describe_plan(attempt)}", extra={'is_status': True})
+            cmd = self.build_render_command(video_path, attempt, output_path, quality_preset, attempt_gpu, music_volume)
             try:
-                logging.info("🔄 Preparing videos for merge...", extra={'is_status': True})
-                for input_vid, output_vid in [(main_video, temp_main), (extra_video, temp_extra)]:
-                    if self.check_stop():
-                        return
-                    cmd = [
-                        "ffmpeg", "-y", "-loglevel", "error", "-i", str(input_vid),
-                        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-                        "-c:a", "aac", "-ar", "44100", "-ac", "2", "-b:a", "128k",
-                        "-r", "30", "-vsync", "cfr", str(output_vid)
-                    ]
-                    process = self.run_subprocess_with_timeout(cmd, timeout=1800)
-                    if process is None:
-                        return
-                    if not os.path.exists(output_vid):
-                        raise Exception(f"Failed to normalize video: {input_vid}")
-                if self.check_stop():
-                    return
-                with open(concat_file, "w", encoding="utf-8") as f:
-                    f.write(f"file '{os.path.abspath(temp_main).replace(os.sep, '/')}'\n")
-                    f.write(f"file '{os.path.abspath(temp_extra).replace(os.sep, '/')}'\n")
-                logging.info("🔗 Merging normalized videos...", extra={'is_status': True})
-                cmd = [
-                    "ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
-                    "-i", str(concat_file), "-c", "copy", "-avoid_negative_ts", "make_zero", output_path
-                ]
-                try:
-                    process = self.run_subprocess_with_timeout(cmd, timeout=1800)
-                    if process is None:
-                        return
-                    if not os.path.exists(output_path):
-                        raise Exception("Concat method failed")
-                except Exception:
-                    if self.check_stop():
-                        return
-                    logging.warning("⚠️ Fallback merge method used.")
-                    cmd_fallback = [
-                        "ffmpeg", "-y", "-loglevel", "error", "-i", str(temp_main), "-i", str(temp_extra),
-                        "-filter_complex", "[0:v:0][0:a:0][1:v:0][1:a:0]concat=n=2:v=1:a=1[outv][outa]",
-                        "-map", "[outv]", "-map", "[outa]", "-c:v", "libx264", "-preset", "fast",
-                        "-c:a", "aac", "-b:a", "128k", "-avoid_negative_ts", "make_zero", output_path
-                    ]
-                    process = self.run_subprocess_with_timeout(cmd_fallback, timeout=1800)
-                    if process is None:
-                        return
-                    if not os.path.exists(output_path):
-                        raise Exception("Both merge methods failed")
-                logging.info("✅ Videos merged successfully")
+                duration = attempt["duration"]
+                if duration and attempt["extra"]:
+                    extra_duration = probe_duration(attempt["extra"])
+                    duration = duration + extra_duration if extra_duration else None
+                process = self.run_subprocess_with_timeout(
+                    cmd, timeout=3600, on_progress=self.report_video_progress, duration=duration
+                )
+                if process is None:
+                    return False
+                if not os.path.exists(output_path):
+                    raise Exception("Render did not create output file")
+                return True
             except Exception as e:
                 if self.check_stop():
-                    return
-                logging.error(f"❌ Video merging failed: {e}", exc_info=True)
-                raise
+                    return False
+                if i + 1 == len(attempts):
+                    raise
+                retry = attempts[i + 1][0]
+                if retry is attempt:
+                    logging.warning(f"⚠️ GPU render failed: {e}. Retrying on CPU (libx264).")
+                    continue
+                dropped = next(step for step in steps if attempt[step] and not retry[step])
+                logging.warning(f"⚠️ Render failed: {e}. Retrying without {dropped}.")
+        return False
 
     def process_single_video(self, input_video, output_path, extra_video, background_music,
                            quality_preset, use_gpu, music_volume, enable_ducking,
@@ -1246,54 +1349,32 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         clean_name = "".join(c for c in base_name if c.isalnum() or c in (' ', '-', '_')).rstrip() or f"video_{hash(base_name)}"
         with tempfile.TemporaryDirectory() as temp_dir_str:
             temp_dir = Path(temp_dir_str)
-            auto_edited = temp_dir / f"auto_{clean_name}.mp4"
-            audio_path = temp_dir / f"audio_{clean_name}.wav"
             ass_path = temp_dir / f"subs_{clean_name}.ass"
-            final_with_subs = temp_dir / f"subs_{clean_name}.mp4"
-            final_with_music = temp_dir / f"music_{clean_name}.mp4"
-            merged_output = temp_dir / f"merged_{clean_name}.mp4"
             try:
                 if self.check_stop():
                     return
                 self.check_ffmpeg_availability()
                 current_video_path = Path(input_video)
-                if enable_auto_edit:
-                    logging.info(f"✂️ Auto-editing: {os.path.basename(input_video)}", extra={'is_status': True})
-                    try:
-                        cmd = ["auto-editor", str(input_video), "-o", str(auto_edited), "--no-open", "--frame-rate", "30", "--silent-speed", "99999", "--video-codec", "libx264"]
-                        process = self.run_subprocess_with_timeout(cmd, timeout=1800)
-                        if process is None:
-                            return
-                        if os.path.exists(auto_edited):
-                            logging.info("✅ Auto-editing completed.")
-                            current_video_path = auto_edited
-                        else:
-                            raise Exception("Auto-editor did not create output file")
-                    except Exception as e:
-                        if self.check_stop():
-                            return
-                        logging.warning(f"⚠️ Auto-editor issue: {e}. Using original video.")
-                        shutil.copy2(input_video, auto_edited)
-                        current_video_path = auto_edited
-                else:
-                    logging.info("ℹ️ Auto-editing disabled, using original video.")
-                    shutil.copy2(input_video, auto_edited)
-                    current_video_path = auto_edited
-                if self.check_stop():
-                    return
-                logging.info("🔊 Extracting audio for transcription...", extra={'is_status': True})
-                cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(current_video_path), "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", str(audio_path)]
-                process = self.run_subprocess_with_timeout(cmd, timeout=600)
-                if process is None:
-                    return
-                if not os.path.exists(audio_path):
-                    raise Exception("Failed to extract audio")
-                if self.check_stop():
-                    return
+                # The audio track is decoded straight from the container into memory,
+                # so there is no separate WAV extraction pass. With auto-edit on, the
+                # silence envelope is measured from that same decode.
+                silence = SilenceDetector() if enable_auto_edit else None
                 logging.info("🧠 Performing enhanced speech recognition...", extra={'is_status': True})
-                words = self.transcribe_audio_optimized(str(audio_path))
+                words = self.transcribe_audio_optimized(str(current_video_path), analyzers=[silence] if silence else ())
                 if self.check_stop():
                     return
+                cuts = None
+                if enable_auto_edit:
+                    # Silent parts are cut inside the final render; subtitles follow the cut timeline
+                    logging.info(f"✂️ Finding silent parts: {os.path.basename(input_video)}", extra={'is_status': True})
+                    cuts = self.plan_silence_cuts(str(current_video_path), silence, words)
+                    if self.check_stop():
+                        return
+                    if cuts:
+                        words = cuts.remap_words(words)
+                else:
+                    logging.info("ℹ️ Auto-editing disabled, using original video.")
+                subtitles = None
                 if words:
                     try:
                         self.generate_ass_subtitles_enhanced(words, str(ass_path), subtitle_settings)
@@ -1305,59 +1386,36 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                             "mixed": "mixed font styles with creative effects"
                         }[subtitle_settings['mode']]
                         border_text = " with speech recognition border boxes" if subtitle_settings['enable_borders'] else ""
-                        logging.info(f"📝 Adding {mode_text} enhanced subtitles{border_text}...", extra={'is_status': True})
-                        subtitle_filter = f"ass='{str(ass_path).replace('\\', '/').replace(':', '\\:')}'"
-                        ffmpeg_cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(current_video_path), "-vf", subtitle_filter]
-                        if use_gpu:
-                            try:
-                                test_cmd = ["ffmpeg", "-f", "lavfi", "-i", "nullsrc", "-c:v", "h264_nvenc", "-t", "1", "-f", "null", "-"]
-                                test_process = subprocess.run(test_cmd, capture_output=True, check=True, timeout=10)
-                                ffmpeg_cmd.extend(["-c:v", "h264_nvenc", "-preset", quality_preset])
-                                logging.info("🚀 Using GPU (h264_nvenc) acceleration.")
-                            except Exception:
-                                logging.warning("⚠️ GPU (h264_nvenc) not available, falling back to CPU (libx264).")
-                                ffmpeg_cmd.extend(["-c:v", "libx264", "-preset", quality_preset, "-crf", "23"])
-                        else:
-                            ffmpeg_cmd.extend(["-c:v", "libx264", "-preset", quality_preset, "-crf", "23"])
-                        ffmpeg_cmd.extend(["-c:a", "copy", str(final_with_subs)])
-                        process = self.run_subprocess_with_timeout(ffmpeg_cmd, timeout=3600)
-                        if process is None:
-                            return
-                        if os.path.exists(final_with_subs):
-                            current_video_path = final_with_subs
-                            logging.info(f"✅ Enhanced {mode_text} subtitles with speech recognition added successfully.")
-                        else:
-                            raise Exception("Subtitle processing failed to create output")
+                        logging.info(f"📝 Adding {mode_text} enhanced subtitles{border_text}...")
+                        subtitles = ass_path
                     except Exception as e:
                         if self.check_stop():
                             return
                         logging.warning(f"⚠️ Enhanced subtitle processing failed: {e}")
-                if self.check_stop():
-                    return
-                if background_music and os.path.exists(background_music):
-                    success = self.add_background_music_with_ducking(str(current_video_path), background_music, str(final_with_music), words, music_volume, enable_ducking)
-                    if success and not self.check_stop():
-                        current_video_path = final_with_music
-                else:
+                music = background_music if background_music and os.path.exists(background_music) else None
+                mix_volume = music_volume
+                bed = None
+                if not music:
                     logging.info("ℹ️ No background music selected, skipping step.")
-                if self.check_stop():
+                else:
+                    # Decoded, resampled and volume-scaled once for the whole batch
+                    bed = music_beds.get(music, music_volume)
+                    if bed:
+                        music, mix_volume = bed, 1.0
+                extra = extra_video if extra_video and os.path.exists(extra_video) else None
+                if extra:
+                    logging.info(f"🔗 Merging with extra video: {os.path.basename(extra_video)}")
+                # Words are on the output timeline (after any silence cut), like the music
+                ducking = build_ducking_curve(words, mix_volume) if music and enable_ducking and words else None
+                if ducking:
+                    logging.info(f"🎚️ Music ducking: {ducking.summary()}")
+                plan = self.plan_render(current_video_path, subtitles, music, ducking, extra, cuts)
+                try:
+                    rendered = self.render_plan(current_video_path, plan, output_path, quality_preset, use_gpu, mix_volume)
+                finally:
+                    music_beds.release(bed)
+                if not rendered:
                     return
-                if extra_video and os.path.exists(extra_video):
-                    logging.info(f"🔗 Merging with extra video: {os.path.basename(extra_video)}", extra={'is_status': True})
-                    try:
-                        self.merge_videos_fast(str(current_video_path), extra_video, str(merged_output))
-                        if self.check_stop():
-                            return
-                        if os.path.exists(merged_output):
-                            current_video_path = merged_output
-                            logging.info("✅ Video merging completed successfully.")
-                        else:
-                            raise Exception("Video merging failed to create output")
-                    except Exception as e:
-                        if self.check_stop():
-                            return
-                        logging.warning(f"⚠️ Video merging failed: {e}. Using processed video without merging.")
-                self._copy_file_safely(str(current_video_path), output_path)
                 if os.path.exists(output_path):
                     size_mb = os.path.getsize(output_path) / (1024 * 1024)
                     logging.info(f"✅ Video processed successfully: {os.path.basename(output_path)} (Size: {size_mb:.1f}MB)")
@@ -1386,6 +1444,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                         output_path = os.path.join(output_dir, f"{clean_name}_processed_{counter}.mp4")
                         counter += 1
                 logging.info(f"📽️ Processing video {i+1}/{total_videos}: {os.path.basename(input_video)}", extra={'is_status': True})
+                self._batch_position = (i, total_videos)
                 self.process_single_video(
                     input_video, output_path, extra_video, background_music,
                     quality_preset, use_gpu, music_volume, enable_ducking,
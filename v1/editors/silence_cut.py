@@ -0,0 +1,196 @@
+"""
+Silence Cut
+Built-in replacement for `auto-editor --silent-speed 99999`: decide which
+parts of a clip to keep from its audio envelope and the word timestamps, and
+express the cuts as filters for the render that already happens.
+
+The RMS envelope comes from the audio front end's SilenceDetector, teed off
+the same decode that feeds Whisper, so finding the cuts costs no extra pass.
+Frames louder than the threshold are kept with a little margin on either
+side, every transcribed word is kept whole, and quiet gaps shorter than
+MIN_CUT_SECONDS are left in so speech is not chopped between syllables.
+Each kept range is trimmed with its timestamps restarted and the ranges are
+concatenated at the head of the final filter graph, so audio and video
+realign at every seam. Long clips with many pauses are coarsened (only the
+longest pauses are cut) to at most MAX_CUT_RANGES ranges, which keeps the
+graph well within command-line limits. Subtitle times are remapped onto the
+shortened timeline, so trimming adds no encode pass of its own.
+"""
+
+import os
+import bisect
+import logging
+
+import numpy as np
+
+from audio_frontend import decode_pcm, SilenceDetector
+
+logger = logging.getLogger(__name__)
+
+# Quiet = this many dB below the loudest envelope frame (auto-editor's default
+# 4% amplitude threshold is about -28 dB)
+SILENCE_THRESHOLD_DB = float(os.environ.get("SILENCE_THRESHOLD_DB", "-28"))
+# Never treat anything louder than this as silence, however loud the peak
+SILENCE_FLOOR_DB = -60.0
+# Quiet gaps shorter than this stay in
+MIN_CUT_SECONDS = float(os.environ.get("SILENCE_MIN_CUT_SECONDS", "0.4"))
+# Kept around loud frames and words so cuts don't clip onsets and tails
+SPEECH_MARGIN = 0.15
+# Each kept range adds ~180 characters of trim chains to the graph; 100 stay
+# around 18 KB, well under the 32767-character Windows command-line limit
+MAX_CUT_RANGES = 100
+# Envelope-only decodes don't need Whisper's rate
+ENVELOPE_SAMPLE_RATE = 8000
+
+
+class CutList:
+    """
+    Kept [start, end) ranges of the source timeline (ascending, disjoint)
+    and the mapping from source times to the cut output's times.
+    """
+
+    def __init__(self, keep, source_duration):
+        self.keep = [(float(start), float(end)) for start, end in keep if end > start]
+        self.source_duration = float(source_duration)
+        self._starts = [start for start, _ in self.keep]
+        self._offsets = []
+        total = 0.0
+        for start, end in self.keep:
+            self._offsets.append(total)
+            total += end - start
+        self.duration = total
+
+    @property
+    def removed(self):
+        return max(0.0, self.source_duration - self.duration)
+
+    @property
+    def is_noop(self):
+        return not self.keep or self.removed < MIN_CUT_SECONDS
+
+    def to_output(self, t):
+        """Time on the cut timeline of source time `t`; cut-out times snap to the next kept frame."""
+        i = bisect.bisect_right(self._starts, t) - 1
+        if i < 0:
+            return 0.0
+        start, end = self.keep[i]
+        if t < end:
+            return self._offsets[i] + (t - start)
+        return self._offsets[i] + (end - start)
+
+    def remap_words(self, words):
+        """Copies of `words` with start/end moved onto the cut timeline; fully cut words are dropped."""
+        remapped = []
+        for word in words:
+            start, end = self.to_output(word["start"]), self.to_output(word["end"])
+            if end > start:
+                remapped.append(dict(word, start=round(start, 3), end=round(end, 3)))
+        return remapped
+
+    def filters(self, video_in, audio_in, video_out, audio_out):
+        """
+        filter_complex chains keeping the ranges: every range is trimmed on its
+        own with its timestamps restarted at zero, and concat joins them, so
+        audio and video line up again at each seam (also for variable frame
+        rate sources). Labels are bare ("0:v:0", "vcut"); `audio_in` None gives
+        a video-only graph.
+        """
+        count = len(self.keep)
+        streams = [("v", video_in, "split", "trim", "setpts")]
+        if audio_in:
+            streams.append(("a", audio_in, "asplit", "atrim", "asetpts"))
+        chains = []
+        for kind, label, split, trim, setpts in streams:
+            if count > 1:
+                branches = [f"cut{kind}in{i}" for i in range(count)]
+                chains.append(f"[{label}]{split}={count}" + "".join(f"[{b}]" for b in branches))
+            else:
+                branches = [label]
+            for i, (start, end) in enumerate(self.keep):
+                chains.append(f"[{branches[i]}]{trim}=start={start:.3f}:end={end:.3f},"
+                              f"{setpts}=PTS-STARTPTS[cut{kind}{i}]")
+        pads = "".join(f"[cut{kind}{i}]" for i in range(count) for kind, *_ in streams)
+        outs = f"[{video_out}]" + (f"[{audio_out}]" if audio_in else "")
+        chains.append(f"{pads}concat=n={count}:v=1:a={len(streams) - 1}{outs}")
+        return chains
+
+    def summary(self):
+        return (f"{len(self.keep)} ranges kept, {self.removed:.1f}s of "
+                f"{self.source_duration:.1f}s removed")
+
+
+def _runs(mask):
+    """(first, last) index pairs of the True runs in a boolean array."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def _coarsen(ranges, max_ranges):
+    """Merge neighbours across all but the longest `max_ranges - 1` gaps."""
+    gaps = sorted((nxt[0] - cur[1] for cur, nxt in zip(ranges, ranges[1:])), reverse=True)
+    shortest_cut = gaps[max_ranges - 1] + 1e-6
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start - merged[-1][1] < shortest_cut:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_cuts(detector, words, duration, threshold_db=SILENCE_THRESHOLD_DB,
+              min_cut=MIN_CUT_SECONDS, margin=SPEECH_MARGIN, max_ranges=MAX_CUT_RANGES):
+    """
+    Kept ranges for a clip from a finished SilenceDetector and its words.
+
+    Args:
+        detector: SilenceDetector fed from the clip's audio
+        words: [{"start", "end", ...}] on the source timeline (may be empty)
+        duration: Source duration in seconds
+        threshold_db: Quiet level relative to the loudest frame
+
+    Returns:
+        CutList (is_noop when nothing worth cutting was found)
+    """
+    envelope = detector.envelope_db
+    if not len(envelope) or duration <= 0:
+        return CutList([(0.0, duration)], duration)
+    frame = detector.frame_seconds
+    count = len(envelope)
+    threshold = max(float(envelope.max()) + threshold_db, SILENCE_FLOOR_DB)
+
+    keep = envelope >= threshold
+    pad = int(round(margin / frame))
+    if pad:
+        keep = np.convolve(keep.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), mode="same") > 0
+    for word in words:
+        first = max(0, int((word["start"] - margin) / frame))
+        last = min(count, int(np.ceil((word["end"] + margin) / frame)))
+        keep[first:last] = True
+    if not keep.any():
+        return CutList([(0.0, duration)], duration)
+
+    shortest = int(np.ceil(min_cut / frame))
+    for first, last in _runs(~keep):
+        if last - first < shortest and first > 0 and last < count:
+            keep[first:last] = True
+
+    ranges = []
+    for first, last in _runs(keep):
+        # The container can run a little past the audio; keep the tail with the last frame
+        end = duration if last >= count else min(last * frame, duration)
+        ranges.append((round(first * frame, 3), round(end, 3)))
+    if len(ranges) > max_ranges:
+        ranges = _coarsen(ranges, max_ranges)
+        logger.debug("Silence cut coarsened to %d ranges", len(ranges))
+    return CutList(ranges, duration)
+
+
+def detect_silence(media_path, should_stop=None, timeout=None):
+    """Envelope-only decode for when no transcription decode was available to tee from."""
+    detector = SilenceDetector()
+    with decode_pcm(media_path, sample_rate=ENVELOPE_SAMPLE_RATE, timeout=timeout,
+                    analyzers=[detector], should_stop=should_stop):
+        pass
+    return detector
@@ -6,40 +6,32 @@ from tkinter import filedialog, ttk, messagebox, colorchooser
 from pathlib import Path
 import logging
 from faster_whisper import WhisperModel
-import ffmpeg
 import re
 import threading
-import tempfile
 import time
 import atexit
 import signal
 import gc
-import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from transcript_cache import transcript_cache
+from ffmpeg_runner import FFmpegRunner, cancel_all, log_progress
+from audio_frontend import decode_pcm, LoudnessMeter, SilenceDetector
+from silence_cut import plan_cuts, detect_silence
+from music_bed import music_beds, loop_input_args
+from media_probe import media_probe
+from segmented_render import render_segmented, escape_filter_path, MIN_SEGMENTED_SECONDS
 
 logging.basicConfig(level=logging.INFO, format="🔹 %(message)s")
 
 # Global list to track temporary files for cleanup
 TEMP_FILES = []
-ACTIVE_PROCESSES = []
 
 def cleanup_resources():
     """Clean up all temporary files and processes"""
-    global TEMP_FILES, ACTIVE_PROCESSES
+    global TEMP_FILES
     
     # Terminate any active processes
-    for proc in ACTIVE_PROCESSES[:]:
-        try:
-            if proc.poll() is None:  # Process is still running
-                proc.terminate()
-                proc.wait(timeout=5)
-        except:
-            try:
-                proc.kill()
-            except:
-                pass
-        finally:
-            if proc in ACTIVE_PROCESSES:
-                ACTIVE_PROCESSES.remove(proc)
+    cancel_all()
     
     # Clean up temporary files
     for temp_file in TEMP_FILES[:]:
@@ -109,110 +101,137 @@ def format_srt_time(seconds):
     ms = int((seconds * 1000) % 1000)
     return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
-def run_subprocess_safe(cmd, timeout=300, **kwargs):
-    """Run subprocess with proper encoding handling and resource management"""
-    global ACTIVE_PROCESSES
-    
-    proc = None
+def run_subprocess_safe(cmd, timeout=300, on_progress=None, duration=None, **kwargs):
+    """Run subprocess with drained output pipes, live ffmpeg progress and cancellation support"""
+    # Popen-level options are handled by the runner itself
+    popen_kwargs = {
+        k: v for k, v in kwargs.items()
+        if k not in ['timeout', 'check', 'capture_output', 'encoding', 'errors']
+    }
+    runner = FFmpegRunner(cmd, timeout=timeout, duration=duration, on_progress=on_progress, **popen_kwargs)
     try:
-        # Set default kwargs for Popen with proper encoding handling
-        popen_kwargs = {
-            'stdout': subprocess.PIPE,
-            'stderr': subprocess.PIPE,
-            'text': True,
-            'encoding': 'utf-8',
-            'errors': 'replace'
-        }
-        
-        # On Windows, also set the creation flags to avoid console window
-        if sys.platform.startswith('win'):
-            popen_kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-        
-        # Add any additional kwargs
-        for k, v in kwargs.items():
-            if k not in ['timeout', 'check', 'capture_output', 'encoding', 'errors']:
-                popen_kwargs[k] = v
-        
-        # Start process
-        proc = subprocess.Popen(cmd, **popen_kwargs)
-        ACTIVE_PROCESSES.append(proc)
-        
-        # Wait for completion with timeout
-        try:
-            stdout, stderr = proc.communicate(timeout=timeout)
-        except subprocess.TimeoutExpired:
-            logging.warning(f"Process timed out after {timeout}s: {' '.join(str(x) for x in cmd[:3])}")
-            proc.kill()
-            try:
-                stdout, stderr = proc.communicate(timeout=5)
-            except subprocess.TimeoutExpired:
-                stdout, stderr = '', 'Process killed due to timeout'
-            raise subprocess.TimeoutExpired(cmd, timeout, output=stdout, stderr=stderr)
-        
-        # Remove from active processes
-        if proc in ACTIVE_PROCESSES:
-            ACTIVE_PROCESSES.remove(proc)
-        
-        # Check return code if requested
-        check_flag = kwargs.get('check', True)
-        if check_flag and proc.returncode != 0:
-            cmd_str = ' '.join(str(x) for x in cmd[:5])
-            error_msg = f"Command failed with return code {proc.returncode}: {cmd_str}"
-            if stderr:
-                stderr_safe = stderr[:500] if isinstance(stderr, str) else str(stderr)[:500]
-                error_msg += f"\nError output: {stderr_safe}"
-            raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
-        
-        # Create result object similar to subprocess.run
-        class Result:
-            def __init__(self, returncode, stdout, stderr):
-                self.returncode = returncode
-                self.stdout = stdout if stdout else ""
-                self.stderr = stderr if stderr else ""
-        
-        return Result(proc.returncode, stdout, stderr)
-        
-    except Exception as e:
-        # Clean up process if it exists
-        if proc is not None:
-            try:
-                if proc in ACTIVE_PROCESSES:
-                    ACTIVE_PROCESSES.remove(proc)
-                if proc.poll() is None:
-                    proc.kill()
-                    proc.wait(timeout=5)
-            except:
-                pass
+        result = runner.run(check=kwargs.get('check', True))
+    except subprocess.TimeoutExpired:
+        logging.warning(f"Process timed out after {timeout}s: {' '.join(str(x) for x in cmd[:3])}")
         raise
+    if result.cancelled:
+        raise RuntimeError(f"Process cancelled: {' '.join(str(x) for x in cmd[:3])}")
+    return result
 
 def get_video_duration(file_path):
-    """Get video duration with better error handling"""
-    try:
-        result = run_subprocess_safe([
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration', 
-            '-of', 'json', str(file_path)
-        ], timeout=30)
-        
-        if result.stdout:
-            duration_json = json.loads(result.stdout)
-            duration = float(duration_json["format"]["duration"])
-            
-            if duration <= 0 or duration > 86400:
-                logging.warning(f"Invalid duration {duration}s, using default")
-                return 300.0
-            
-            return duration
-        else:
-            logging.warning("No duration information from ffprobe")
-            return 300.0
-        
-    except Exception as e:
-        logging.warning(f"Could not get video duration: {e}")
+    """Get video duration with better error handling (cached ffprobe)"""
+    info = media_probe.probe(file_path)
+    if info is None or not info.duration:
+        logging.warning(f"Could not get video duration for {file_path}, using default")
+        return 300.0
+
+    duration = info.duration
+    if duration <= 0 or duration > 86400:
+        logging.warning(f"Invalid duration {duration}s, using default")
         return 300.0
 
-def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3600):
+    return duration
+
+WHISPER_DECODE_OPTIONS = {
+    "beam_size": 5,
+    "temperature": 0.0,
+    "compression_ratio_threshold": 2.4,
+    "log_prob_threshold": -1.0,
+    "no_speech_threshold": 0.6,
+    "initial_prompt": "This is a tutorial video with clear speech.",
+}
+CHUNK_DURATION = 180  # 3-minute chunks for better accuracy
+OVERLAP_DURATION = 10  # overlap between chunks to prevent word cutting
+TRANSCRIBE_WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS", max(1, min(4, (os.cpu_count() or 2) // 2))))
+# Parallel ranges for long subtitle burns: 0 = auto from length/cores, 1 = single process
+SEGMENTED_RENDER_SEGMENTS = int(os.environ.get("SEGMENTED_RENDER_SEGMENTS", "0"))
+
+def extract_valid_words(segments, offset=0.0):
+    """Flatten Whisper segments into word dicts, shifted by `offset` seconds"""
+    words = []
+    for segment in segments:
+        if hasattr(segment, 'words') and segment.words:
+            for w in segment.words:
+                if (w.word and w.word.strip() and 
+                    hasattr(w, 'start') and hasattr(w, 'end') and
+                    w.start >= 0 and w.end > w.start and w.end - w.start <= 15):
+                    words.append({
+                        "word": w.word.strip(),
+                        "start": float(w.start) + offset,
+                        "end": float(w.end) + offset
+                    })
+    return words
+
+def plan_transcription_chunks(duration, chunk_duration=CHUNK_DURATION, overlap_duration=OVERLAP_DURATION):
+    """Split [0, duration) into chunks that overlap their successor by `overlap_duration`"""
+    chunks = []
+    current_start = 0
+    while current_start < duration:
+        chunk_end = min(current_start + chunk_duration, duration)
+        # Add overlap except for the last chunk
+        overlap_end = min(chunk_end + overlap_duration, duration) if chunk_end < duration else chunk_end
+        chunks.append({
+            'start': current_start,
+            'end': overlap_end,
+            'processing_end': chunk_end,  # Where to stop taking words for this chunk
+            'chunk_id': len(chunks)
+        })
+        current_start = chunk_end  # Next chunk starts where this one ends (no overlap in start times)
+    return chunks
+
+def merge_chunk_words(chunks, chunk_results):
+    """Merge per-chunk words in chunk order, dropping overlap duplicates"""
+    merged = []
+    for chunk_info in chunks:
+        for word in chunk_results.get(chunk_info['chunk_id'], []):
+            # Only include words within the processing range to avoid overlap duplicates
+            if word["start"] >= chunk_info['processing_end']:
+                continue
+            # Ensure word is not too close to an existing identical word
+            is_duplicate = any(
+                abs(existing["start"] - word["start"]) < 0.1 and
+                existing["word"].strip().lower() == word["word"].strip().lower()
+                for existing in merged[-10:]
+            )
+            if not is_duplicate:
+                merged.append(word)
+    return merged
+
+def transcribe_chunks_parallel(model, pcm, chunks, workers, progress_callback=None):
+    """Transcribe zero-copy PCM slices on a thread pool; returns {chunk_id: words}"""
+    def transcribe_chunk(chunk_info):
+        audio = pcm.slice(chunk_info['start'], chunk_info['end'])
+        if len(audio) < pcm.sample_rate * 0.1:
+            return []
+        segments, _ = model.transcribe(
+            audio, word_timestamps=True, language="en",
+            condition_on_previous_text=False, **WHISPER_DECODE_OPTIONS
+        )
+        return extract_valid_words(segments, offset=chunk_info['start'])
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper-chunk") as pool:
+        futures = {pool.submit(transcribe_chunk, chunk_info): chunk_info for chunk_info in chunks}
+        for future in as_completed(futures):
+            chunk_info = futures[future]
+            chunk_id = chunk_info['chunk_id']
+            try:
+                results[chunk_id] = future.result()
+                logging.info(f"Chunk {chunk_id + 1}/{len(chunks)} complete ({chunk_info['start']:.1f}s - {chunk_info['end']:.1f}s): {len(results[chunk_id])} words")
+            except Exception as e:
+                logging.warning(f"Failed to process chunk {chunk_id + 1}: {e}")
+            if progress_callback:
+                progress_callback()
+    return results
+
+def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3600, workers=None, analyzers=()):
     """
     FIXED: More robust transcription with proper timestamp synchronization for long videos
+
+    `audio_path` may be any media file: its audio is decoded once, straight into
+    memory, and Whisper transcribes those samples. `analyzers` (audio_frontend
+    PcmAnalyzer instances) are fed from the same decode; a cached transcript
+    skips the decode, leaving them empty.
     """
     logging.info(f"🧠 Starting transcription: {audio_path}")
     
@@ -221,61 +240,58 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
         return []
     
     model = None
+    pcm = None
     all_words = []
     
+    # Re-styling the same clip must not re-run Whisper: look up the transcript
+    # by audio content + model + decode settings first.
+    cache_key = transcript_cache.make_key(
+        audio_path, "base", "en",
+        chunk_duration=CHUNK_DURATION, overlap_duration=OVERLAP_DURATION,
+        **WHISPER_DECODE_OPTIONS
+    )
+    cached_words = transcript_cache.get_words(cache_key)
+    if cached_words is not None:
+        logging.info(f"♻️ Reusing cached transcript: {len(cached_words)} words")
+        if progress_callback:
+            progress_callback()
+        return cached_words
+    
     try:
-        # Get audio duration
-        try:
-            probe = ffmpeg.probe(str(audio_path))
-            duration = float(probe['format']['duration'])
-            logging.info(f"Audio duration: {duration:.1f} seconds")
-        except Exception as e:
-            logging.warning(f"Could not get audio duration: {e}")
-            duration = 300.0
+        # Get audio duration (same cached probe as get_video_duration)
+        duration = get_video_duration(audio_path)
+        logging.info(f"Audio duration: {duration:.1f} seconds")
         
         # Validate duration
         if duration <= 0:
             logging.error("Invalid audio duration")
             return []
         
-        # Initialize model with optimal settings for longer transcription
-        logging.info("Loading Whisper model...")
-        model = WhisperModel("base", device="cpu", compute_type="int8", num_workers=1)
+        # Decode once, straight into memory: Whisper gets the samples (no WAV
+        # round trip, no second decode) and the analyzers see the same blocks
+        pcm = decode_pcm(audio_path, timeout=max(300, int(duration)), analyzers=analyzers, duration=duration)
+        if progress_callback:
+            progress_callback()
+        if not pcm.duration:
+            logging.warning(f"No audio in {os.path.basename(audio_path)}; skipping transcription")
+            return []
         
         # Determine processing strategy based on duration
         if duration <= 600:  # 10 minutes or less - process as single file
+            logging.info("Loading Whisper model...")
+            model = WhisperModel("base", device="cpu", compute_type="int8", num_workers=1)
             logging.info("Processing audio in single pass (≤10 minutes)")
             
             try:
                 segments, info = model.transcribe(
-                    str(audio_path),
-                    beam_size=5,
+                    pcm.samples,
                     word_timestamps=True,
                     language="en",
                     condition_on_previous_text=False,
-                    temperature=0.0,
-                    compression_ratio_threshold=2.4,
-                    log_prob_threshold=-1.0,
-                    no_speech_threshold=0.6,
-                    initial_prompt="This is a tutorial video with clear speech."
+                    **WHISPER_DECODE_OPTIONS
                 )
-                
-                word_count = 0
-                for segment in segments:
-                    if hasattr(segment, 'words') and segment.words:
-                        for w in segment.words:
-                            if (w.word and w.word.strip() and 
-                                hasattr(w, 'start') and hasattr(w, 'end') and
-                                w.start >= 0 and w.end > w.start and w.end - w.start <= 15):
-                                
-                                all_words.append({
-                                    "word": w.word.strip(),
-                                    "start": float(w.start),
-                                    "end": float(w.end)
-                                })
-                                word_count += 1
-                
-                logging.info(f"Single-pass transcription complete: {word_count} words")
+                all_words = extract_valid_words(segments)
+                logging.info(f"Single-pass transcription complete: {len(all_words)} words")
                 
                 if progress_callback:
                     progress_callback()
@@ -285,140 +301,19 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
                 return []
         
         else:
-            # FIXED: For longer files, use optimized chunked processing with proper timestamp alignment
-            chunk_duration = 180  # Reduced to 3-minute chunks for better accuracy
-            overlap_duration = 10  # 10-second overlap between chunks to prevent word cutting
-            
-            # Calculate actual chunks with overlap
-            chunks = []
-            current_start = 0
-            
-            while current_start < duration:
-                chunk_end = min(current_start + chunk_duration, duration)
-                
-                # Add overlap except for the last chunk
-                if chunk_end < duration:
-                    overlap_end = min(chunk_end + overlap_duration, duration)
-                else:
-                    overlap_end = chunk_end
-                
-                chunks.append({
-                    'start': current_start,
-                    'end': overlap_end,
-                    'processing_end': chunk_end,  # Where to stop processing words for this chunk
-                    'chunk_id': len(chunks)
-                })
-                
-                current_start = chunk_end  # Next chunk starts where this one ends (no overlap in start times)
+            # Longer files: transcribe overlapping chunks of the shared 16 kHz
+            # buffer in parallel. One model with num_workers=N lets
+            # N threads run transcribe() concurrently.
+            workers = max(1, workers or TRANSCRIBE_WORKERS)
+            chunks = plan_transcription_chunks(duration)
+            logging.info(f"Processing long audio in {len(chunks)} overlapping chunks of {CHUNK_DURATION}s on {workers} worker(s)")
             
-            total_chunks = len(chunks)
-            logging.info(f"Processing long audio in {total_chunks} overlapping chunks of {chunk_duration}s each")
+            logging.info("Loading Whisper model...")
+            cpu_threads = max(1, (os.cpu_count() or workers) // workers)
+            model = WhisperModel("base", device="cpu", compute_type="int8", num_workers=workers, cpu_threads=cpu_threads)
             
-            # Process chunks with progress tracking and proper timestamp handling
-            for chunk_info in chunks:
-                start_time = chunk_info['start']
-                end_time = chunk_info['end']
-                processing_end = chunk_info['processing_end']
-                chunk_id = chunk_info['chunk_id']
-                
-                logging.info(f"Processing chunk {chunk_id + 1}/{total_chunks}: {start_time:.1f}s - {end_time:.1f}s (process until {processing_end:.1f}s)")
-                
-                # Create temporary chunk file
-                chunk_path = None
-                try:
-                    # Use system temp directory for better reliability
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                        chunk_path = temp_file.name
-                    
-                    TEMP_FILES.append(chunk_path)
-                    
-                    # Extract chunk with extended timeout for long files
-                    chunk_timeout = min(300, int((end_time - start_time) * 2))
-                    
-                    run_subprocess_safe([
-                        "ffmpeg", "-y", "-i", str(audio_path),
-                        "-ss", str(start_time), 
-                        "-t", str(end_time - start_time),
-                        "-acodec", "pcm_s16le", 
-                        "-ar", "16000", 
-                        "-ac", "1",
-                        "-avoid_negative_ts", "make_zero",
-                        chunk_path
-                    ], timeout=chunk_timeout)
-                    
-                    # Verify chunk was created
-                    if not os.path.exists(chunk_path) or os.path.getsize(chunk_path) < 1000:
-                        logging.warning(f"Chunk {chunk_id + 1} failed to create or too small, skipping")
-                        continue
-                    
-                    # Transcribe chunk with optimal settings
-                    segments, info = model.transcribe(
-                        chunk_path,
-                        beam_size=5,
-                        word_timestamps=True,
-                        language="en",
-                        condition_on_previous_text=False,
-                        temperature=0.0,
-                        compression_ratio_threshold=2.4,
-                        log_prob_threshold=-1.0,
-                        no_speech_threshold=0.6,
-                        initial_prompt="This is a tutorial video with clear speech."
-                    )
-                    
-                    # FIXED: Process chunk results with proper timestamp adjustment and overlap handling
-                    chunk_words = 0
-                    for segment in segments:
-                        if hasattr(segment, 'words') and segment.words:
-                            for w in segment.words:
-                                if (w.word and w.word.strip() and 
-                                    hasattr(w, 'start') and hasattr(w, 'end') and
-                                    w.start >= 0 and w.end > w.start and w.end - w.start <= 15):
-                                    
-                                    # CRITICAL FIX: Calculate adjusted timestamps correctly
-                                    adjusted_start = float(w.start) + start_time
-                                    adjusted_end = float(w.end) + start_time
-                                    
-                                    # FIXED: Only include words within the processing range to avoid overlap duplicates
-                                    if adjusted_start < processing_end:
-                                        # Additional validation: ensure word is not too close to existing words
-                                        is_duplicate = False
-                                        for existing_word in all_words[-10:]:  # Check last 10 words for duplicates
-                                            if (abs(existing_word["start"] - adjusted_start) < 0.1 and 
-                                                existing_word["word"].strip().lower() == w.word.strip().lower()):
-                                                is_duplicate = True
-                                                break
-                                        
-                                        if not is_duplicate:
-                                            adjusted_word = {
-                                                "word": w.word.strip(),
-                                                "start": adjusted_start,
-                                                "end": adjusted_end
-                                            }
-                                            all_words.append(adjusted_word)
-                                            chunk_words += 1
-                    
-                    logging.info(f"Chunk {chunk_id + 1} complete: {chunk_words} words extracted")
-                    
-                    # Update progress
-                    if progress_callback:
-                        progress_callback()
-                
-                except Exception as e:
-                    logging.warning(f"Failed to process chunk {chunk_id + 1}: {e}")
-                    continue
-                
-                finally:
-                    # Clean up chunk file immediately
-                    if chunk_path and os.path.exists(chunk_path):
-                        try:
-                            os.remove(chunk_path)
-                            if chunk_path in TEMP_FILES:
-                                TEMP_FILES.remove(chunk_path)
-                        except Exception as e:
-                            logging.warning(f"Could not remove chunk: {e}")
-                
-                # Small delay to prevent memory pressure
-                time.sleep(0.1)
+            chunk_results = transcribe_chunks_parallel(model, pcm, chunks, workers, progress_callback)
+            all_words = merge_chunk_words(chunks, chunk_results)
         
         # FIXED: Final processing and validation with improved timestamp sorting
         if all_words:
@@ -464,6 +359,7 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
                     all_words[i + 1]["start"] = midpoint + 0.025
             
             logging.info(f"FIXED: Transcription complete with synchronized timestamps: {len(all_words)} valid words extracted")
+            transcript_cache.put_words(cache_key, all_words)
         else:
             logging.warning("No words extracted from transcription")
         
@@ -474,7 +370,9 @@ def transcribe_audio_improved(audio_path, progress_callback=None, max_duration=3
         return []
     
     finally:
-        # Clean up model and force garbage collection
+        # Release the PCM buffer, clean up model and force garbage collection
+        if pcm is not None:
+            pcm.close()
         if model is not None:
             try:
                 del model
@@ -735,13 +633,19 @@ def add_background_music_simple(video_path, music_path, output_path, music_volum
         # Use longer timeout for music processing
         timeout = 1800  # 30 minutes
         
-        run_subprocess_safe([
-            "ffmpeg", "-y", "-i", str(video_path), "-i", str(music_path),
-            "-filter_complex",
-            f"[1:a]aloop=loop=-1:size=2e+09,volume={music_volume}[bg];[0:a][bg]amix=inputs=2:duration=first:dropout_transition=2[aout]",
-            "-map", "0:v", "-map", "[aout]",
-            "-c:v", "copy", "-c:a", "aac", "-b:a", "128k", "-shortest", str(output_path)
-        ], timeout=timeout)
+        # The cached bed is already decoded, resampled and volume-scaled; the raw track is the fallback
+        bed = music_beds.get(str(music_path), music_volume)
+        music_chain = "anull" if bed else f"volume={music_volume}"
+        # -stream_loop re-reads the file as needed; aloop would buffer the whole decoded track
+        try:
+            run_subprocess_safe(["ffmpeg", "-y", "-i", str(video_path)] + loop_input_args(bed or str(music_path)) + [
+                "-filter_complex",
+                f"[1:a]{music_chain}[bg];[0:a][bg]amix=inputs=2:duration=first:dropout_transition=2[aout]",
+                "-map", "0:v", "-map", "[aout]",
+                "-c:v", "copy", "-c:a", "aac", "-b:a", "128k", "-shortest", str(output_path)
+            ], timeout=timeout, on_progress=log_progress("Mixing music"))
+        finally:
+            music_beds.release(bed)
         
         logging.info(f"Background music added with volume: {music_volume}")
         
@@ -749,6 +653,34 @@ def add_background_music_simple(video_path, music_path, output_path, music_volum
         logging.error(f"Background music addition failed: {e}")
         raise
 
+def burn_subtitles_segmented(input_video, output_video, ass_files, timeout):
+    """Burn `ass_files` into a long video as keyframe-aligned ranges encoded in parallel"""
+    def _runner(cmd):
+        # Cancellation (RuntimeError) propagates; failures fall back to the one-pass burn
+        try:
+            run_subprocess_safe(cmd, timeout=timeout)
+            return True, ""
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+            return False, str(e)
+
+    def _video_cmd(seg):
+        vf = ",".join(f"subtitles='{escape_filter_path(p)}'" for p in seg.ass_paths)
+        return (["ffmpeg", "-y"] + seg.input_args(input_video) + (["-vf", vf] if vf else []) +
+                ["-an", "-c:v", "libx264", "-crf", "23", "-preset", "medium",
+                 "-threads", str(seg.threads), seg.output])
+
+    def _audio_cmd(path):
+        return ["ffmpeg", "-y", "-i", str(input_video), "-map", "0:a", "-vn", "-c:a", "aac", "-b:a", "128k", path]
+
+    ok, err = render_segmented(
+        str(input_video), str(output_video), _video_cmd, _audio_cmd,
+        ass_paths=ass_files, segments=SEGMENTED_RENDER_SEGMENTS, runner=_runner,
+        status_cb=lambda _type, message: logging.info(message.strip()),
+    )
+    if not ok:
+        logging.warning(f"Segmented render unavailable ({err}); burning subtitles in one pass")
+    return ok
+
 def process_video_with_settings(input_video, output_video, background_music, subtitle_individual, subtitle_highlighted, add_title, use_auto_editor, use_transcription, progress_callback=None, min_subtitle_duration=1.5, max_words_per_subtitle=4, subtitle_color=(255, 255, 255), border_color=(0, 0, 0), music_volume=0.15, subtitle_font_name="Roboto Bold", subtitle_font_size=18, title_text="", title_font_name="Arial", title_font_size=56, title_color=(255, 255, 255), title_position=8, title_duration=None):
     """
     ENHANCED: Main processing function with customizable subtitle colors, fonts, title overlay, and music volume
@@ -760,8 +692,6 @@ def process_video_with_settings(input_video, output_video, background_music, sub
     safe_base_name = re.sub(r'[^\w\-_\.]', '_', base_name)
     
     temp_files = {
-        'auto_edited': f"auto_{safe_base_name}_{timestamp}_{pid}.mp4",
-        'audio_path': f"temp_{safe_base_name}_{timestamp}_{pid}.wav", 
         'highlighted_ass': f"highlighted_{safe_base_name}_{timestamp}_{pid}.ass",
         'title_ass': f"title_{safe_base_name}_{timestamp}_{pid}.ass",
         'final_subs': f"final_subs_{safe_base_name}_{timestamp}_{pid}.mp4",
@@ -791,50 +721,52 @@ def process_video_with_settings(input_video, output_video, background_music, sub
                 progress_callback()
             return
 
-        # Auto-editor processing
         video_to_process = input_video
-        if use_auto_editor:
-            logging.info("Applying auto-editor...")
-            try:
-                auto_editor_timeout = max(1200, int(video_duration * 3))  # Extended timeout for auto-editor
-                run_subprocess_safe([
-                    "auto-editor", str(input_video), "-o", temp_files['auto_edited'],
-                    "--no-open", "--frame-rate", "30", "--silent-speed", "99999"
-                ], timeout=auto_editor_timeout)
-                video_to_process = temp_files['auto_edited']
-                if progress_callback:
-                    progress_callback()
-            except Exception as e:
-                logging.warning(f"Auto-editor failed: {e}")
         
         # ENHANCED: Transcription processing with synchronized timestamps
         words = []
         subtitle_groups = []
+        # Filled from the transcription decode (no temp WAV); the silence
+        # envelope also drives the built-in silence cut
+        loudness, silence = LoudnessMeter(), SilenceDetector()
         
         if use_transcription and (subtitle_individual or subtitle_highlighted or background_music):
             logging.info("ENHANCED: Starting synchronized transcription process...")
             
-            # Extract audio with extended timeout
-            audio_timeout = max(300, int(video_duration))
-            run_subprocess_safe([
-                "ffmpeg", "-y", "-i", str(video_to_process),
-                "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", 
-                temp_files['audio_path']
-            ], timeout=audio_timeout)
-            
+            # Use ENHANCED transcription with proper timestamp synchronization
+            words = transcribe_audio_improved(str(video_to_process), progress_callback, analyzers=(loudness, silence))
+            if len(silence.envelope_db):
+                logging.info(f"Audio: {loudness.loudness_db:.1f} dBFS gated loudness, peak {loudness.peak_db:.1f} dBFS, "
+                             f"{len(silence.intervals)} silent stretches ({silence.silent_seconds:.1f}s)")
+        
+        # Silence removal: the cuts are applied inside the render below and the
+        # words move onto the shortened timeline, so no extra encode pass
+        cuts = None
+        if use_auto_editor:
+            logging.info("Finding silent parts...")
+            try:
+                if not len(silence.envelope_db):
+                    silence = detect_silence(video_to_process, timeout=max(300, int(video_duration)))
+                cuts = plan_cuts(silence, words, video_duration)
+                if cuts.is_noop:
+                    logging.info("No silent parts worth cutting")
+                    cuts = None
+                else:
+                    logging.info(f"Silence cut: {cuts.summary()}")
+                    words = cuts.remap_words(words)
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+                logging.warning(f"Silence detection failed: {e}")
             if progress_callback:
                 progress_callback()
-            
-            # Use ENHANCED transcription with proper timestamp synchronization
-            words = transcribe_audio_improved(temp_files['audio_path'], progress_callback)
-            
-            if subtitle_highlighted and words:
-                subtitle_groups = group_words_into_subtitles_improved(
-                    words, 
-                    max_words_per_group=max_words_per_subtitle,
-                    min_duration=min_subtitle_duration
-                )
-                logging.info(f"ENHANCED: Generated {len(subtitle_groups)} synchronized subtitle groups")
+        output_duration = cuts.duration if cuts else video_duration
+        
+        if subtitle_highlighted and words:
+            subtitle_groups = group_words_into_subtitles_improved(
+                words, 
+                max_words_per_group=max_words_per_subtitle,
+                min_duration=min_subtitle_duration
+            )
+            logging.info(f"ENHANCED: Generated {len(subtitle_groups)} synchronized subtitle groups")
 
         # Generate subtitle files with custom colors and fonts
         if subtitle_highlighted and use_transcription and subtitle_groups:
@@ -850,48 +782,57 @@ def process_video_with_settings(input_video, output_video, background_music, sub
                 title_text = get_title_for_video(input_video)
             
             generate_title_overlay_ass(
-                temp_files['title_ass'], video_duration, title_text,
+                temp_files['title_ass'], output_duration, title_text,
                 title_font_name, title_font_size, title_color, 
                 title_position, title_duration
             )
 
-        # Apply subtitles and overlays
-        if subtitle_highlighted or add_title:
-            logging.info("Applying synchronized subtitles and overlays...")
-            
-            filter_parts = []
-            if subtitle_highlighted and use_transcription and subtitle_groups:
-                ass_path = temp_files['highlighted_ass'].replace('\\', '\\\\').replace(':', '\\:')
-                filter_parts.append(f"subtitles={ass_path}")
-            if add_title:
-                title_path = temp_files['title_ass'].replace('\\', '\\\\').replace(':', '\\:')
-                filter_parts.append(f"subtitles={title_path}")
-            
+        # Apply subtitles, overlays and silence cuts in one pass
+        filter_parts = []
+        ass_files = []
+        if subtitle_highlighted and use_transcription and subtitle_groups:
+            ass_path = temp_files['highlighted_ass'].replace('\\', '\\\\').replace(':', '\\:')
+            filter_parts.append(f"subtitles={ass_path}")
+            ass_files.append(temp_files['highlighted_ass'])
+        if add_title:
+            title_path = temp_files['title_ass'].replace('\\', '\\\\').replace(':', '\\:')
+            filter_parts.append(f"subtitles={title_path}")
+            ass_files.append(temp_files['title_ass'])
+        
+        if filter_parts or cuts:
             if filter_parts:
-                filter_complex = ",".join(filter_parts)
-                subtitle_timeout = max(1800, int(video_duration * 4))  # Extended timeout for subtitle processing
-                
+                logging.info("Applying synchronized subtitles and overlays...")
+            subtitle_timeout = max(1800, int(video_duration * 4))  # Extended timeout for subtitle processing
+            
+            burned = False
+            # Segments are ranges of the source timeline, so cut renders take one pass
+            if not cuts and SEGMENTED_RENDER_SEGMENTS != 1 and video_duration >= MIN_SEGMENTED_SECONDS:
+                burned = burn_subtitles_segmented(
+                    video_to_process, temp_files['final_subs'], ass_files, subtitle_timeout
+                )
+            if not burned:
+                if cuts:
+                    # Cut first; the subtitles are timed for the cut timeline
+                    video_chain = ",".join(filter_parts or ["null"])
+                    filter_complex = ";".join(cuts.filters("0:v:0", "0:a:0", "vcut", "aout") + [f"[vcut]{video_chain}[vout]"])
+                    maps = ["-map", "[vout]", "-map", "[aout]"]
+                else:
+                    filter_complex = ",".join(filter_parts)
+                    maps = ["-map", "0:a"]
                 run_subprocess_safe([
                     "ffmpeg", "-y", "-i", str(video_to_process),
-                    "-filter_complex", filter_complex,
-                    "-map", "0:a", "-c:v", "libx264", "-crf", "23", "-preset", "medium",
+                    "-filter_complex", filter_complex
+                ] + maps + [
+                    "-c:v", "libx264", "-crf", "23", "-preset", "medium",
                     "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", temp_files['final_subs']
-                ], timeout=subtitle_timeout)
-            else:
-                run_subprocess_safe([
-                    "ffmpeg", "-y", "-i", str(video_to_process),
-                    "-c:v", "copy", "-c:a", "copy", temp_files['final_subs']
-                ], timeout=base_timeout)
-            
-            if progress_callback:
-                progress_callback()
+                ], timeout=subtitle_timeout, on_progress=log_progress("Burning subtitles" if filter_parts else "Cutting silence"), duration=output_duration)
         else:
             run_subprocess_safe([
                 "ffmpeg", "-y", "-i", str(video_to_process),
                 "-c:v", "copy", "-c:a", "copy", temp_files['final_subs']
             ], timeout=base_timeout)
-            if progress_callback:
-                progress_callback()
+        if progress_callback:
+            progress_callback()
 
         # Add background music with custom volume
         if background_music and os.path.exists(background_music):
@@ -1100,7 +1041,7 @@ class VideoProcessorGUI:
         ttk.Checkbutton(options_frame, text="📋 Add Title Overlay (ENHANCED - Customizable)", variable=self.add_title_var, command=self.on_title_toggle).pack(anchor="w", pady=2)
         
         self.use_auto_editor_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(options_frame, text="✂️ Use Auto-Editor (Remove Silence)", variable=self.use_auto_editor_var).pack(anchor="w", pady=2)
+        ttk.Checkbutton(options_frame, text="✂️ Remove Silent Parts", variable=self.use_auto_editor_var).pack(anchor="w", pady=2)
 
         # ENHANCED Subtitle Customization Frame
         subtitle_custom_frame = ttk.LabelFrame(main_frame, text="🎨 Subtitle Appearance", padding=15)